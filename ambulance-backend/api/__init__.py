@@ -1,4 +1,5 @@
 import os
+import logging
 from flask import Flask
 from .extensions import db, migrate, bcrypt, jwt  # adjust imports as needed
 from .config import config_by_name
@@ -128,6 +129,14 @@ def create_app(config_name=None):
 
     app.config.from_object(config_by_name[config_name])
 
+    # Structured, non-blocking logging for the api.* loggers
+    from .logging_setup import configure_logging
+    configure_logging(app)
+
+    # Faster JSON encoding (orjson when installed) with native datetime handling
+    from .serialization import init_json_provider
+    init_json_provider(app)
+
     # Initialize extensions
     db.init_app(app)
     migrate.init_app(app, db)
@@ -159,6 +168,29 @@ def create_app(config_name=None):
     except ImportError:
         pass
 
+    # Per-request timing, SQL counts and /metrics
+    from .instrumentation import init_instrumentation
+    init_instrumentation(app)
+
+    # Opt-in stack-sampling profiler for slow requests
+    from .profiler import init_profiler
+    init_profiler(app)
+
+    # CLI commands
+    from .datagen import seed_city_command
+    app.cli.add_command(seed_city_command)
+    from .dispatch_worker import dispatch_cli
+    app.cli.add_command(dispatch_cli)
+    from .eta import eta_cli
+    app.cli.add_command(eta_cli)
+
+    # Invalidate the cached hospital catalogue on committed hospital writes
+    from .hospital_cache import register_cache_listeners
+    register_cache_listeners()
+    # ...and the free-ambulance counts used to pick a hospital on committed driver status changes
+    from .hospital_selection import register_availability_listeners
+    register_availability_listeners()
+
     # Initialize database tables
     with app.app_context():
         try:
@@ -169,7 +201,7 @@ def create_app(config_name=None):
             if Hospital.query.count() == 0:
                 seed_sample_hospitals()
         except Exception as e:
-            print(f"Database initialization error: {e}")
+            logging.getLogger(__name__).exception("Database initialization error: %s", e)
     
 
 
@@ -1,12 +1,19 @@
 from flask import Blueprint, request, jsonify
 from .models import User, db
 from .otp_routes import send_otp_helper, verify_otp_helper
+from .serialization import make_serializer
+from .pagination import InvalidCursor, page_args, paginate_keyset, stream_ndjson, wants_ndjson
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-import traceback
+import logging
 import os
 from datetime import timedelta
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
+logger = logging.getLogger(__name__)
+
+serialize_user = make_serializer(
+    'id', 'name', 'email', 'phone_number', 'address', 'emergency_contacts', 'created_at'
+)
 
 # Remove custom token_required decorator - using flask_jwt_extended instead
 
@@ -31,8 +38,7 @@ def signup():
         
         return jsonify({'message': 'OTP sent for signup verification'}), 200
     except Exception as e:
-        print(f"Signup error: {str(e)}")
-        print(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Signup error: %s", e, extra={"key": "auth.signup_error"})
         return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/signup/verify', methods=['POST'])
@@ -72,8 +78,7 @@ def signup_verify():
             'token': token
         }), 201
     except Exception as e:
-        print(f"Signup verify error: {str(e)}")
-        print(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Signup verify error: %s", e, extra={"key": "auth.signup_verify_error"})
         return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/login', methods=['POST'])
@@ -97,8 +102,7 @@ def login():
         
         return jsonify({'message': 'OTP sent for login verification'}), 200
     except Exception as e:
-        print(f"Login error: {str(e)}")
-        print(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Login error: %s", e, extra={"key": "auth.login_error"})
         return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/login/verify', methods=['POST'])
@@ -140,8 +144,7 @@ def login_verify():
             'token': token
         }), 200
     except Exception as e:
-        print(f"Login verify error: {str(e)}")
-        print(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Login verify error: %s", e, extra={"key": "auth.login_verify_error"})
         return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/profile', methods=['PUT'])
@@ -206,18 +209,17 @@ def get_user(user_id):
 @auth_bp.route('/users', methods=['GET'])
 def get_all_users():
     try:
-        users = User.query.all()
-        users_data = []
-        for user in users:
-            users_data.append({
-                'id': user.id,
-                'name': user.name,
-                'email': user.email,
-                'phone_number': user.phone_number,
-                'address': user.address,
-                'emergency_contacts': user.emergency_contacts,
-                'created_at': user.created_at.isoformat() if user.created_at else None
-            })
-        return jsonify({'users': users_data}), 200
+        if wants_ndjson(request.args):
+            return stream_ndjson(User.query.order_by(User.id), serialize_user, filename='users.ndjson')
+        
+        limit, cursor, order = page_args(request.args)
+        users, next_cursor = paginate_keyset(User.query, User, limit, cursor, order)
+        return jsonify({
+            'users': [serialize_user(user) for user in users],
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        }), 200
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
@@ -0,0 +1,38 @@
+from sqlalchemy import select
+from .extensions import db
+from .models import Booking, Driver, Hospital
+
+ONGOING_STATUSES = ('Pending', 'Assigned', 'On Route', 'Arrived')
+
+# Everything the rider booking screens show, from one booking + hospital + driver join
+VIEW_COLUMNS = (
+    Booking.id, Booking.booking_code, Booking.user_id, Booking.hospital_id, Booking.ambulance_id, Booking.status,
+    Booking.booking_type, Booking.pickup_location, Booking.pickup_latitude, Booking.pickup_longitude,
+    Booking.destination, Booking.requested_at, Booking.assigned_at, Booking.auto_assigned,
+    Booking.ambulance_latitude, Booking.ambulance_longitude, Booking.ambulance_location_updated_at,
+    Hospital.name.label('hospital_name'), Hospital.address.label('hospital_address'),
+    Hospital.contact_number.label('hospital_contact_number'),
+    Hospital.latitude.label('hospital_latitude'), Hospital.longitude.label('hospital_longitude'),
+    Driver.name.label('driver_name'), Driver.phone_number.label('driver_phone'),
+    Driver.vehicle_number.label('driver_vehicle_number'), Driver.license_number.label('driver_license_number'),
+    Driver.current_latitude.label('driver_latitude'), Driver.current_longitude.label('driver_longitude')
+)
+
+def booking_view_query(*criteria):
+    return (
+        select(*VIEW_COLUMNS)
+        .outerjoin(Hospital, Hospital.id == Booking.hospital_id)
+        .outerjoin(Driver, Driver.id == Booking.ambulance_id)
+        .where(*criteria)
+    )
+
+def booking_view(booking_id):
+    return db.session.execute(booking_view_query(Booking.id == booking_id)).first()
+
+def booking_view_by_code(booking_code):
+    return db.session.execute(booking_view_query(Booking.booking_code == booking_code)).first()
+
+def ongoing_booking_view(user_id):
+    return db.session.execute(
+        booking_view_query(Booking.user_id == user_id, Booking.status.in_(ONGOING_STATUSES)).limit(1)
+    ).first()
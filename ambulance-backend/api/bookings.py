@@ -0,0 +1,69 @@
+import math
+import secrets
+from datetime import datetime
+from sqlalchemy import func, insert, literal, select
+from .models import Booking, Hospital, User
+
+def generate_booking_code():
+    return ''.join(secrets.choice('0123456789') for _ in range(8))
+
+def parse_pickup_coordinates(data):
+    """Pickup (latitude, longitude) from a request body as floats, or (None, None) when not given.
+
+    Clients send numbers or numeric strings; anything else, only one of the
+    pair, or a point off the globe raises ValueError with a client-facing message.
+    """
+    latitude, longitude = data.get('pickup_latitude'), data.get('pickup_longitude')
+    if latitude in (None, '') and longitude in (None, ''):
+        return None, None
+    try:
+        latitude, longitude = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        raise ValueError("pickup_latitude and pickup_longitude must both be numbers")
+    if not (math.isfinite(latitude) and math.isfinite(longitude)
+            and -90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError("Invalid pickup coordinates")
+    return latitude, longitude
+
+def insert_booking(session, user_id, hospital_id, values):
+    """Insert a booking in one INSERT ... SELECT ... RETURNING round trip.
+
+    The SELECT joins the user and hospital rows, so a missing user or
+    hospital inserts nothing instead of needing lookups first, and the
+    patient name/phone fall back to the user's own in the same statement.
+    values holds the remaining booking columns. Returns the (id,
+    booking_code, status) row, or None when the user or hospital doesn't
+    exist. A booking_code collision raises IntegrityError; the caller
+    retries with a fresh code.
+    """
+    now = datetime.utcnow()
+    table = Booking.__table__
+    columns = {name: value for name, value in values.items() if name not in ('patient_name', 'patient_phone')}
+    columns.update(requested_at=now, created_at=now, updated_at=now)
+
+    selected = [literal(value, type_=table.c[name].type) for name, value in columns.items()]
+    selected += [
+        User.id,
+        Hospital.id,
+        func.coalesce(literal(values.get('patient_name'), type_=table.c.patient_name.type), User.name),
+        func.coalesce(literal(values.get('patient_phone'), type_=table.c.patient_phone.type), User.phone_number)
+    ]
+    source = select(*selected).select_from(User).join(Hospital, Hospital.id == hospital_id).where(User.id == user_id)
+
+    return session.execute(
+        insert(Booking)
+        .from_select(list(columns) + ['user_id', 'hospital_id', 'patient_name', 'patient_phone'], source)
+        .returning(Booking.id, Booking.booking_code, Booking.status)
+    ).first()
+
+def missing_reference(session, user_id, hospital_id):
+    """Which of the booking's references doesn't exist: 'hospital', 'user' or None"""
+    hospital_exists, user_exists = session.execute(select(
+        select(Hospital.id).where(Hospital.id == hospital_id).exists(),
+        select(User.id).where(User.id == user_id).exists()
+    )).one()
+    if not hospital_exists:
+        return 'hospital'
+    if not user_exists:
+        return 'user'
+    return None
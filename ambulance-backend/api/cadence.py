@@ -0,0 +1,104 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from .eta import haversine_km
+
+# Seconds between fixes and metres of movement worth reporting, per situation.
+# Idle drivers get no displacement threshold: the device only reports after
+# moving that far, and a parked ambulance that goes quiet is taken offline
+# by the liveness sweep just when it is the one dispatch should pick.
+IDLE_STATIONARY = (120, 0)     # Available, parked
+IDLE_MOVING = (30, 0)          # Available, driving around
+OFFLINE = (300, 500)
+ARRIVED = (10, 25)             # At the pickup or carrying the patient to hospital
+EN_ROUTE_BY_SEVERITY = {
+    'Critical': (3, 10),
+    'High': (5, 15),
+    'Medium': (8, 20),
+    'Low': (10, 25)
+}
+
+STATIONARY_KMH = 3.0
+MIN_INTERVAL = 2
+MAX_INTERVAL = 600
+
+class WriteRate:
+    """Location writes per second in this process, as an exponentially decayed average"""
+
+    def __init__(self, half_life=10.0):
+        self.half_life = half_life
+        self.count = 0.0
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def hit(self):
+        now = time.monotonic()
+        with self._lock:
+            self.count = self.count * 0.5 ** ((now - self.updated) / self.half_life) + 1
+            self.updated = now
+            return self.count * math.log(2) / self.half_life
+
+_write_rate = WriteRate()
+
+# driver id -> (latitude, longitude, monotonic time) of the last fix this process saw, oldest first.
+# Fixes older than MAX_INTERVAL are evicted: no cadence spaces fixes further apart than that.
+_last_fix = OrderedDict()
+_last_fix_lock = threading.Lock()
+
+def observed_speed_kmh(driver_id, latitude, longitude, reported=None):
+    """Driver speed from the client's reported speed (m/s, as in the Geolocation API) or the last two fixes"""
+    now = time.monotonic()
+    with _last_fix_lock:
+        previous = _last_fix.pop(driver_id, None)
+        _last_fix[driver_id] = (latitude, longitude, now)
+        while _last_fix:
+            oldest = next(iter(_last_fix.values()))
+            if now - oldest[2] <= MAX_INTERVAL:
+                break
+            _last_fix.popitem(last=False)
+    if previous is not None and now - previous[2] > MAX_INTERVAL:
+        previous = None
+    if isinstance(reported, (int, float)) and reported >= 0:
+        return reported * 3.6
+    if previous is None or now - previous[2] < 1:
+        return None
+    return haversine_km(previous[0], previous[1], latitude, longitude) / ((now - previous[2]) / 3600)
+
+def next_ping(driver_status, booking_status=None, severity=None, speed_kmh=None):
+    """Interval and minimum displacement the driver app should use for its next fix.
+
+    En-route ambulances report often and more often still the faster they
+    drive, so the spacing between fixes stays near min_displacement_m *
+    SPACING_FACTOR. Idle and offline drivers back off. When this process
+    receives more location writes than CADENCE_TARGET_WRITES_PER_SEC,
+    intervals stretch by the overload ratio: fully for idle drivers, by its
+    square root for active bookings.
+    """
+    config = current_app.config
+    load = _write_rate.hit() / max(config.get('CADENCE_TARGET_WRITES_PER_SEC', 50.0), 1e-6)
+    moving = speed_kmh is not None and speed_kmh >= STATIONARY_KMH
+
+    if booking_status in ('Assigned', 'On Route'):
+        interval, displacement = EN_ROUTE_BY_SEVERITY.get(severity, EN_ROUTE_BY_SEVERITY['Medium'])
+        if moving:
+            # Keep roughly SPACING_FACTOR x displacement metres between fixes at speed
+            interval = min(interval, displacement * config.get('CADENCE_SPACING_FACTOR', 4) / (speed_kmh / 3.6))
+        stretch = max(1.0, load) ** 0.5
+    elif booking_status == 'Arrived':
+        interval, displacement = ARRIVED
+        stretch = max(1.0, load) ** 0.5
+    elif driver_status == 'Offline':
+        interval, displacement = OFFLINE
+        stretch = max(1.0, load)
+    else:
+        interval, displacement = IDLE_MOVING if moving else IDLE_STATIONARY
+        stretch = max(1.0, load)
+
+    # On-duty drivers must ping well inside the liveness window or they'd be taken offline
+    ceiling = MAX_INTERVAL if driver_status == 'Offline' else min(MAX_INTERVAL, config.get('DRIVER_STALE_AFTER_SECONDS', 300) / 2)
+    return {
+        "interval_seconds": int(round(min(ceiling, max(MIN_INTERVAL, interval * stretch)))),
+        "min_displacement_m": displacement
+    }
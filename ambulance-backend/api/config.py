@@ -40,6 +40,95 @@ class BaseConfig:
     # OTP
     OTP_TTL_SECONDS = int(os.getenv("OTP_TTL_SECONDS", "300"))
 
+    # Table statistics served by /?stats=1 and /api/health?stats=1
+    STATS_CACHE_TTL_SECONDS = int(os.getenv("STATS_CACHE_TTL_SECONDS", "60"))
+
+    # Hospital catalogue cache: in-process snapshot lifetime and client/CDN max-age
+    HOSPITAL_CACHE_TTL_SECONDS = int(os.getenv("HOSPITAL_CACHE_TTL_SECONDS", "300"))
+    HOSPITAL_CACHE_MAX_AGE = int(os.getenv("HOSPITAL_CACHE_MAX_AGE", "300"))
+
+    # Hospital chosen for bookings without hospital_id: nearest candidates by drive time, penalised with no free ambulance
+    HOSPITAL_SELECT_CANDIDATES = int(os.getenv("HOSPITAL_SELECT_CANDIDATES", "8"))
+    HOSPITAL_NO_AMBULANCE_PENALTY_SECONDS = int(os.getenv("HOSPITAL_NO_AMBULANCE_PENALTY_SECONDS", "900"))
+    HOSPITAL_AVAILABILITY_TTL_SECONDS = float(os.getenv("HOSPITAL_AVAILABILITY_TTL_SECONDS", "10"))
+    HOSPITAL_AVAILABILITY_MIN_REFRESH_SECONDS = float(os.getenv("HOSPITAL_AVAILABILITY_MIN_REFRESH_SECONDS", "1"))
+
+    # Use orjson for JSON responses when it is installed
+    JSON_USE_ORJSON = _bool(os.getenv("JSON_USE_ORJSON"), True)
+
+    # Keyset pagination and NDJSON export for list endpoints
+    PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", "100"))
+    PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", "1000"))
+    EXPORT_YIELD_PER = int(os.getenv("EXPORT_YIELD_PER", "1000"))
+
+    # /driver/bookings?since= never hands out a cursor newer than this many seconds ago,
+    # so writes that commit late are still delivered
+    DRIVER_DELTA_OVERLAP_SECONDS = float(os.getenv("DRIVER_DELTA_OVERLAP_SECONDS", "10"))
+
+    # Request/SQL instrumentation: fraction of requests sampled (0 disables)
+    METRICS_SAMPLE_RATE = float(os.getenv("METRICS_SAMPLE_RATE", "0"))
+    N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+    METRICS_RESPONSE_HEADERS = _bool(os.getenv("METRICS_RESPONSE_HEADERS"), False)
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+    # Structured logging: JSON lines via a background queue, rate limited per message key
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+    LOG_JSON = _bool(os.getenv("LOG_JSON"), True)
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    LOG_RATE_PER_KEY = float(os.getenv("LOG_RATE_PER_KEY", "5"))
+    LOG_BURST = int(os.getenv("LOG_BURST", "20"))
+    LOG_INFO_SAMPLE_RATE = float(os.getenv("LOG_INFO_SAMPLE_RATE", "1"))
+
+    # Slow-request profiler (stack sampling + SQL timings); toggled at runtime via /api/admin/profiler
+    PROFILER_ENABLED = _bool(os.getenv("PROFILER_ENABLED"), False)
+    PROFILER_THRESHOLD_MS = float(os.getenv("PROFILER_THRESHOLD_MS", "500"))
+    PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+
+    # Dispatch worker (`flask dispatch run`): seconds between auto-assign/auto-cancel sweeps
+    DISPATCH_INTERVAL_SECONDS = float(os.getenv("DISPATCH_INTERVAL_SECONDS", "30"))
+    DISPATCH_BATCH_SIZE = int(os.getenv("DISPATCH_BATCH_SIZE", "100"))
+    DISPATCH_QUEUE_SCAN_LIMIT = int(os.getenv("DISPATCH_QUEUE_SCAN_LIMIT", "5000"))
+    # Freed ambulances go straight to the next pending case within this drive time
+    REDISPATCH_ENABLED = _bool(os.getenv("REDISPATCH_ENABLED"), True)
+    REDISPATCH_MAX_ETA_SECONDS = int(os.getenv("REDISPATCH_MAX_ETA_SECONDS", "1200"))
+    REDISPATCH_SCAN_LIMIT = int(os.getenv("REDISPATCH_SCAN_LIMIT", "200"))
+    # Severities whose bookings claim an ambulance inside the create request, within this budget
+    FAST_DISPATCH_ENABLED = _bool(os.getenv("FAST_DISPATCH_ENABLED"), True)
+    FAST_DISPATCH_SEVERITIES = tuple(s.strip() for s in os.getenv("FAST_DISPATCH_SEVERITIES", "Critical").split(",") if s.strip())
+    FAST_DISPATCH_BUDGET_MS = float(os.getenv("FAST_DISPATCH_BUDGET_MS", "250"))
+    # Fresh booking codes tried when the single-statement booking insert hits a code collision
+    BOOKING_CODE_ATTEMPTS = int(os.getenv("BOOKING_CODE_ATTEMPTS", "5"))
+    # Multi-patient incidents (POST /api/incidents)
+    INCIDENT_MAX_PATIENTS = int(os.getenv("INCIDENT_MAX_PATIENTS", "20"))
+    INCIDENT_CANDIDATE_HOSPITALS = int(os.getenv("INCIDENT_CANDIDATE_HOSPITALS", "8"))
+
+    # ETA estimates: precomputed travel-time grid (`flask eta build-grid`), else distance x detour / speed
+    ETA_GRID_PATH = os.getenv("ETA_GRID_PATH", str(root / "data" / "eta_grid.json"))
+    ETA_FALLBACK_SPEED_KMH = float(os.getenv("ETA_FALLBACK_SPEED_KMH", "25"))
+    ETA_DETOUR_FACTOR = float(os.getenv("ETA_DETOUR_FACTOR", "1.3"))
+    ETA_CACHE_SIZE = int(os.getenv("ETA_CACHE_SIZE", "100000"))
+
+    # Geofences on /driver/location: auto On Route / Arrived / Completed (opt-in)
+    GEOFENCE_ENABLED = _bool(os.getenv("GEOFENCE_ENABLED"), False)
+    GEOFENCE_PICKUP_RADIUS_M = float(os.getenv("GEOFENCE_PICKUP_RADIUS_M", "75"))
+    GEOFENCE_HOSPITAL_RADIUS_M = float(os.getenv("GEOFENCE_HOSPITAL_RADIUS_M", "150"))
+    GEOFENCE_DEPARTURE_M = float(os.getenv("GEOFENCE_DEPARTURE_M", "150"))
+    GEOFENCE_DWELL_FIXES = int(os.getenv("GEOFENCE_DWELL_FIXES", "2"))
+
+    # Server-negotiated location ping cadence returned by /driver/location
+    CADENCE_TARGET_WRITES_PER_SEC = float(os.getenv("CADENCE_TARGET_WRITES_PER_SEC", "50"))
+    CADENCE_SPACING_FACTOR = float(os.getenv("CADENCE_SPACING_FACTOR", "4"))
+
+    # Available drivers with no GPS fix for this long leave the dispatch pool until their next fix
+    LIVENESS_ENABLED = _bool(os.getenv("LIVENESS_ENABLED"), True)
+    DRIVER_STALE_AFTER_SECONDS = int(os.getenv("DRIVER_STALE_AFTER_SECONDS", "300"))
+
+    # Driver positions shared by the workers on a node through an mmap'd file, flushed to the database
+    FLEET_TABLE_ENABLED = _bool(os.getenv("FLEET_TABLE_ENABLED"), True)
+    FLEET_TABLE_PATH = os.getenv("FLEET_TABLE_PATH")  # defaults to <instance_path>/fleet.table
+    FLEET_TABLE_SLOTS = int(os.getenv("FLEET_TABLE_SLOTS", "16384"))
+    FLEET_FLUSH_INTERVAL_SECONDS = float(os.getenv("FLEET_FLUSH_INTERVAL_SECONDS", "1"))
+
     # Environment helpers
     DEBUG = False
     TESTING = False
@@ -52,6 +141,7 @@ class DevelopmentConfig(BaseConfig):
 class TestingConfig(BaseConfig):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = os.getenv("TEST_DATABASE_URI", "sqlite:///:memory:")
+    FLEET_TABLE_ENABLED = _bool(os.getenv("FLEET_TABLE_ENABLED"), False)
 
 class ProductionConfig(BaseConfig):
     DEBUG = False
@@ -0,0 +1,276 @@
+import csv
+import io
+import math
+import random
+import time
+from datetime import datetime, timedelta
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import select
+from .extensions import db
+from .models import Booking, Driver, Hospital, User
+
+# Default service area: Kolkata city centre
+CITY_CENTER = (22.5726, 88.3639)
+
+# Historical bookings are finished; a small recent tail is still in flight
+HISTORICAL_STATUS_MIX = [('Completed', 80), ('Cancelled', 11), ('Auto-Cancelled', 9)]
+ACTIVE_STATUS_MIX = [('Pending', 35), ('Assigned', 30), ('On Route', 20), ('Arrived', 15)]
+BOOKING_TYPE_MIX = [('Emergency', 50), ('Normal', 35), ('Accident', 15)]
+SEVERITY_MIX = [('Critical', 10), ('High', 25), ('Medium', 40), ('Low', 25)]
+EMERGENCY_TYPES = ['Heart Attack', 'Stroke', 'Breathing Difficulty', 'Injury', 'Pregnancy', 'Other']
+DRIVER_STATUS_MIX = [('Available', 60), ('Busy', 25), ('Offline', 15)]
+
+HOSPITAL_COLUMNS = (
+    'name', 'address', 'contact_number', 'latitude', 'longitude', 'type', 'emergency_services',
+    'ambulance_count', 'hospital_id', 'password', 'created_at', 'updated_at'
+)
+DRIVER_COLUMNS = (
+    'name', 'phone_number', 'license_number', 'vehicle_number', 'status', 'current_latitude',
+    'current_longitude', 'is_available', 'hospital_id', 'driver_id', 'password', 'created_at', 'updated_at'
+)
+USER_COLUMNS = ('name', 'phone_number', 'created_at', 'updated_at')
+BOOKING_COLUMNS = (
+    'booking_code', 'user_id', 'hospital_id', 'ambulance_id', 'pickup_location', 'pickup_latitude',
+    'pickup_longitude', 'booking_type', 'emergency_type', 'severity', 'accident_details', 'status',
+    'requested_at', 'assigned_at', 'completed_at', 'auto_assigned', 'created_at', 'updated_at'
+)
+
+def _weighted(rng, mix, k):
+    values, weights = zip(*mix)
+    return rng.choices(values, weights=weights, k=k)
+
+def _offset(rng, lat, lng, sigma_km):
+    """Gaussian GPS jitter of roughly sigma_km around (lat, lng)"""
+    dlat = rng.gauss(0, sigma_km) / 111.0
+    dlng = rng.gauss(0, sigma_km) / (111.0 * math.cos(math.radians(lat)))
+    return round(lat + dlat, 6), round(lng + dlng, 6)
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def timestamp_formatter():
+    """Pre-format datetimes for the raw DBAPI path.
+
+    SQLite has no datetime type: write the same text SQLAlchemy's DateTime
+    type stores so ORM reads parse it back. Other drivers adapt datetimes.
+    """
+    if db.engine.dialect.name == 'sqlite':
+        return lambda value: value.isoformat(' ', 'microseconds') if value is not None else None
+    return lambda value: value
+
+def bulk_load(table, columns, rows, chunk_size=50000):
+    """Insert an iterable of row tuples - COPY on Postgres, DBAPI executemany elsewhere.
+
+    Both paths skip per-row ORM/Core processing, which dominates the cost of
+    loading millions of rows through db.session.add or bulk_insert_mappings.
+    """
+    total = 0
+    connection = db.session.connection()
+    dialect = db.engine.dialect
+
+    if dialect.name == 'postgresql':
+        copy_sql = f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+        with connection.connection.cursor() as cursor:
+            for chunk in _chunks(rows, chunk_size):
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerows(tuple('\\N' if v is None else v for v in row) for row in chunk)
+                buffer.seek(0)
+                cursor.copy_expert(copy_sql, buffer)
+                total += len(chunk)
+        return total
+
+    placeholder = '?' if dialect.paramstyle in ('qmark', 'numeric') else '%s'
+    insert_sql = f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({', '.join([placeholder] * len(columns))})"
+    for chunk in _chunks(rows, chunk_size):
+        connection.exec_driver_sql(insert_sql, chunk)
+        total += len(chunk)
+    return total
+
+def generate_hospitals(rng, tag, count, center, spread_km, now):
+    for i in range(count):
+        lat, lng = _offset(rng, center[0], center[1], spread_km / 2)
+        yield (
+            f"{tag.upper()} Hospital {i + 1}",
+            f"{rng.randint(1, 300)}, Sector {rng.randint(1, 60)}, Kolkata",
+            f"+91-33-{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}",
+            lat, lng,
+            rng.choice(['government', 'private', 'private']),
+            rng.random() < 0.9,
+            rng.randint(2, 15),
+            f"{tag}-h{i:06d}",
+            'admin',
+            now, now
+        )
+
+def generate_drivers(rng, tag, count, hospitals, now):
+    statuses = _weighted(rng, DRIVER_STATUS_MIX, count)
+    for i in range(count):
+        hospital_id, lat, lng = hospitals[i % len(hospitals)]
+        d_lat, d_lng = _offset(rng, lat, lng, 2.0)
+        yield (
+            f"Driver {tag} {i}",
+            f"+9178{i:08d}",
+            f"{tag}-L{i:08d}",
+            f"{tag}-V{i:08d}",
+            statuses[i],
+            d_lat, d_lng,
+            statuses[i] != 'Offline',
+            hospital_id,
+            f"{tag}-d{i:08d}",
+            'driver123',
+            now, now
+        )
+
+def generate_users(tag, count, now):
+    for i in range(count):
+        yield (f"Rider {i}", f"{tag}-{i:09d}", now, now)
+
+def generate_bookings(rng, count, active, hospitals, drivers_by_hospital, user_ids, codes, days, now, fmt):
+    statuses = _weighted(rng, HISTORICAL_STATUS_MIX, count - active) + _weighted(rng, ACTIVE_STATUS_MIX, active)
+    types = _weighted(rng, BOOKING_TYPE_MIX, count)
+    severities = _weighted(rng, SEVERITY_MIX, count)
+    random_ = rng.random
+    uniform = rng.uniform
+    n_hospitals = len(hospitals)
+    n_users = len(user_ids)
+
+    # Requests are generated in time order (ids grow with requested_at, as in
+    # production); active bookings are the last half hour, the rest spread
+    # evenly over the history window
+    historical = count - active
+    history_start = now - timedelta(days=days)
+    step = (days * 86400 - 1800) / max(historical, 1)
+    active_start = now - timedelta(seconds=1800)
+    active_step = 1800 / max(active, 1)
+
+    for i in range(count):
+        status = statuses[i]
+        hospital_id, h_lat, h_lng = hospitals[int(random_() * n_hospitals)]
+
+        if i < historical:
+            requested_at = history_start + timedelta(seconds=(i + random_()) * step)
+        else:
+            requested_at = active_start + timedelta(seconds=(i - historical + random_()) * active_step)
+
+        drivers = drivers_by_hospital.get(hospital_id)
+        assigned = drivers and status not in ('Pending', 'Auto-Cancelled') and not (status == 'Cancelled' and random_() < 0.6)
+        ambulance_id = drivers[int(random_() * len(drivers))] if assigned else None
+        assigned_at = requested_at + timedelta(seconds=uniform(5, 120)) if ambulance_id else None
+        if status == 'Completed':
+            completed_at = requested_at + timedelta(seconds=uniform(600, 5400))
+        elif i < historical:
+            completed_at = requested_at + timedelta(seconds=uniform(30, 120))
+        else:
+            completed_at = None
+
+        requested = fmt(requested_at)
+        assigned_str = fmt(assigned_at)
+        completed = fmt(completed_at)
+        yield (
+            codes[i],
+            user_ids[int(random_() * n_users)] if n_users else None,
+            hospital_id,
+            ambulance_id,
+            'Generated pickup',
+            round(h_lat + uniform(-0.03, 0.03), 6),
+            round(h_lng + uniform(-0.03, 0.03), 6),
+            types[i],
+            EMERGENCY_TYPES[int(random_() * len(EMERGENCY_TYPES))] if types[i] != 'Normal' else None,
+            severities[i],
+            '{}',
+            status,
+            requested,
+            assigned_str,
+            completed,
+            bool(ambulance_id) and random_() < 0.5,
+            requested,
+            completed or assigned_str or requested
+        )
+
+def allocate_booking_codes(rng, count):
+    """Draw count unique 8-digit codes that don't collide with existing bookings"""
+    existing = set(db.session.execute(select(Booking.booking_code)).scalars())
+    if count + len(existing) > 10 ** 8:
+        raise click.ClickException("Not enough free 8-digit booking codes")
+    codes = []
+    for n in rng.sample(range(10 ** 8), count + len(existing)):
+        code = f"{n:08d}"
+        if code not in existing:
+            codes.append(code)
+            if len(codes) == count:
+                break
+    # Sorted so the unique index on booking_code is appended to, not split at random
+    codes.sort()
+    return codes
+
+@click.command('seed-city')
+@click.option('--hospitals', 'hospital_count', default=200, show_default=True, type=click.IntRange(min=1),
+              help="Hospitals to create (drivers and bookings are spread across them)")
+@click.option('--drivers', 'driver_count', default=5000, show_default=True, type=click.IntRange(min=0),
+              help="Drivers to create")
+@click.option('--users', 'user_count', default=None, type=click.IntRange(min=0), help="Riders to create [default: bookings/50, min 100]")
+@click.option('--bookings', 'booking_count', default=100000, show_default=True, type=click.IntRange(min=0), help="Historical bookings to create")
+@click.option('--active', 'active_count', default=None, type=click.IntRange(min=0), help="In-flight bookings among them [default: 1%, max 500]")
+@click.option('--days', default=365, show_default=True, help="Booking history window in days")
+@click.option('--spread-km', default=25.0, show_default=True, help="Service area diameter")
+@click.option('--seed', default=None, type=int, help="Random seed for reproducible fixtures")
+@with_appcontext
+def seed_city_command(hospital_count, driver_count, user_count, booking_count, active_count, days, spread_km, seed):
+    """Bulk-generate a city-scale synthetic dataset for performance testing."""
+    rng = random.Random(seed)
+    tag = f"gen{int(time.time()) % 10 ** 6:06d}"
+    now = datetime.utcnow()
+    fmt = timestamp_formatter()
+    if user_count is None:
+        user_count = max(100, booking_count // 50)
+    if active_count is None:
+        active_count = min(500, booking_count // 100)
+    active_count = min(active_count, booking_count)
+
+    def phase(label, fn):
+        start = time.perf_counter()
+        result = fn()
+        click.echo(f"{label:<12} {time.perf_counter() - start:7.2f}s")
+        return result
+
+    try:
+        phase("hospitals", lambda: bulk_load(Hospital.__table__, HOSPITAL_COLUMNS, generate_hospitals(
+            rng, tag, hospital_count, CITY_CENTER, spread_km, fmt(now)
+        )))
+        hospitals = db.session.execute(
+            select(Hospital.id, Hospital.latitude, Hospital.longitude).where(Hospital.hospital_id.like(f"{tag}-%"))
+        ).all()
+
+        phase("drivers", lambda: bulk_load(Driver.__table__, DRIVER_COLUMNS, generate_drivers(
+            rng, tag, driver_count, hospitals, fmt(now)
+        )))
+        drivers_by_hospital = {}
+        for driver_id, hospital_id in db.session.execute(
+            select(Driver.id, Driver.hospital_id).where(Driver.driver_id.like(f"{tag}-%"))
+        ):
+            drivers_by_hospital.setdefault(hospital_id, []).append(driver_id)
+
+        phase("users", lambda: bulk_load(User.__table__, USER_COLUMNS, generate_users(tag, user_count, fmt(now))))
+        user_ids = list(db.session.execute(select(User.id).where(User.phone_number.like(f"{tag}-%"))).scalars())
+
+        codes = phase("codes", lambda: allocate_booking_codes(rng, booking_count))
+        phase("bookings", lambda: bulk_load(Booking.__table__, BOOKING_COLUMNS, generate_bookings(
+            rng, booking_count, active_count, hospitals, drivers_by_hospital, user_ids, codes, days, now, fmt
+        )))
+
+        phase("commit", db.session.commit)
+    except Exception:
+        db.session.rollback()
+        raise
+
+    click.echo(f"Generated {hospital_count} hospitals, {driver_count} drivers, {user_count} users "
+               f"and {booking_count} bookings (tag {tag})")
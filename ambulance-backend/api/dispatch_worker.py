@@ -0,0 +1,185 @@
+import logging
+import os
+import signal
+import threading
+import time
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+from .extensions import db
+
+try:
+    import fcntl
+except ImportError:  # Windows dev setups lock with msvcrt instead
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+logger = logging.getLogger(__name__)
+
+dispatch_cli = AppGroup('dispatch', help="Dispatch worker commands.")
+
+# Arbitrary application-wide key for pg_try_advisory_lock; only the dispatch leader holds it
+DISPATCH_LOCK_KEY = 0x414D4244  # "AMBD"
+
+class PostgresLeaderLock:
+    """Session-level advisory lock held on a dedicated connection.
+
+    The lock lives as long as the connection: if the leader dies or loses
+    its connection, Postgres releases it and a standby takes over on its
+    next attempt.
+    """
+
+    def __init__(self, engine, key=DISPATCH_LOCK_KEY):
+        self.engine = engine
+        self.key = key
+        self.connection = None
+
+    def acquire(self):
+        if self.connection is None:
+            self.connection = self.engine.connect()
+        acquired = self.connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key}).scalar()
+        self.connection.commit()
+        if not acquired:
+            self._close()
+        return bool(acquired)
+
+    def still_held(self):
+        if self.connection is None:
+            return False
+        try:
+            self.connection.execute(text("SELECT 1"))
+            self.connection.commit()
+            return True
+        except Exception:
+            logger.warning("Lost the dispatch leader connection", extra={"key": "dispatch.leader_lost"})
+            self._close()
+            return False
+
+    def release(self):
+        if self.connection is not None:
+            try:
+                self.connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+                self.connection.commit()
+            finally:
+                self._close()
+
+    def _close(self):
+        try:
+            if self.connection is not None:
+                self.connection.close()
+        except Exception:
+            pass
+        self.connection = None
+
+class FileLeaderLock:
+    """flock-based fallback for SQLite and other single-host databases (msvcrt.locking on Windows)"""
+
+    def __init__(self, path):
+        if fcntl is None and msvcrt is None:
+            raise click.ClickException("No file locking available on this platform; use a Postgres database")
+        self.path = path
+        self.handle = None
+
+    def _lock(self):
+        if fcntl is not None:
+            fcntl.flock(self.handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            self.handle.seek(0)
+            msvcrt.locking(self.handle.fileno(), msvcrt.LK_NBLCK, 1)
+
+    def _unlock(self):
+        if fcntl is not None:
+            fcntl.flock(self.handle, fcntl.LOCK_UN)
+        else:
+            self.handle.seek(0)
+            msvcrt.locking(self.handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def acquire(self):
+        if self.handle is None:
+            self.handle = open(self.path, 'a+')
+        try:
+            self._lock()
+        except OSError:
+            self.handle.close()
+            self.handle = None
+            return False
+        self.handle.seek(0)
+        self.handle.truncate()
+        self.handle.write(str(os.getpid()))
+        self.handle.flush()
+        return True
+
+    def still_held(self):
+        return self.handle is not None
+
+    def release(self):
+        if self.handle is not None:
+            self._unlock()
+            self.handle.close()
+            self.handle = None
+
+def leader_lock(app):
+    if db.engine.dialect.name == 'postgresql':
+        # Session advisory locks need a real server session: behind PgBouncer/Neon
+        # transaction pooling the pooled URL hands each transaction a different
+        # backend, so the lock gets its own unpooled connection
+        unpooled = app.config.get('DATABASE_URL_UNPOOLED')
+        if unpooled:
+            return PostgresLeaderLock(create_engine(unpooled, poolclass=NullPool))
+        if app.config.get('DATABASE_URL'):
+            logger.warning("DATABASE_URL_UNPOOLED is not set; the dispatch leader lock is unreliable "
+                           "if DATABASE_URL goes through a transaction pooler", extra={"key": "dispatch.pooled_lock"})
+        return PostgresLeaderLock(db.engine)
+    return FileLeaderLock(os.path.join(app.instance_path, 'dispatch.lock'))
+
+@dispatch_cli.command('run')
+@click.option('--interval', default=None, type=float, help="Seconds between sweeps [default: DISPATCH_INTERVAL_SECONDS]")
+@click.option('--once', is_flag=True, help="Run a single sweep if elected, then exit")
+def run_dispatch_command(interval, once):
+    """Run the auto-assign/auto-cancel sweep; only the elected leader sweeps."""
+    from .scheduler import dispatch_tick
+
+    app = current_app._get_current_object()
+    interval = interval or app.config.get('DISPATCH_INTERVAL_SECONDS', 30)
+    stop = threading.Event()
+
+    def handle_signal(signum, frame):
+        stop.set()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    lock = leader_lock(app)
+    leader = False
+    click.echo(f"Dispatch worker {os.getpid()} started ({db.engine.dialect.name}, every {interval:g}s)")
+    try:
+        while not stop.is_set():
+            if leader and not lock.still_held():
+                leader = False
+            if not leader:
+                leader = lock.acquire()
+                if leader:
+                    logger.info("Elected dispatch leader", extra={"key": "dispatch.elected", "pid": os.getpid()})
+                    click.echo("Elected dispatch leader")
+
+            if leader:
+                started = time.monotonic()
+                stats = dispatch_tick()
+                if once:
+                    click.echo(f"Tick: {stats}")
+                    break
+                stop.wait(max(0.0, interval - (time.monotonic() - started)))
+            elif once:
+                click.echo("Another dispatch worker is the leader; nothing to do")
+                break
+            else:
+                stop.wait(interval)
+    finally:
+        if leader:
+            lock.release()
+        db.session.remove()
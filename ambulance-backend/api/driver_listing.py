@@ -0,0 +1,85 @@
+from .extensions import db
+from .models import Driver, Hospital
+from .serialization import make_serializer
+
+DRIVER_STATUSES = ('Available', 'Busy', 'Offline')
+
+# Columns read for the fleet-wide listing - nothing else is loaded per row
+LISTING_COLUMNS = (
+    Driver.id,
+    Driver.name,
+    Driver.phone_number,
+    Driver.vehicle_number,
+    Driver.status,
+    Driver.current_latitude,
+    Driver.current_longitude,
+    Driver.driver_id,
+    Driver.created_at,
+    Hospital.id.label('hospital_id'),
+    Hospital.name.label('hospital_name'),
+    Hospital.address.label('hospital_address'),
+    Hospital.contact_number.label('hospital_contact')
+)
+
+_serialize_fields = make_serializer(
+    'id', 'name', ('phone', 'phone_number'), 'vehicle_number', 'status', ('login_id', 'driver_id')
+)
+
+def serialize_driver_row(row):
+    item = _serialize_fields(row)
+    item["location"] = f"{row.current_latitude},{row.current_longitude}" if row.current_latitude and row.current_longitude else "Unknown"
+    item["hospital"] = {
+        "id": row.hospital_id,
+        "name": row.hospital_name,
+        "address": row.hospital_address,
+        "contact": row.hospital_contact
+    }
+    return item
+
+def parse_listing_filters(args):
+    """Parse status/hospital_id/bbox filters; raises ValueError with a client-facing message"""
+    filters = {}
+
+    status = args.get('status')
+    if status:
+        statuses = [s.strip() for s in status.split(',') if s.strip()]
+        invalid = [s for s in statuses if s not in DRIVER_STATUSES]
+        if invalid:
+            raise ValueError(f"Invalid status: {', '.join(invalid)}")
+        filters['statuses'] = statuses
+
+    hospital_id = args.get('hospital_id')
+    if hospital_id:
+        try:
+            filters['hospital_id'] = int(hospital_id)
+        except ValueError:
+            raise ValueError("hospital_id must be an integer")
+
+    bbox = args.get('bbox')
+    if bbox:
+        try:
+            south, west, north, east = (float(v) for v in bbox.split(','))
+        except ValueError:
+            raise ValueError("bbox must be south,west,north,east")
+        if not (-90 <= south <= north <= 90) or not (-180 <= west <= east <= 180):
+            raise ValueError("Invalid bbox coordinates")
+        filters['bbox'] = (south, west, north, east)
+
+    return filters
+
+def driver_listing_query(statuses=None, hospital_id=None, bbox=None):
+    """Column-projected drivers-with-hospital query returning lightweight Rows"""
+    query = db.session.query(*LISTING_COLUMNS).join(Hospital, Driver.hospital_id == Hospital.id)
+
+    if statuses:
+        query = query.filter(Driver.status.in_(statuses))
+    if hospital_id is not None:
+        query = query.filter(Driver.hospital_id == hospital_id)
+    if bbox:
+        south, west, north, east = bbox
+        query = query.filter(
+            Driver.current_latitude.between(south, north),
+            Driver.current_longitude.between(west, east)
+        )
+
+    return query
@@ -0,0 +1,270 @@
+import csv
+import heapq
+import json
+import logging
+import math
+import os
+import threading
+from array import array
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+logger = logging.getLogger(__name__)
+
+eta_cli = AppGroup('eta', help="Travel-time grid commands.")
+
+KM_PER_DEG_LAT = 111.32
+EARTH_RADIUS_KM = 6371.0
+
+# Seconds charged for a driver whose position is unknown, so located drivers win ties
+UNKNOWN_LOCATION_COST = 3600
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    a = (math.sin(dlat / 2) ** 2 +
+         math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+class TravelTimeGrid:
+    """Precomputed cell-to-cell driving seconds over a lat/lng box.
+
+    Cells are cell_km squares numbered row-major from the south-west corner;
+    seconds[a * n + b] is the travel time from the centre of cell a to the
+    centre of cell b.
+    """
+
+    def __init__(self, south, west, cell_km, rows, cols, seconds):
+        self.south = south
+        self.west = west
+        self.cell_km = cell_km
+        self.rows = rows
+        self.cols = cols
+        self.seconds = seconds
+        self.dlat = cell_km / KM_PER_DEG_LAT
+        self.dlng = cell_km / (KM_PER_DEG_LAT * math.cos(math.radians(south + rows * self.dlat / 2)))
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        n = data['rows'] * data['cols']
+        seconds = array('f', data['seconds'])
+        if len(seconds) != n * n:
+            raise ValueError(f"{path}: expected {n * n} travel times, found {len(seconds)}")
+        return cls(data['south'], data['west'], data['cell_km'], data['rows'], data['cols'], seconds)
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump({
+                "south": self.south, "west": self.west, "cell_km": self.cell_km,
+                "rows": self.rows, "cols": self.cols,
+                "seconds": [round(s, 1) for s in self.seconds]
+            }, f, separators=(',', ':'))
+
+    def cell(self, lat, lng):
+        row = int((lat - self.south) / self.dlat)
+        col = int((lng - self.west) / self.dlng)
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return row * self.cols + col
+        return None
+
+    def centre(self, cell):
+        row, col = divmod(cell, self.cols)
+        return self.south + (row + 0.5) * self.dlat, self.west + (col + 0.5) * self.dlng
+
+    def pair_seconds(self, a, b):
+        return self.seconds[a * self.rows * self.cols + b]
+
+class EtaEstimator:
+    """Driving-time estimates from the grid, falling back to distance x detour / speed.
+
+    Results are cached per cell pair as seconds per straight-line km, so an
+    estimate is two dict lookups, one haversine and a multiply.
+    """
+
+    def __init__(self, grid=None, fallback_speed_kmh=25.0, detour_factor=1.3, cache_size=100000):
+        self.grid = grid
+        self.fallback_rate = 3600.0 * detour_factor / fallback_speed_kmh
+        self.cache_size = cache_size
+        self._cache = {}
+
+    def _rate(self, a, b):
+        """Seconds per straight-line km between two grid cells"""
+        if a == b:
+            # Within one cell: the cheapest hop out of it approximates local speed
+            neighbours = [self.grid.pair_seconds(a, c) / self.grid.cell_km
+                          for c in (a - 1, a + 1, a - self.grid.cols, a + self.grid.cols)
+                          if 0 <= c < self.grid.rows * self.grid.cols and c != a]
+            return min(neighbours) if neighbours else self.fallback_rate
+        lat1, lng1 = self.grid.centre(a)
+        lat2, lng2 = self.grid.centre(b)
+        return self.grid.pair_seconds(a, b) / haversine_km(lat1, lng1, lat2, lng2)
+
+    def seconds(self, lat1, lng1, lat2, lng2):
+        if lat1 is None or lng1 is None or lat2 is None or lng2 is None:
+            return None
+        distance = haversine_km(lat1, lng1, lat2, lng2)
+        if self.grid is None:
+            return int(round(distance * self.fallback_rate))
+
+        a = self.grid.cell(lat1, lng1)
+        b = self.grid.cell(lat2, lng2)
+        if a is None or b is None:
+            return int(round(distance * self.fallback_rate))
+
+        key = (a, b)
+        rate = self._cache.get(key)
+        if rate is None:
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            rate = self._cache[key] = self._rate(a, b)
+        return int(round(distance * rate))
+
+_estimator = None
+_lock = threading.Lock()
+
+def get_estimator():
+    """Process-wide estimator, loading ETA_GRID_PATH on first use"""
+    global _estimator
+    if _estimator is None:
+        with _lock:
+            if _estimator is None:
+                config = current_app.config
+                path = config.get('ETA_GRID_PATH')
+                grid = None
+                if path and os.path.exists(path):
+                    try:
+                        grid = TravelTimeGrid.load(path)
+                    except (OSError, ValueError, KeyError) as e:
+                        logger.warning("Ignoring travel-time grid %s: %s", path, e, extra={"key": "eta.grid_invalid"})
+                _estimator = EtaEstimator(
+                    grid,
+                    config.get('ETA_FALLBACK_SPEED_KMH', 25.0),
+                    config.get('ETA_DETOUR_FACTOR', 1.3),
+                    config.get('ETA_CACHE_SIZE', 100000)
+                )
+    return _estimator
+
+def reset_estimator():
+    global _estimator
+    with _lock:
+        _estimator = None
+
+def eta_seconds(lat1, lng1, lat2, lng2):
+    return get_estimator().seconds(lat1, lng1, lat2, lng2)
+
+def booking_etas(status, pickup, driver=None, hospital=None):
+    """ETA breakdown for a booking; pickup/driver/hospital are (lat, lng) pairs or None.
+
+    Before arrival the ambulance still has to reach the pickup; after it has
+    arrived only the leg to the hospital remains.
+    """
+    if status in ('Completed', 'Cancelled', 'Auto-Cancelled') or not pickup:
+        return None
+    estimator = get_estimator()
+    to_pickup = None
+    if status in ('Assigned', 'On Route') and driver:
+        to_pickup = estimator.seconds(driver[0], driver[1], pickup[0], pickup[1])
+    to_hospital = estimator.seconds(pickup[0], pickup[1], hospital[0], hospital[1]) if hospital else None
+    legs = [s for s in (to_pickup, to_hospital) if s is not None]
+    return {
+        "driver_to_pickup_seconds": to_pickup,
+        "pickup_to_hospital_seconds": to_hospital,
+        "total_seconds": sum(legs) if legs else None
+    }
+
+def dispatch_cost(driver, booking):
+    """Seconds for a driver to reach a booking's pickup; the dispatch sweep picks the cheapest"""
+    cost = eta_seconds(driver.current_latitude, driver.current_longitude,
+                       booking.pickup_latitude, booking.pickup_longitude)
+    return UNKNOWN_LOCATION_COST if cost is None else cost
+
+def build_grid(south, west, north, east, cell_km, speed_of, detour_factor=1.0):
+    """All-pairs travel times over an 8-neighbour cell graph (one Dijkstra per cell).
+
+    speed_of(row, col) gives the typical driving speed in km/h inside a cell;
+    an edge costs its length over the mean speed of its two cells.
+    """
+    dlat = cell_km / KM_PER_DEG_LAT
+    rows = max(1, math.ceil((north - south) / dlat))
+    dlng = cell_km / (KM_PER_DEG_LAT * math.cos(math.radians(south + rows * dlat / 2)))
+    cols = max(1, math.ceil((east - west) / dlng))
+    n = rows * cols
+
+    speeds = [speed_of(r, c) for r in range(rows) for c in range(cols)]
+    edges = [[] for _ in range(n)]
+    for r in range(rows):
+        for c in range(cols):
+            a = r * cols + c
+            for dr, dc in ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)):
+                rr, cc = r + dr, c + dc
+                if 0 <= rr < rows and 0 <= cc < cols:
+                    b = rr * cols + cc
+                    km = cell_km * math.hypot(dr, dc) * detour_factor
+                    edges[a].append((b, km * 3600.0 * 2 / (speeds[a] + speeds[b])))
+
+    seconds = array('f', bytes(4 * n * n))
+    for source in range(n):
+        dist = [math.inf] * n
+        dist[source] = 0.0
+        heap = [(0.0, source)]
+        while heap:
+            d, a = heapq.heappop(heap)
+            if d > dist[a]:
+                continue
+            for b, cost in edges[a]:
+                if d + cost < dist[b]:
+                    dist[b] = d + cost
+                    heapq.heappush(heap, (d + cost, b))
+        seconds[source * n:(source + 1) * n] = array('f', dist)
+    return TravelTimeGrid(south, west, cell_km, rows, cols, seconds)
+
+def _speed_samples(path, south, west, dlat, dlng):
+    """Average km/h per (row, col) from a CSV of latitude,longitude,speed_kmh samples"""
+    totals = {}
+    with open(path, newline='') as f:
+        for record in csv.DictReader(f):
+            key = (int((float(record['latitude']) - south) / dlat), int((float(record['longitude']) - west) / dlng))
+            total, count = totals.get(key, (0.0, 0))
+            totals[key] = (total + float(record['speed_kmh']), count + 1)
+    return {key: total / count for key, (total, count) in totals.items()}
+
+@eta_cli.command('build-grid')
+@click.option('--cell-km', default=2.0, show_default=True, help="Grid resolution")
+@click.option('--margin-km', default=10.0, show_default=True, help="Padding around the hospitals' bounding box")
+@click.option('--speeds', 'speeds_path', type=click.Path(exists=True), help="CSV of latitude,longitude,speed_kmh samples")
+@click.option('--out', 'out_path', default=None, help="Output file [default: ETA_GRID_PATH]")
+def build_grid_command(cell_km, margin_km, speeds_path, out_path):
+    """Precompute the travel-time grid for the service area around all hospitals."""
+    from sqlalchemy import func
+    from .extensions import db
+    from .models import Hospital
+
+    south, west, north, east = db.session.query(
+        func.min(Hospital.latitude), func.min(Hospital.longitude),
+        func.max(Hospital.latitude), func.max(Hospital.longitude)
+    ).one()
+    if south is None:
+        raise click.ClickException("No hospitals with coordinates")
+    pad_lat = margin_km / KM_PER_DEG_LAT
+    pad_lng = margin_km / (KM_PER_DEG_LAT * math.cos(math.radians((south + north) / 2)))
+    south, west, north, east = south - pad_lat, west - pad_lng, north + pad_lat, east + pad_lng
+
+    config = current_app.config
+    default_speed = config.get('ETA_FALLBACK_SPEED_KMH', 25.0)
+    speed_of = lambda row, col: default_speed
+    if speeds_path:
+        dlat = cell_km / KM_PER_DEG_LAT
+        rows = max(1, math.ceil((north - south) / dlat))
+        dlng = cell_km / (KM_PER_DEG_LAT * math.cos(math.radians(south + rows * dlat / 2)))
+        samples = _speed_samples(speeds_path, south, west, dlat, dlng)
+        speed_of = lambda row, col: samples.get((row, col), default_speed)
+
+    grid = build_grid(south, west, north, east, cell_km, speed_of, config.get('ETA_DETOUR_FACTOR', 1.3))
+    out_path = out_path or config.get('ETA_GRID_PATH')
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    grid.save(out_path)
+    reset_estimator()
+    click.echo(f"Wrote {grid.rows}x{grid.cols} grid ({grid.rows * grid.cols} cells) to {out_path}")
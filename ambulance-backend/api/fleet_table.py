@@ -0,0 +1,248 @@
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from datetime import datetime, timezone
+from flask import current_app
+from sqlalchemy import bindparam, update
+
+try:
+    import fcntl
+except ImportError:  # fcntl is POSIX-only - without it positions go straight to the database
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'FLEET001'
+HEADER = struct.Struct('<8sQ48x')                 # magic, slot count; padded to 64 bytes
+SLOT = struct.Struct('<QqdddB7x16x')              # seq, driver id, lat, lng, fix time, status; 64 bytes
+SEQ = struct.Struct('<Q')
+DRIVER_ID = struct.Struct('<q')
+BODY = struct.Struct('<qdddB')
+BODY_OFFSET = SEQ.size
+PROBES = 8          # open-addressing probe length before a write gives up
+READ_RETRIES = 16   # seqlock retries before a read gives up
+
+STATUS_CODES = {'Available': 1, 'Busy': 2, 'Offline': 3}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+
+class FleetTable:
+    """Driver positions in an mmap'd file shared by every worker on the node.
+
+    A fixed array of 64-byte slots, addressed by driver id with linear
+    probing. Each slot is a seqlock: a writer makes seq odd, writes the
+    body and makes seq even again, and readers retry until they see the
+    same even seq on both sides of their copy, so reads take no locks.
+    Writers serialise per slot with a thread lock plus an fcntl range
+    lock, since fcntl locks don't exclude threads of the same process.
+    """
+
+    def __init__(self, path, slots):
+        self.path = path
+        self.slots = slots
+        self.size = HEADER.size + slots * SLOT.size
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.lockf(fd, fcntl.LOCK_EX, HEADER.size, 0)
+            try:
+                if os.fstat(fd).st_size != self.size or os.pread(fd, HEADER.size, 0)[:8] != MAGIC:
+                    # New file, or one laid out for another slot count: start empty
+                    os.ftruncate(fd, 0)
+                    os.ftruncate(fd, self.size)
+                    os.pwrite(fd, HEADER.pack(MAGIC, slots), 0)
+            finally:
+                fcntl.lockf(fd, fcntl.LOCK_UN, HEADER.size, 0)
+            self.map = mmap.mmap(fd, self.size, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+        except Exception:
+            os.close(fd)
+            raise
+        self.fd = fd
+        self.opened_at = time.time()
+        self._lock = threading.Lock()
+
+    def _offset(self, slot):
+        return HEADER.size + slot * SLOT.size
+
+    def _candidates(self, driver_id):
+        start = driver_id % self.slots
+        for i in range(PROBES):
+            yield self._offset((start + i) % self.slots)
+
+    def _read_slot(self, offset):
+        """Consistent (seq, driver id, lat, lng, fix time, status) snapshot of one slot, or None"""
+        for _ in range(READ_RETRIES):
+            before = SEQ.unpack_from(self.map, offset)[0]
+            if before & 1:
+                continue
+            body = BODY.unpack_from(self.map, offset + BODY_OFFSET)
+            if SEQ.unpack_from(self.map, offset)[0] == before:
+                return (before,) + body
+        return None
+
+    def read(self, driver_id):
+        """(latitude, longitude, fix time, status) for a driver, or None when not in the table"""
+        for offset in self._candidates(driver_id):
+            snapshot = self._read_slot(offset)
+            if snapshot is None or snapshot[1] == 0:
+                return None
+            if snapshot[1] == driver_id:
+                _, _, lat, lng, at, status = snapshot
+                return lat, lng, at, STATUS_NAMES.get(status)
+        return None
+
+    def write(self, driver_id, latitude, longitude, at, status):
+        """Store a fix; returns False when every probed slot belongs to other drivers"""
+        for offset in self._candidates(driver_id):
+            owner = DRIVER_ID.unpack_from(self.map, offset + BODY_OFFSET)[0]
+            if owner not in (0, driver_id):
+                continue
+            with self._lock:
+                fcntl.lockf(self.fd, fcntl.LOCK_EX, SLOT.size, offset)
+                try:
+                    # Re-check under the lock: another worker may have claimed the empty slot
+                    owner = DRIVER_ID.unpack_from(self.map, offset + BODY_OFFSET)[0]
+                    if owner not in (0, driver_id):
+                        continue
+                    seq = SEQ.unpack_from(self.map, offset)[0]
+                    SEQ.pack_into(self.map, offset, seq + 1)
+                    BODY.pack_into(self.map, offset + BODY_OFFSET, driver_id, latitude, longitude, at,
+                                   STATUS_CODES.get(status, 0))
+                    SEQ.pack_into(self.map, offset, seq + 2)
+                    return True
+                finally:
+                    fcntl.lockf(self.fd, fcntl.LOCK_UN, SLOT.size, offset)
+        return False
+
+    def changed_since(self, flushed, not_before=0.0):
+        """Fixes written since the seqs recorded in flushed (slot -> seq), updating it in place.
+
+        Fixes timed before not_before are marked seen but not returned.
+        """
+        changes = []
+        for slot in range(self.slots):
+            offset = self._offset(slot)
+            seq = SEQ.unpack_from(self.map, offset)[0]
+            if seq == 0 or flushed.get(slot) == seq:
+                continue
+            snapshot = self._read_slot(offset)
+            if snapshot is None:
+                continue
+            flushed[slot] = snapshot[0]
+            if snapshot[4] >= not_before:
+                changes.append(snapshot[1:5])
+        return changes
+
+def _epoch(at):
+    """Naive UTC datetime (as the models store) -> epoch seconds"""
+    return at.replace(tzinfo=timezone.utc).timestamp()
+
+def _naive_utc(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).replace(tzinfo=None)
+
+_table = {"pid": None, "table": None}
+_open_lock = threading.Lock()
+
+def get_table():
+    """This process's view of the node's fleet table, or None when disabled or unsupported"""
+    if _table["pid"] != os.getpid():
+        with _open_lock:
+            if _table["pid"] != os.getpid():
+                config = current_app.config
+                table = None
+                if config.get('FLEET_TABLE_ENABLED', True) and fcntl is not None:
+                    path = config.get('FLEET_TABLE_PATH') or os.path.join(current_app.instance_path, 'fleet.table')
+                    try:
+                        table = FleetTable(path, config.get('FLEET_TABLE_SLOTS', 16384))
+                    except OSError as e:
+                        logger.warning("Fleet table unavailable at %s: %s", path, e, extra={"key": "fleet.open_failed"})
+                    else:
+                        _start_flusher(current_app._get_current_object(), table)
+                _table.update(pid=os.getpid(), table=table)
+    return _table["table"]
+
+def record_position(driver_id, latitude, longitude, at, status):
+    """Write a fix to the shared table; False means the caller must persist it itself"""
+    table = get_table()
+    return table is not None and table.write(driver_id, latitude, longitude, _epoch(at), status)
+
+def position(driver_id):
+    """(latitude, longitude, fix time as naive UTC datetime) from the shared table, or None.
+
+    The file outlives restarts, so a fix older than DRIVER_STALE_AFTER_SECONDS
+    is not treated as live; the database position is used instead.
+    """
+    table = get_table()
+    entry = table.read(driver_id) if table is not None else None
+    if entry is None:
+        return None
+    lat, lng, at, _ = entry
+    if at < time.time() - current_app.config.get('DRIVER_STALE_AFTER_SECONDS', 300):
+        return None
+    return lat, lng, _naive_utc(at)
+
+ON_JOB_STATUSES = ('Assigned', 'On Route', 'Arrived')
+
+def ambulance_position(booking):
+    """(latitude, longitude, fix time) of a booking view row's ambulance.
+
+    The live fix while the ambulance is on the job, otherwise the last
+    position the booking recorded, otherwise the driver's persisted one
+    (with no fix time).
+    """
+    if booking.ambulance_id and booking.status in ON_JOB_STATUSES:
+        live = position(booking.ambulance_id)
+        if live is not None:
+            return live
+    if booking.ambulance_latitude and booking.ambulance_longitude:
+        return booking.ambulance_latitude, booking.ambulance_longitude, booking.ambulance_location_updated_at
+    return booking.driver_latitude, booking.driver_longitude, None
+
+def flush(app, table, flushed):
+    """Persist changed fixes to drivers in one executemany.
+
+    A row is only written when the fix is newer than drivers.updated_at, so
+    positions written since by another node, the database fallback path or
+    a status change are never overwritten with older ones. Fixes from
+    before this process opened the table (left in the file by an earlier
+    run) are skipped.
+    """
+    from .extensions import db
+    from .models import Driver
+
+    changes = table.changed_since(flushed, not_before=table.opened_at)
+    if not changes:
+        return 0
+    drivers = Driver.__table__
+    fix_at = bindparam('fix_at', type_=drivers.c.updated_at.type)
+    statement = (
+        update(drivers)
+        .where(drivers.c.id == bindparam('fix_driver'), drivers.c.updated_at < fix_at)
+        .values(current_latitude=bindparam('fix_latitude'), current_longitude=bindparam('fix_longitude'), updated_at=fix_at)
+    )
+    with app.app_context(), db.engine.begin() as connection:
+        connection.execute(statement, [
+            {"fix_driver": driver_id, "fix_latitude": lat, "fix_longitude": lng, "fix_at": _naive_utc(at)}
+            for driver_id, lat, lng, at in changes
+        ])
+    return len(changes)
+
+def _start_flusher(app, table):
+    """One worker per node (whoever holds the flush lock) writes the table back to the database"""
+    from .dispatch_worker import FileLeaderLock
+
+    interval = app.config.get('FLEET_FLUSH_INTERVAL_SECONDS', 1.0)
+    lock = FileLeaderLock(table.path + '.flush.lock')
+
+    def run():
+        flushed = {}
+        while True:
+            time.sleep(interval)
+            try:
+                if lock.still_held() or lock.acquire():
+                    flush(app, table, flushed)
+            except Exception:
+                logger.exception("Fleet table flush failed", extra={"key": "fleet.flush_error"})
+
+    threading.Thread(target=run, name='fleet-flush', daemon=True).start()
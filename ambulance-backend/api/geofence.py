@@ -0,0 +1,149 @@
+import logging
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import update
+from .eta import haversine_km
+from .extensions import db
+from .hospital_cache import get_hospital
+from .models import Booking, Driver
+from .scheduler import redispatch_driver
+
+logger = logging.getLogger(__name__)
+
+# Automatic transitions and the event each one emits
+TRANSITION_EVENTS = {
+    'On Route': 'departed',
+    'Arrived': 'arrived_at_pickup',
+    'Completed': 'arrived_at_hospital'
+}
+REASSIGNED_EVENT = 'reassigned'
+
+# How far along each active status is; the most advanced booking is the one being driven
+STATUS_PROGRESS = {'Assigned': 0, 'On Route': 1, 'Arrived': 2}
+
+def current_booking(bookings):
+    """The driver's booking in hand: most advanced status, then earliest assigned, then lowest id"""
+    return min(bookings, key=lambda b: (-STATUS_PROGRESS.get(b.status, -1), b.assigned_at or datetime.max, b.id))
+
+class DriverFences:
+    """Pickup and hospital fences for one driver's active booking, plus dwell counters"""
+    __slots__ = ('booking_id', 'pickup', 'hospital', 'anchor', 'inside_pickup', 'inside_hospital')
+
+    def __init__(self, booking_id, pickup, hospital):
+        self.booking_id = booking_id
+        self.pickup = pickup
+        self.hospital = hospital
+        self.anchor = None
+        self.inside_pickup = 0
+        self.inside_hospital = 0
+
+# driver id -> DriverFences; only drivers with an active booking have an entry
+_fences = {}
+
+def fences_for(driver_id, booking):
+    """Fences for the driver's current booking, built on first use from the booking row and hospital catalogue"""
+    fences = _fences.get(driver_id)
+    if fences is None or fences.booking_id != booking.id:
+        hospital = get_hospital(booking.hospital_id)
+        fences = DriverFences(
+            booking.id,
+            (booking.pickup_latitude, booking.pickup_longitude)
+            if booking.pickup_latitude is not None and booking.pickup_longitude is not None else None,
+            (hospital['latitude'], hospital['longitude'])
+            if hospital and hospital['latitude'] is not None and hospital['longitude'] is not None else None
+        )
+        _fences[driver_id] = fences
+    return fences
+
+def forget(driver_id):
+    _fences.pop(driver_id, None)
+
+def _transition(driver_id, booking_id, expected, new_status):
+    """Conditional UPDATE so a concurrent manual update or cancel always wins"""
+    now = datetime.utcnow()
+    values = {"status": new_status}
+    if new_status == 'Completed':
+        values["completed_at"] = now
+
+    result = db.session.execute(
+        update(Booking)
+        .where(Booking.id == booking_id, Booking.ambulance_id == driver_id, Booking.status == expected)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        forget(driver_id)
+        return None
+
+    if new_status == 'Completed':
+        db.session.execute(
+            update(Driver)
+            .where(Driver.id == driver_id, Driver.status == 'Busy')
+            .values(status='Available')
+            .execution_options(synchronize_session=False)
+        )
+        forget(driver_id)
+
+    event = {
+        "type": TRANSITION_EVENTS[new_status],
+        "booking_id": booking_id,
+        "status": new_status,
+        "at": now.isoformat()
+    }
+    logger.info("Geofence transition", extra={"key": "geofence.transition", "driver_id": driver_id,
+                                                "previous_status": expected, **event})
+    return event
+
+def evaluate(driver_id, booking, latitude, longitude):
+    """Check one location fix against the driver's fences; returns the events it triggered.
+
+    booking is the driver's active booking row (id, status, pickup
+    coordinates, hospital_id) as just written by the location update.
+    Entering a fence only counts after GEOFENCE_DWELL_FIXES consecutive
+    fixes inside it, so a single noisy GPS fix can't advance a booking.
+    """
+    config = current_app.config
+    dwell = config.get('GEOFENCE_DWELL_FIXES', 2)
+    fences = fences_for(driver_id, booking)
+    if fences.anchor is None:
+        fences.anchor = (latitude, longitude)
+
+    status = booking.status
+    if status in ('Assigned', 'On Route') and fences.pickup:
+        distance_m = haversine_km(latitude, longitude, *fences.pickup) * 1000
+        if distance_m <= config.get('GEOFENCE_PICKUP_RADIUS_M', 75):
+            fences.inside_pickup += 1
+            if fences.inside_pickup >= dwell:
+                event = _transition(driver_id, booking.id, status, 'Arrived')
+                return [event] if event else []
+        else:
+            fences.inside_pickup = 0
+            departed_m = haversine_km(latitude, longitude, *fences.anchor) * 1000
+            if status == 'Assigned' and departed_m >= config.get('GEOFENCE_DEPARTURE_M', 150):
+                event = _transition(driver_id, booking.id, status, 'On Route')
+                return [event] if event else []
+
+    elif status == 'Arrived' and fences.hospital:
+        distance_m = haversine_km(latitude, longitude, *fences.hospital) * 1000
+        if distance_m <= config.get('GEOFENCE_HOSPITAL_RADIUS_M', 150):
+            fences.inside_hospital += 1
+            if fences.inside_hospital >= dwell:
+                event = _transition(driver_id, booking.id, status, 'Completed')
+                if not event:
+                    return []
+                # The ambulance is free again: hand it the next pending case straight away
+                next_booking = redispatch_driver(db.session, db.session.get(Driver, driver_id))
+                if not next_booking:
+                    return [event]
+                return [event, {
+                    "type": REASSIGNED_EVENT,
+                    "booking_id": next_booking.id,
+                    "booking_code": next_booking.booking_code,
+                    "severity": next_booking.severity,
+                    "status": 'Assigned',
+                    "at": datetime.utcnow().isoformat()
+                }]
+        else:
+            fences.inside_hospital = 0
+
+    return []
@@ -0,0 +1,92 @@
+import hashlib
+import threading
+import time
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from .extensions import db
+from .serialization import dumps_bytes
+
+# Fields exposed by GET /api/hospitals, in response order
+CATALOGUE_FIELDS = (
+    'id', 'name', 'address', 'contact_number', 'latitude', 'longitude',
+    'type', 'emergency_services', 'ambulance_count'
+)
+
+_lock = threading.Lock()
+_state = {
+    "version": 0,          # bumped on every committed hospital write
+    "loaded_version": -1,  # version the snapshot below was built from
+    "loaded_at": 0.0,
+    "rows": [],
+    "by_id": {},
+    "body": b"[]",
+    "etag": None
+}
+
+def _build_snapshot():
+    from .models import Hospital
+
+    columns = [getattr(Hospital, field) for field in CATALOGUE_FIELDS]
+    rows = [dict(zip(CATALOGUE_FIELDS, row)) for row in db.session.query(*columns).order_by(Hospital.id).all()]
+    body = dumps_bytes(rows)
+    return rows, body, hashlib.sha1(body).hexdigest()
+
+def get_catalogue():
+    """Return (rows, body, etag) for the hospital catalogue, rebuilding on invalidation.
+
+    The snapshot is rebuilt when a hospital write committed in this process
+    bumped the version, or after HOSPITAL_CACHE_TTL_SECONDS so that writes
+    made by other workers are picked up too.
+    """
+    ttl = current_app.config.get('HOSPITAL_CACHE_TTL_SECONDS', 300)
+
+    if _state["loaded_version"] != _state["version"] or time.monotonic() - _state["loaded_at"] >= ttl:
+        with _lock:
+            version = _state["version"]
+            if _state["loaded_version"] != version or time.monotonic() - _state["loaded_at"] >= ttl:
+                rows, body, etag = _build_snapshot()
+                _state.update(rows=rows, by_id={row["id"]: row for row in rows}, body=body, etag=etag,
+                              loaded_version=version, loaded_at=time.monotonic())
+
+    return _state["rows"], _state["body"], _state["etag"]
+
+def get_hospital(hospital_id):
+    """Catalogue row for one hospital from the same snapshot, or None"""
+    get_catalogue()
+    return _state["by_id"].get(hospital_id)
+
+def invalidate_catalogue():
+    with _lock:
+        _state["version"] += 1
+
+def cache_headers(response, etag, request):
+    """Attach ETag/Cache-Control and turn the response into a 304 when the client copy is current"""
+    max_age = current_app.config.get('HOSPITAL_CACHE_MAX_AGE', 300)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f'public, max-age={max_age}, stale-while-revalidate={max_age}'
+    return response.make_conditional(request)
+
+def _track_hospital_write(mapper, connection, target):
+    session = Session.object_session(target)
+    if session is not None:
+        session.info['hospital_catalogue_dirty'] = True
+
+def _invalidate_after_commit(session):
+    if session.info.pop('hospital_catalogue_dirty', False):
+        invalidate_catalogue()
+
+def _discard_after_rollback(session, previous_transaction):
+    session.info.pop('hospital_catalogue_dirty', None)
+
+def register_cache_listeners():
+    """Invalidate the catalogue whenever a Hospital insert/update/delete is committed"""
+    from .models import Hospital
+
+    if event.contains(Session, 'after_commit', _invalidate_after_commit):
+        return
+
+    for identifier in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(Hospital, identifier, _track_hospital_write)
+    event.listen(Session, 'after_commit', _invalidate_after_commit)
+    event.listen(Session, 'after_soft_rollback', _discard_after_rollback)
@@ -0,0 +1,236 @@
+import math
+import threading
+import time
+from collections import defaultdict
+from flask import current_app
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session
+from .extensions import db
+from .eta import UNKNOWN_LOCATION_COST, eta_seconds
+from .hospital_cache import get_catalogue
+
+# Booking types that need a hospital with emergency services
+EMERGENCY_BOOKING_TYPES = ('Emergency', 'Accident')
+
+# Index cell size in degrees (~5.5 km of latitude) and how far out a search rings before scanning everything
+CELL_DEG = 0.05
+MAX_RINGS = 40
+
+class HospitalIndex:
+    """Catalogue rows bucketed into lat/lng cells for nearest-k lookups"""
+
+    def __init__(self, rows, cell_deg=CELL_DEG):
+        self.cell_deg = cell_deg
+        self.rows = rows
+        self.cells = defaultdict(list)
+        for row in rows:
+            if row['latitude'] is not None and row['longitude'] is not None:
+                self.cells[self._key(row['latitude'], row['longitude'])].append(row)
+        self.located = sum(len(bucket) for bucket in self.cells.values())
+        keys = list(self.cells)
+        self.bounds = (min(r for r, _ in keys), max(r for r, _ in keys),
+                       min(c for _, c in keys), max(c for _, c in keys)) if keys else None
+
+    def _key(self, lat, lng):
+        return math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg)
+
+    def _ring(self, row0, col0, ring):
+        if ring == 0:
+            yield row0, col0
+            return
+        for c in range(col0 - ring, col0 + ring + 1):
+            yield row0 - ring, c
+            yield row0 + ring, c
+        for r in range(row0 - ring + 1, row0 + ring):
+            yield r, col0 - ring
+            yield r, col0 + ring
+
+    def nearby(self, lat, lng, want, max_rings=MAX_RINGS):
+        """At least want located hospitals around (lat, lng), searching outward ring by ring.
+
+        One extra ring is scanned after the count is reached, since a
+        hospital in the next ring can be closer than a corner of this one.
+        Pickups far outside the service area get every located hospital.
+        """
+        if self.bounds is None:
+            return []
+        row0, col0 = self._key(lat, lng)
+        min_row, max_row, min_col, max_col = self.bounds
+        last_ring = max(row0 - min_row, max_row - row0, col0 - min_col, max_col - col0)
+        if last_ring > max_rings:
+            return [row for bucket in self.cells.values() for row in bucket]
+
+        found = []
+        stop_after = last_ring
+        for ring in range(last_ring + 1):
+            for key in self._ring(row0, col0, ring):
+                bucket = self.cells.get(key)
+                if bucket:
+                    found.extend(bucket)
+            if len(found) >= want or len(found) == self.located:
+                stop_after = min(stop_after, ring + 1)
+            if ring >= stop_after:
+                break
+        return found
+
+_index = {"etag": None, "index": None}
+_index_lock = threading.Lock()
+
+def get_index():
+    """Spatial index over the cached hospital catalogue, rebuilt when the catalogue changes"""
+    rows, _, etag = get_catalogue()
+    if _index["etag"] != etag:
+        with _index_lock:
+            if _index["etag"] != etag:
+                _index.update(index=HospitalIndex(rows), etag=etag)
+    return _index["index"]
+
+_availability_lock = threading.Lock()
+_availability = {
+    "version": 0,          # bumped when a committed driver write couldn't be counted exactly
+    "loaded_version": -1,
+    "loaded_at": 0.0,
+    "counts": {}
+}
+
+def free_ambulances():
+    """hospital id -> Available driver count.
+
+    Kept up to date in memory from this process's committed driver writes
+    (see register_availability_listeners), so the usual lookup costs no
+    query. The grouped count is re-run after a write whose effect isn't
+    known (at most once per HOSPITAL_AVAILABILITY_MIN_REFRESH_SECONDS) and
+    every HOSPITAL_AVAILABILITY_TTL_SECONDS for changes made elsewhere.
+    """
+    config = current_app.config
+    age = time.monotonic() - _availability["loaded_at"]
+    stale = age >= config.get('HOSPITAL_AVAILABILITY_TTL_SECONDS', 10) or (
+        _availability["loaded_version"] != _availability["version"]
+        and age >= config.get('HOSPITAL_AVAILABILITY_MIN_REFRESH_SECONDS', 1))
+    if stale:
+        from .models import Driver
+
+        with _availability_lock:
+            version = _availability["version"]
+            counts = dict(db.session.execute(
+                select(Driver.hospital_id, func.count())
+                .where(Driver.status == 'Available')
+                .group_by(Driver.hospital_id)
+            ).all())
+            _availability.update(counts=counts, loaded_version=version, loaded_at=time.monotonic())
+    return _availability["counts"]
+
+def note_free_change(session, hospital_id, change):
+    """Record a known change in a hospital's free ambulances, applied when session commits.
+
+    For bulk UPDATEs on drivers, which the listeners can't see the effect
+    of: run them with execution_options(availability_noted=True) and note
+    what they did here, or the next lookup recounts.
+    """
+    pending = session.info.setdefault('driver_availability_changes', defaultdict(int))
+    pending[hospital_id] += change
+
+def select_hospital(latitude, longitude, booking_type=None):
+    """Best hospital for a pickup: quickest to reach, able to take the case, with a free ambulance.
+
+    The nearest HOSPITAL_SELECT_CANDIDATES hospitals are scored by drive time
+    from the pickup, plus HOSPITAL_NO_AMBULANCE_PENALTY_SECONDS when none of
+    their ambulances is free. Emergency and accident bookings only consider
+    hospitals with emergency services, unless none has them. Returns the
+    catalogue row, or None when there are no hospitals. Coordinates may be
+    numeric strings; malformed ones raise ValueError.
+    """
+    config = current_app.config
+    index = get_index()
+    if not index.rows:
+        return None
+
+    free = free_ambulances()
+    if latitude is None or longitude is None:
+        latitude = longitude = None
+        candidates = index.rows
+    else:
+        latitude, longitude = float(latitude), float(longitude)
+        candidates = index.nearby(latitude, longitude, config.get('HOSPITAL_SELECT_CANDIDATES', 8)) or index.rows
+    if booking_type in EMERGENCY_BOOKING_TYPES:
+        candidates = [row for row in candidates if row['emergency_services']] or candidates
+
+    penalty = config.get('HOSPITAL_NO_AMBULANCE_PENALTY_SECONDS', 900)
+
+    def score(row):
+        seconds = eta_seconds(latitude, longitude, row['latitude'], row['longitude'])
+        return (UNKNOWN_LOCATION_COST if seconds is None else seconds) + (0 if free.get(row['id']) else penalty), row['id']
+
+    return min(candidates, key=score)
+
+def _track_driver_insert(mapper, connection, target):
+    session = Session.object_session(target)
+    if session is not None and target.status == 'Available':
+        note_free_change(session, target.hospital_id, 1)
+
+def _track_driver_delete(mapper, connection, target):
+    session = Session.object_session(target)
+    if session is not None and target.status == 'Available':
+        note_free_change(session, target.hospital_id, -1)
+
+def _track_driver_update(mapper, connection, target):
+    state = inspect(target)
+    session = Session.object_session(target)
+    status = state.attrs.status.history
+    if session is None or not (status.has_changes() or state.attrs.hospital_id.history.has_changes()):
+        return
+    if state.attrs.hospital_id.history.has_changes() or not status.deleted:
+        # Moved between hospitals, or the old status was never loaded: count again
+        session.info['driver_availability_unknown'] = True
+        return
+    change = (target.status == 'Available') - (status.deleted[0] == 'Available')
+    if change:
+        note_free_change(session, target.hospital_id, change)
+
+def _track_driver_statement(orm_execute_state):
+    from .models import Driver
+
+    mapper = orm_execute_state.bind_mapper
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and mapper is not None and mapper.class_ is Driver \
+            and not orm_execute_state.execution_options.get('availability_noted'):
+        orm_execute_state.session.info['driver_availability_unknown'] = True
+
+def _apply_after_commit(session):
+    # A released savepoint isn't committed yet; its changes ride on the outer transaction
+    if session.in_nested_transaction():
+        return
+    changes = session.info.pop('driver_availability_changes', None)
+    unknown = session.info.pop('driver_availability_unknown', False)
+    if not changes and not unknown:
+        return
+    with _availability_lock:
+        if unknown:
+            _availability["version"] += 1
+        if changes:
+            counts = dict(_availability["counts"])
+            for hospital_id, change in changes.items():
+                counts[hospital_id] = max(0, counts.get(hospital_id, 0) + change)
+            _availability["counts"] = counts
+
+def _discard_after_rollback(session, previous_transaction):
+    if previous_transaction.nested:
+        # What the savepoint undid can't be told apart from what the outer transaction keeps
+        if session.info.get('driver_availability_changes'):
+            session.info['driver_availability_unknown'] = True
+        return
+    session.info.pop('driver_availability_changes', None)
+    session.info.pop('driver_availability_unknown', None)
+
+def register_availability_listeners():
+    """Keep the free-ambulance counts in step with committed driver status changes"""
+    from .models import Driver
+
+    if event.contains(Session, 'after_commit', _apply_after_commit):
+        return
+
+    event.listen(Driver, 'after_insert', _track_driver_insert)
+    event.listen(Driver, 'after_update', _track_driver_update)
+    event.listen(Driver, 'after_delete', _track_driver_delete)
+    event.listen(Session, 'do_orm_execute', _track_driver_statement)
+    event.listen(Session, 'after_commit', _apply_after_commit)
+    event.listen(Session, 'after_soft_rollback', _discard_after_rollback)
@@ -0,0 +1,170 @@
+import json
+import logging
+import secrets
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import insert, or_, select, update
+from .bookings import parse_pickup_coordinates
+from .extensions import db
+from .eta import UNKNOWN_LOCATION_COST, eta_seconds
+from .hospital_selection import EMERGENCY_BOOKING_TYPES, get_index, note_free_change, select_hospital
+from .models import Booking, Driver
+from .priority import SEVERITY_HEAD_START, DEFAULT_SEVERITY
+from . import liveness
+
+logger = logging.getLogger(__name__)
+
+INCIDENT_CODE_PREFIX = 'INC'
+
+def _digits(n):
+    return ''.join(secrets.choice('0123456789') for _ in range(n))
+
+def allocate_codes(session, count):
+    """count unused 8-digit booking codes plus an incident code, checked with one query per round"""
+    codes, incident_code = set(), None
+    while True:
+        while len(codes) < count:
+            codes.add(_digits(8))
+        incident_code = incident_code or INCIDENT_CODE_PREFIX + _digits(8)
+        taken = session.execute(
+            select(Booking.booking_code, Booking.incident_code)
+            .where(or_(Booking.booking_code.in_(codes), Booking.incident_code == incident_code))
+        ).all()
+        if not taken:
+            return list(codes), incident_code
+        for booking_code, taken_incident in taken:
+            codes.discard(booking_code)
+            if taken_incident == incident_code:
+                incident_code = None
+
+def _match(session, patients, booking):
+    """Nearest free ambulances across the nearby hospitals, most severe patient first.
+
+    One locked query loads every Available driver at the candidate
+    hospitals; patients are ranked by severity and each takes the cheapest
+    remaining driver by drive time to the shared pickup. Returns a list of
+    driver rows (or None) aligned with patients.
+    """
+    config = current_app.config
+    index = get_index()
+    if booking['pickup_latitude'] is None or booking['pickup_longitude'] is None:
+        hospitals = index.rows
+    else:
+        hospitals = index.nearby(booking['pickup_latitude'], booking['pickup_longitude'],
+                                 config.get('INCIDENT_CANDIDATE_HOSPITALS', 8))
+    if booking['booking_type'] in EMERGENCY_BOOKING_TYPES:
+        hospitals = [row for row in hospitals if row['emergency_services']] or hospitals
+    if not hospitals:
+        return [None] * len(patients)
+
+    drivers = session.execute(
+        select(Driver.id, Driver.name, Driver.phone_number, Driver.vehicle_number, Driver.hospital_id,
+               Driver.current_latitude, Driver.current_longitude)
+        .where(Driver.hospital_id.in_([row['id'] for row in hospitals]), Driver.status == 'Available')
+        .with_for_update(skip_locked=True)
+    ).all()
+
+    def cost(driver):
+        seconds = eta_seconds(driver.current_latitude, driver.current_longitude,
+                              booking['pickup_latitude'], booking['pickup_longitude'])
+        return UNKNOWN_LOCATION_COST if seconds is None else seconds
+
+    drivers.sort(key=lambda d: (cost(d), d.id))
+
+    order = sorted(range(len(patients)), key=lambda i: -SEVERITY_HEAD_START.get(
+        patients[i].get('severity'), SEVERITY_HEAD_START[DEFAULT_SEVERITY]))
+    matched = [None] * len(patients)
+    for i, driver in zip(order, drivers):
+        matched[i] = driver
+    return matched
+
+def create_incident(user, data, patients):
+    """Insert one linked booking per patient and dispatch as many ambulances as are free nearby.
+
+    Everything happens in the caller's transaction: one query allocates
+    every code, one locked query plus one bulk UPDATE claims the drivers,
+    and one multi-row INSERT writes the bookings. Patients that get no
+    ambulance are left Pending at data['hospital_id'] (checked by the
+    route) or the nearest capable hospital for the sweep. Returns
+    (incident_code, booking rows, drivers by booking id). Malformed
+    pickup coordinates raise ValueError.
+    """
+    session = db.session
+    now = datetime.utcnow()
+    pickup_latitude, pickup_longitude = parse_pickup_coordinates(data)
+    shared = {
+        "user_id": user.id,
+        "pickup_location": data['pickup_location'],
+        "pickup_latitude": pickup_latitude,
+        "pickup_longitude": pickup_longitude,
+        "destination": data.get('destination'),
+        "booking_type": data.get('booking_type') or 'Accident',
+        "emergency_type": data.get('emergency_type'),
+        "accident_details": json.dumps(data.get('accident_details', {})),
+        "requested_at": now
+    }
+
+    liveness.sweep(session)
+    matched = _match(session, patients, shared)
+    claimed_ids = [driver.id for driver in matched if driver]
+    if claimed_ids:
+        claim = (
+            update(Driver)
+            .where(Driver.id.in_(claimed_ids), Driver.status == 'Available')
+            .values(status='Busy')
+            .execution_options(synchronize_session=False, availability_noted=True)
+        )
+        # Drivers taken by someone else since the select (no row locks on SQLite) go back to the pool
+        if db.engine.dialect.update_returning:
+            claimed = set(session.execute(claim.returning(Driver.id)).scalars())
+        else:
+            # Without RETURNING the rowcount only says whether every claim landed;
+            # if not, undo the bulk claim and find out driver by driver
+            savepoint = session.begin_nested()
+            if session.execute(claim).rowcount == len(claimed_ids):
+                savepoint.commit()
+                claimed = set(claimed_ids)
+            else:
+                savepoint.rollback()
+                claimed = {driver_id for driver_id in claimed_ids if session.execute(
+                    update(Driver)
+                    .where(Driver.id == driver_id, Driver.status == 'Available')
+                    .values(status='Busy')
+                    .execution_options(synchronize_session=False, availability_noted=True)
+                ).rowcount}
+        matched = [driver if driver and driver.id in claimed else None for driver in matched]
+        for driver in matched:
+            if driver:
+                note_free_change(session, driver.hospital_id, -1)
+
+    fallback_hospital = data.get('hospital_id')
+    if not fallback_hospital and not all(matched):
+        nearest = select_hospital(shared['pickup_latitude'], shared['pickup_longitude'], shared['booking_type'])
+        fallback_hospital = nearest['id'] if nearest else None
+
+    codes, incident_code = allocate_codes(session, len(patients))
+    rows = []
+    for patient, driver, code in zip(patients, matched, codes):
+        row = dict(shared,
+                   booking_code=code,
+                   incident_code=incident_code,
+                   severity=patient.get('severity'),
+                   patient_name=patient.get('patient_name') or user.name,
+                   patient_phone=patient.get('patient_phone') or user.phone_number,
+                   hospital_id=driver.hospital_id if driver else fallback_hospital,
+                   ambulance_id=driver.id if driver else None,
+                   status='Assigned' if driver else 'Pending',
+                   assigned_at=now if driver else None,
+                   auto_assigned=bool(driver))
+        rows.append(row)
+    if any(row['hospital_id'] is None for row in rows):
+        raise ValueError("No hospitals available")
+
+    inserted = session.execute(
+        insert(Booking).returning(Booking.id, Booking.booking_code, sort_by_parameter_order=True),
+        rows
+    ).all()
+    drivers = {row.id: driver for row, driver in zip(inserted, matched) if driver}
+    logger.info("Incident created", extra={"key": "incident.created", "incident_code": incident_code,
+                                           "patients": len(patients), "dispatched": len(drivers)})
+    return incident_code, [dict(row, id=ins.id) for row, ins in zip(rows, inserted)], drivers
@@ -0,0 +1,193 @@
+import logging
+import random
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from flask import Blueprint, Response, current_app, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+metrics_bp = Blueprint('metrics', __name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum:.6f}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+class EndpointStats:
+    def __init__(self):
+        self.wall = Histogram(LATENCY_BUCKETS)
+        self.db = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.size = Histogram(SIZE_BUCKETS)
+        self.statuses = Counter()
+        self.n_plus_one = 0
+
+class RequestRecord:
+    """Per-request accumulator, only allocated for sampled requests"""
+    __slots__ = ('start', 'db_time', 'query_count', 'statements', 'cursor_start')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db_time = 0.0
+        self.query_count = 0
+        self.statements = Counter()
+        self.cursor_start = None
+
+_local = threading.local()
+_lock = threading.Lock()
+_endpoints = {}
+
+def current_record():
+    return getattr(_local, 'record', None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    record = getattr(_local, 'record', None)
+    if record is None:
+        return
+    record.cursor_start = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    record = getattr(_local, 'record', None)
+    if record is None or record.cursor_start is None:
+        return
+    elapsed = time.perf_counter() - record.cursor_start
+    record.cursor_start = None
+    record.db_time += elapsed
+    record.query_count += 1
+    record.statements[statement] += 1
+
+def _start_request():
+    rate = current_app.config.get('METRICS_SAMPLE_RATE', 0.0)
+    if rate <= 0 or (rate < 1 and random.random() >= rate):
+        return
+    _local.record = RequestRecord()
+
+def _finish_request(response):
+    record = getattr(_local, 'record', None)
+    if record is None:
+        return response
+    _local.record = None
+
+    wall = time.perf_counter() - record.start
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    key = (request.method, endpoint)
+    size = response.calculate_content_length() or 0
+
+    threshold = current_app.config.get('N_PLUS_ONE_THRESHOLD', 5)
+    repeated = [(stmt, n) for stmt, n in record.statements.items() if n >= threshold]
+
+    with _lock:
+        stats = _endpoints.get(key)
+        if stats is None:
+            stats = _endpoints[key] = EndpointStats()
+        stats.wall.observe(wall)
+        stats.db.observe(record.db_time)
+        stats.queries.observe(record.query_count)
+        stats.size.observe(size)
+        stats.statuses[response.status_code] += 1
+        if repeated:
+            stats.n_plus_one += 1
+
+    if repeated:
+        statement, count = max(repeated, key=lambda item: item[1])
+        logger.warning("Possible N+1 on %s %s: statement executed %d times: %s",
+                       request.method, endpoint, count, statement[:200])
+
+    if current_app.config.get('METRICS_RESPONSE_HEADERS'):
+        response.headers['Server-Timing'] = f'app;dur={wall * 1000:.1f}, db;dur={record.db_time * 1000:.1f}'
+        response.headers['X-Query-Count'] = str(record.query_count)
+    return response
+
+def _teardown_request(exc):
+    _local.record = None
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+def render_metrics():
+    with _lock:
+        items = sorted(_endpoints.items())
+        lines = [
+            '# HELP http_request_duration_seconds Wall time per request',
+            '# TYPE http_request_duration_seconds histogram'
+        ]
+        for (method, endpoint), stats in items:
+            lines += stats.wall.render('http_request_duration_seconds', f'method="{method}",endpoint="{_label(endpoint)}"')
+
+        lines += ['# HELP http_request_db_seconds Time spent in SQL per request', '# TYPE http_request_db_seconds histogram']
+        for (method, endpoint), stats in items:
+            lines += stats.db.render('http_request_db_seconds', f'method="{method}",endpoint="{_label(endpoint)}"')
+
+        lines += ['# HELP http_request_queries SQL statements per request', '# TYPE http_request_queries histogram']
+        for (method, endpoint), stats in items:
+            lines += stats.queries.render('http_request_queries', f'method="{method}",endpoint="{_label(endpoint)}"')
+
+        lines += ['# HELP http_response_size_bytes Response body size', '# TYPE http_response_size_bytes histogram']
+        for (method, endpoint), stats in items:
+            lines += stats.size.render('http_response_size_bytes', f'method="{method}",endpoint="{_label(endpoint)}"')
+
+        lines += ['# HELP http_requests_total Sampled requests by status', '# TYPE http_requests_total counter']
+        for (method, endpoint), stats in items:
+            for status, count in sorted(stats.statuses.items()):
+                lines.append(f'http_requests_total{{method="{method}",endpoint="{_label(endpoint)}",status="{status}"}} {count}')
+
+        lines += ['# HELP http_n_plus_one_total Requests repeating one statement N_PLUS_ONE_THRESHOLD+ times',
+                  '# TYPE http_n_plus_one_total counter']
+        for (method, endpoint), stats in items:
+            lines.append(f'http_n_plus_one_total{{method="{method}",endpoint="{_label(endpoint)}"}} {stats.n_plus_one}')
+
+    return '\n'.join(lines) + '\n'
+
+def reset_metrics():
+    with _lock:
+        _endpoints.clear()
+
+@metrics_bp.route('/metrics')
+def metrics():
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+def init_instrumentation(app):
+    """Install request timing hooks and SQL cursor listeners.
+
+    Unsampled requests pay for one config lookup in before_request and a
+    thread-local miss per statement; nothing is allocated or aggregated.
+    """
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_teardown_request)
+    app.register_blueprint(metrics_bp)
+
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
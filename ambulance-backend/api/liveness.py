@@ -0,0 +1,128 @@
+import heapq
+import logging
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, update
+from .models import Driver
+
+logger = logging.getLogger(__name__)
+
+# How soon a stale driver that couldn't be taken offline (Busy, or off duty) is looked at again
+RECHECK_SECONDS = 60
+
+class LivenessIndex:
+    """Last GPS fix per driver with a min-heap of expiry deadlines.
+
+    Each fix pushes (last_seen + ttl, driver_id); superseded entries stay in
+    the heap and are skipped when popped, so recording a fix and draining
+    the expired drivers are both O(log n) per driver.
+    """
+
+    def __init__(self):
+        self.last_seen = {}
+        self._heap = []
+        self._lock = threading.Lock()
+
+    def seen(self, driver_id, at, ttl):
+        with self._lock:
+            self.last_seen[driver_id] = at
+            heapq.heappush(self._heap, (at + ttl, driver_id))
+
+    def pop_expired(self, now, ttl):
+        """Drivers whose latest fix is older than ttl; they leave the index"""
+        expired = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, driver_id = heapq.heappop(self._heap)
+                last_seen = self.last_seen.get(driver_id)
+                if last_seen is not None and last_seen + ttl <= now:
+                    del self.last_seen[driver_id]
+                    expired.append(driver_id)
+        return expired
+
+    def __len__(self):
+        return len(self.last_seen)
+
+_index = LivenessIndex()
+_seeded = False
+_seed_lock = threading.Lock()
+
+def _ttl():
+    return timedelta(seconds=current_app.config.get('DRIVER_STALE_AFTER_SECONDS', 300))
+
+def _ensure_seeded(session):
+    """Load on-duty drivers' last fix times once per process, from drivers.updated_at"""
+    global _seeded
+    if _seeded:
+        return
+    with _seed_lock:
+        if _seeded:
+            return
+        ttl = _ttl()
+        for driver_id, updated_at in session.execute(
+            select(Driver.id, Driver.updated_at).where(Driver.status.in_(['Available', 'Busy']))
+        ):
+            _index.seen(driver_id, updated_at, ttl)
+        _seeded = True
+
+def record_fix(driver, at, persist=True):
+    """Note a GPS fix; a driver the sweep took offline goes back into the pool.
+
+    is_available is the driver's own on/off-duty choice, so an Offline
+    driver who never switched it off was taken offline by sweep().
+    persist=False leaves drivers.updated_at to the fleet table flusher.
+    """
+    _index.seen(driver.id, at, _ttl())
+    if persist:
+        driver.updated_at = at
+    if driver.status == 'Offline' and driver.is_available:
+        driver.status = 'Available'
+        logger.info("Driver back online", extra={"key": "liveness.revived", "driver_id": driver.id})
+
+def sweep(session):
+    """Take Available drivers with no fix for DRIVER_STALE_AFTER_SECONDS out of the pool.
+
+    Only drivers popped from the heap are read back, and drivers.updated_at
+    is the source of truth, so a fix handled by another process re-arms the
+    driver instead of taking it offline. The caller commits.
+    """
+    if not current_app.config.get('LIVENESS_ENABLED', True):
+        return []
+    _ensure_seeded(session)
+    ttl = _ttl()
+    now = datetime.utcnow()
+    expired = _index.pop_expired(now, ttl)
+    if not expired:
+        return []
+
+    # Every driver still on duty goes back into the index: fresh ones at their
+    # latest fix, stale ones for a recheck soon, so a Busy driver with a dead
+    # phone is taken offline once a cancel or completion frees them
+    cutoff = now - ttl
+    recheck = min(now, cutoff + timedelta(seconds=RECHECK_SECONDS))
+    stale = []
+    for driver_id, status, is_available, updated_at in session.execute(
+        select(Driver.id, Driver.status, Driver.is_available, Driver.updated_at).where(Driver.id.in_(expired))
+    ):
+        if status == 'Offline':
+            continue
+        if updated_at > cutoff:
+            _index.seen(driver_id, updated_at, ttl)
+            continue
+        _index.seen(driver_id, recheck, ttl)
+        if status == 'Available' and is_available:
+            stale.append(driver_id)
+    if not stale:
+        return []
+
+    # updated_at is only bumped by a fix or another write, either of which means the driver is alive
+    session.execute(
+        update(Driver)
+        .where(Driver.id.in_(stale), Driver.status == 'Available', Driver.updated_at <= cutoff)
+        .values(status='Offline', updated_at=Driver.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    logger.warning("Took %d drivers with stale GPS offline", len(stale),
+                   extra={"key": "liveness.offline", "driver_ids": stale})
+    return stale
@@ -0,0 +1,141 @@
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# Attributes every LogRecord has; anything else was passed via extra= and is emitted as a field
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'key', 'sample'}
+
+_listener = None
+_lock = threading.Lock()
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, key, msg plus any extra= fields"""
+
+    def format(self, record):
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        key = getattr(record, 'key', None)
+        if key:
+            payload["key"] = key
+        for name, value in record.__dict__.items():
+            if name not in _RECORD_ATTRS and not name.startswith('_'):
+                payload[name] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, default=str)
+
+class RateLimitFilter(logging.Filter):
+    """Per-key token bucket plus probabilistic sampling.
+
+    The key is the record's `key` extra, or logger name + message template, so
+    "Auto-assigned booking %s" is one key however many bookings it covers.
+    Records below WARNING are additionally sampled at `info_sample_rate`, or
+    at a per-call `sample` extra. The first record let through after a burst
+    carries a `suppressed` count.
+    """
+
+    def __init__(self, rate, burst, info_sample_rate=1.0):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.info_sample_rate = info_sample_rate
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        sample = getattr(record, 'sample', None)
+        if sample is None and record.levelno < logging.WARNING:
+            sample = self.info_sample_rate
+        if sample is not None and sample < 1 and random.random() >= sample:
+            return False
+
+        if self.rate <= 0:
+            return True
+
+        key = getattr(record, 'key', None) or (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated, suppressed = self._buckets.get(key, (self.burst, now, 0))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now, suppressed + 1)
+                return False
+            self._buckets[key] = (tokens - 1, now, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record):
+        # Only resolve what can't cross threads (args, traceback); the JSON
+        # formatting itself happens on the listener thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def configure_logging(app):
+    """Route the `api` logger hierarchy through a background queue listener.
+
+    Request threads only filter and enqueue; formatting and the stdout write
+    happen on the listener thread. Safe to call once per create_app().
+    """
+    global _listener
+
+    logger = logging.getLogger('api')
+    logger.setLevel(app.config.get('LOG_LEVEL', 'INFO'))
+
+    with _lock:
+        if _listener is not None:
+            return logger
+
+        stream_handler = logging.StreamHandler(sys.stdout)
+        if app.config.get('LOG_JSON', True):
+            stream_handler.setFormatter(JsonFormatter())
+        else:
+            stream_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+
+        queue_handler = NonBlockingQueueHandler(queue.Queue(app.config.get('LOG_QUEUE_SIZE', 10000)))
+        queue_handler.addFilter(RateLimitFilter(
+            app.config.get('LOG_RATE_PER_KEY', 5.0),
+            app.config.get('LOG_BURST', 20),
+            app.config.get('LOG_INFO_SAMPLE_RATE', 1.0)
+        ))
+
+        _listener = QueueListener(queue_handler.queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+        logger.addHandler(queue_handler)
+        logger.propagate = False
+
+    return logger
@@ -1,13 +1,16 @@
+import logging
 from api import create_app
 from api.extensions import db
 from flask_cors import CORS
 from flask import render_template, request, jsonify
-from api.scheduler import start_scheduler
+from api.serialization import make_serializer
 
 # Create app via factory
 app = create_app()
 CORS(app)
 
+logger = logging.getLogger(__name__)
+
 
 
 # Register feature check service
@@ -49,7 +52,9 @@ def migrate_database():
         ambulance_columns = [
             ('ambulance_latitude', 'FLOAT'),
             ('ambulance_longitude', 'FLOAT'),
-            ('ambulance_location_updated_at', 'TIMESTAMP')
+            ('ambulance_location_updated_at', 'TIMESTAMP'),
+            ('incident_code', 'VARCHAR(12)'),
+            ('previous_ambulance_id', 'INTEGER')
         ]
         
         for column_name, column_type in ambulance_columns:
@@ -60,6 +65,28 @@ def migrate_database():
                 db.session.execute(text(f"ALTER TABLE bookings ADD COLUMN {column_name} {column_type}"))
                 migrations_applied.append(f"Added {column_name} column")
         
+        # Indexes backing keyset pagination, driver listing filters and the dispatch sweep
+        indexes = [
+            ('users', 'ix_users_created_at', 'created_at'),
+            ('hospitals', 'ix_hospitals_created_at', 'created_at'),
+            ('drivers', 'ix_drivers_created_at', 'created_at'),
+            ('bookings', 'ix_bookings_created_at', 'created_at'),
+            ('drivers', 'ix_drivers_hospital_id', 'hospital_id'),
+            ('drivers', 'ix_drivers_status', 'status'),
+            ('bookings', 'ix_bookings_status_requested_at', 'status, requested_at'),
+            ('bookings', 'ix_bookings_ambulance_id_updated_at', 'ambulance_id, updated_at'),
+            ('bookings', 'ix_bookings_incident_code', 'incident_code'),
+            ('bookings', 'ix_bookings_previous_ambulance_id_updated_at', 'previous_ambulance_id, updated_at')
+        ]
+        
+        for table_name, index_name, columns in indexes:
+            result = db.session.execute(text(
+                f"SELECT indexname FROM pg_indexes WHERE tablename='{table_name}' AND indexname='{index_name}'"
+            ))
+            if not result.fetchone():
+                db.session.execute(text(f"CREATE INDEX {index_name} ON {table_name} ({columns})"))
+                migrations_applied.append(f"Added {index_name} index")
+        
         if migrations_applied:
             db.session.commit()
             return jsonify({
@@ -83,22 +110,22 @@ def migrate_database():
 # Database health check
 @app.route('/api/health')
 def health_check():
-    from .models import Hospital, Driver, Booking
+    from .stats import check_database, get_table_counts, stats_requested
     
     try:
-        hospital_count = Hospital.query.count()
-        driver_count = Driver.query.count()
-        booking_count = Booking.query.count()
-        
-        return jsonify({
+        check_database()
+        result = {
             "status": "healthy",
-            "database": "connected",
-            "counts": {
-                "hospitals": hospital_count,
-                "drivers": driver_count,
-                "bookings": booking_count
-            }
-        })
+            "database": "connected"
+        }
+        
+        if stats_requested(request.args):
+            stats = get_table_counts()
+            result["counts"] = stats["counts"]
+            result["counts_source"] = stats["source"]
+            result["counts_age_seconds"] = stats["age_seconds"]
+        
+        return jsonify(result)
     except Exception as e:
         return jsonify({
             "status": "unhealthy",
@@ -172,21 +199,52 @@ def hospital_login():
     except Exception as e:
         return jsonify({"error": "Login failed"}), 500
 
+serialize_dashboard_driver = make_serializer(
+    'id', 'name', ('phone', 'phone_number'), 'license_number', ('vehicle', 'vehicle_number'),
+    'status', ('login_id', 'driver_id'), 'password'
+)
+
+serialize_pending_booking = make_serializer(
+    'id', 'booking_type', 'emergency_type', 'severity', 'pickup_location',
+    'pickup_latitude', 'pickup_longitude', 'requested_at'
+)
+
+serialize_ongoing_booking = make_serializer(
+    'id', 'booking_code', 'booking_type', 'emergency_type', 'severity', 'pickup_location',
+    'pickup_latitude', 'pickup_longitude', 'status', 'assigned_at', 'auto_assigned', 'ambulance_id'
+)
+
 def _format_pending_bookings(hospital_id, datetime):
     from .models import Booking
-    return [{
-        "id": b.id,
-        "booking_type": b.booking_type,
-        "emergency_type": b.emergency_type,
-        "severity": b.severity,
-        "pickup_location": b.pickup_location,
-        "pickup_latitude": b.pickup_latitude,
-        "pickup_longitude": b.pickup_longitude,
-        "patient_name": b.patient_name or (b.user.name if b.user else 'Unknown'),
-        "patient_phone": b.patient_phone or (b.user.phone_number if b.user else 'Unknown'),
-        "requested_at": b.requested_at.isoformat(),
-        "time_remaining": max(0, 30 - int((datetime.utcnow() - b.requested_at).total_seconds()))
-    } for b in Booking.query.filter_by(hospital_id=hospital_id, status='Pending').all()]
+    from .priority import prioritize
+    now = datetime.utcnow()
+    result = []
+    # Listed in dispatch priority order: severity first, then time waited
+    for position, b in enumerate(prioritize(Booking.query.filter_by(hospital_id=hospital_id, status='Pending').all()), 1):
+        item = serialize_pending_booking(b)
+        item["queue_position"] = position
+        item["patient_name"] = b.patient_name or (b.user.name if b.user else 'Unknown')
+        item["patient_phone"] = b.patient_phone or (b.user.phone_number if b.user else 'Unknown')
+        item["time_remaining"] = max(0, 30 - int((now - b.requested_at).total_seconds()))
+        result.append(item)
+    return result
+
+def _format_ongoing_bookings(hospital_id):
+    from .models import Booking
+    result = []
+    for b in Booking.query.filter_by(hospital_id=hospital_id).filter(Booking.status.in_(['Assigned', 'On Route', 'Arrived'])).all():
+        item = serialize_ongoing_booking(b)
+        item["patient_name"] = b.patient_name or (b.user.name if b.user else 'Unknown')
+        item["patient_phone"] = b.patient_phone or (b.user.phone_number if b.user else 'Unknown')
+        item["user_name"] = b.user.name if b.user else 'Unknown'
+        item["user_phone"] = b.user.phone_number if b.user else 'Unknown'
+        result.append(item)
+    return result
+
+def _format_dashboard_driver(d):
+    item = serialize_dashboard_driver(d)
+    item["location"] = f"{d.current_latitude},{d.current_longitude}" if d.current_latitude and d.current_longitude else "Unknown"
+    return item
 
 # Hospital Dashboard Data
 @app.route('/api/hospital/<int:hospital_id>/dashboard')
@@ -216,36 +274,9 @@ def hospital_dashboard_data(hospital_id):
             "total_drivers": len(drivers),
             "total_bookings": total_bookings
         },
-        "drivers": [{
-            "id": d.id,
-            "name": d.name,
-            "phone": d.phone_number,
-            "license_number": d.license_number,
-            "vehicle": d.vehicle_number,
-            "status": d.status,
-            "location": f"{d.current_latitude},{d.current_longitude}" if d.current_latitude and d.current_longitude else "Unknown",
-            "login_id": d.driver_id,
-            "password": d.password
-        } for d in drivers],
+        "drivers": [_format_dashboard_driver(d) for d in drivers],
         "pending_bookings": _format_pending_bookings(hospital_id, datetime),
-        "ongoing_bookings": [{
-            "id": b.id,
-            "booking_code": b.booking_code,
-            "booking_type": b.booking_type,
-            "emergency_type": b.emergency_type,
-            "severity": b.severity,
-            "pickup_location": b.pickup_location,
-            "pickup_latitude": b.pickup_latitude,
-            "pickup_longitude": b.pickup_longitude,
-            "patient_name": b.patient_name or (b.user.name if b.user else 'Unknown'),
-            "patient_phone": b.patient_phone or (b.user.phone_number if b.user else 'Unknown'),
-            "user_name": b.user.name if b.user else 'Unknown',
-            "user_phone": b.user.phone_number if b.user else 'Unknown',
-            "status": b.status,
-            "assigned_at": b.assigned_at.isoformat() if b.assigned_at else None,
-            "auto_assigned": b.auto_assigned,
-            "ambulance_id": b.ambulance_id
-        } for b in Booking.query.filter_by(hospital_id=hospital_id).filter(Booking.status.in_(['Assigned', 'On Route', 'Arrived'])).all()]
+        "ongoing_bookings": _format_ongoing_bookings(hospital_id)
     }
     
     # Add ambulance details efficiently
@@ -331,8 +362,14 @@ def delete_driver(hospital_id, driver_id):
 # Booking APIs
 @app.route('/api/bookings', methods=['POST'])
 def create_booking():
-    from .models import Booking, Driver, Hospital, User
+    from .models import Booking
+    from .bookings import generate_booking_code, insert_booking, missing_reference, parse_pickup_coordinates
+    from .scheduler import fast_dispatch
+    from .eta import eta_seconds
+    from .hospital_cache import get_catalogue
+    from .hospital_selection import select_hospital
     from flask_jwt_extended import get_jwt_identity, get_jwt, verify_jwt_in_request
+    from sqlalchemy.exc import IntegrityError
     import json
     
     try:
@@ -347,9 +384,8 @@ def create_booking():
         return jsonify({"error": "Invalid or missing token", "details": str(e)}), 401
     
     try:
-        db.create_all()
-        
-        if Hospital.query.count() == 0:
+        # The cached catalogue answers "any hospitals yet?" without a query
+        if not get_catalogue()[0]:
             from . import seed_sample_hospitals
             seed_sample_hospitals()
         
@@ -363,75 +399,223 @@ def create_booking():
         if missing_fields:
             return jsonify({"error": f"Missing required fields: {', '.join(missing_fields)}"}), 400
         
-        # Get hospital_id with fallback
+        try:
+            pickup_latitude, pickup_longitude = parse_pickup_coordinates(data)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        # Get hospital_id, else the nearest hospital that can take the case
         hospital_id = data.get('hospital_id')
         if not hospital_id:
-            # Use first available hospital as fallback
-            first_hospital = Hospital.query.first()
-            if first_hospital:
-                hospital_id = first_hospital.id
+            nearest = select_hospital(pickup_latitude, pickup_longitude, data.get('booking_type'))
+            if nearest:
+                hospital_id = nearest['id']
             else:
                 return jsonify({
                     "error": "No hospitals available",
                     "message": "Please try again later"
                 }), 400
         
-        hospital = Hospital.query.get(hospital_id)
-        if not hospital:
+        try:
+            hospital_id = int(hospital_id)
+        except (TypeError, ValueError):
             return jsonify({
                 "error": "Hospital not found",
                 "message": "Invalid hospital ID"
             }), 400
         
-        user = User.query.get(current_user_id)
-        if not user:
-            return jsonify({
-                "error": "User not found",
-                "message": "Please login again"
-            }), 401
-        
-        # Generate unique 8-digit booking code
-        import secrets
-        
-        def generate_booking_code():
-            while True:
-                code = ''.join(secrets.choice('0123456789') for _ in range(8))
-                if not Booking.query.filter_by(booking_code=code).first():
-                    return code
-        
-        booking_code = generate_booking_code()
-        
         booking = Booking(
-            booking_code=booking_code,
-            user_id=current_user_id,
             hospital_id=hospital_id,
             pickup_location=data['pickup_location'],
-            pickup_latitude=data.get('pickup_latitude'),
-            pickup_longitude=data.get('pickup_longitude'),
+            pickup_latitude=pickup_latitude,
+            pickup_longitude=pickup_longitude,
             destination=data.get('destination'),
             booking_type=data['booking_type'],
             emergency_type=data.get('emergency_type'),
             severity=data.get('severity'),
             accident_details=json.dumps(data.get('accident_details', {})),
-            patient_name=data.get('patient_name') or user.name,
-            patient_phone=data.get('patient_phone') or user.phone_number
+            status='Pending',
+            auto_assigned=False
         )
         
-        db.session.add(booking)
+        # Critical cases don't wait for an operator or the sweep: claim the
+        # nearest free ambulance before the insert, or fall back to Pending
+        driver = None
+        if app.config.get('FAST_DISPATCH_ENABLED', True) and booking.severity in app.config.get('FAST_DISPATCH_SEVERITIES', ('Critical',)):
+            driver = fast_dispatch(db.session, booking)
+        
+        # The user and hospital are validated by the insert itself, which
+        # joins both rows. A code collision only rolls back the insert's
+        # savepoint, so the ambulance claim above survives the retry
+        for attempt in range(app.config.get('BOOKING_CODE_ATTEMPTS', 5)):
+            booking.booking_code = generate_booking_code()
+            try:
+                with db.session.begin_nested():
+                    created = insert_booking(db.session, current_user_id, hospital_id, {
+                        "booking_code": booking.booking_code,
+                        "pickup_location": booking.pickup_location,
+                        "pickup_latitude": booking.pickup_latitude,
+                        "pickup_longitude": booking.pickup_longitude,
+                        "destination": booking.destination,
+                        "booking_type": booking.booking_type,
+                        "emergency_type": booking.emergency_type,
+                        "severity": booking.severity,
+                        "accident_details": booking.accident_details,
+                        "patient_name": data.get('patient_name') or None,
+                        "patient_phone": data.get('patient_phone') or None,
+                        "status": booking.status,
+                        "ambulance_id": booking.ambulance_id,
+                        "assigned_at": booking.assigned_at,
+                        "auto_assigned": booking.auto_assigned
+                    })
+            except IntegrityError:
+                logger.warning("Booking code collision, retrying", extra={"key": "booking.code_collision", "attempt": attempt})
+                continue
+            
+            if created is None:
+                missing = missing_reference(db.session, current_user_id, hospital_id)
+                db.session.rollback()
+                if missing == 'user':
+                    return jsonify({
+                        "error": "User not found",
+                        "message": "Please login again"
+                    }), 401
+                return jsonify({
+                    "error": "Hospital not found",
+                    "message": "Invalid hospital ID"
+                }), 400
+            
+            db.session.commit()
+            break
+        else:
+            db.session.rollback()
+            return jsonify({
+                "error": "Could not allocate a booking code",
+                "message": "Failed to create booking"
+            }), 500
+        
+        result = {
+            "booking_id": created.id,
+            "booking_code": created.booking_code,
+            "status": created.status,
+            "message": "Booking created successfully"
+        }
+        if driver:
+            result["driver"] = {
+                "name": driver.name,
+                "phone": driver.phone_number,
+                "vehicle": driver.vehicle_number
+            }
+            result["eta_seconds"] = eta_seconds(driver.current_latitude, driver.current_longitude,
+                                                booking.pickup_latitude, booking.pickup_longitude)
+        return jsonify(result)
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            "error": str(e),
+            "message": "Failed to create booking"
+        }), 500
+
+@app.route('/api/incidents', methods=['POST'])
+def create_incident():
+    from .models import Hospital, User
+    from .incidents import create_incident as create_incident_bookings
+    from .eta import eta_seconds
+    from flask_jwt_extended import get_jwt_identity, get_jwt, verify_jwt_in_request
+    
+    try:
+        verify_jwt_in_request()
+        current_user_id = int(get_jwt_identity())
+        claims = get_jwt()
+        
+        if claims.get('user_type') == 'driver':
+            return jsonify({"error": "Invalid token type"}), 403
+            
+    except Exception as e:
+        return jsonify({"error": "Invalid or missing token", "details": str(e)}), 401
+    
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "Invalid request data"}), 400
+        
+        if not data.get('pickup_location'):
+            return jsonify({"error": "Missing required fields: pickup_location"}), 400
+        
+        # Either a list of patients or just how many there are
+        patients = data.get('patients')
+        if patients is None:
+            count = data.get('patient_count')
+            if isinstance(count, bool) or not isinstance(count, int) or count < 1:
+                return jsonify({"error": "patients or patient_count required"}), 400
+            patients = [{"severity": data.get('severity')} for _ in range(count)]
+        if not isinstance(patients, list) or not patients or not all(isinstance(p, dict) for p in patients):
+            return jsonify({"error": "patients must be a non-empty list"}), 400
+        
+        max_patients = app.config.get('INCIDENT_MAX_PATIENTS', 20)
+        if len(patients) > max_patients:
+            return jsonify({"error": f"At most {max_patients} patients per incident"}), 400
+        
+        # A caller-chosen hospital for patients left waiting must exist
+        if data.get('hospital_id'):
+            try:
+                hospital_id = int(data['hospital_id'])
+            except (TypeError, ValueError):
+                hospital_id = None
+            if hospital_id is None or not db.session.get(Hospital, hospital_id):
+                return jsonify({
+                    "error": "Hospital not found",
+                    "message": "Invalid hospital ID"
+                }), 400
+            data['hospital_id'] = hospital_id
+        
+        user = User.query.get(current_user_id)
+        if not user:
+            return jsonify({
+                "error": "User not found",
+                "message": "Please login again"
+            }), 401
+        
+        incident_code, bookings, drivers = create_incident_bookings(user, data, patients)
         db.session.commit()
         
+        result = []
+        for booking in bookings:
+            item = {
+                "booking_id": booking["id"],
+                "booking_code": booking["booking_code"],
+                "severity": booking["severity"],
+                "status": booking["status"],
+                "hospital_id": booking["hospital_id"]
+            }
+            driver = drivers.get(booking["id"])
+            if driver:
+                item["driver"] = {
+                    "name": driver.name,
+                    "phone": driver.phone_number,
+                    "vehicle": driver.vehicle_number
+                }
+                item["eta_seconds"] = eta_seconds(driver.current_latitude, driver.current_longitude,
+                                                  booking["pickup_latitude"], booking["pickup_longitude"])
+            result.append(item)
+        
         return jsonify({
-            "booking_id": booking.id,
-            "booking_code": booking.booking_code,
-            "status": "Pending",
-            "message": "Booking created successfully"
+            "incident_code": incident_code,
+            "bookings": result,
+            "dispatched": len(drivers),
+            "message": "Incident created successfully"
         })
         
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e), "message": "Please try again later"}), 400
     except Exception as e:
         db.session.rollback()
+        logger.exception("Error creating incident", extra={"key": "incident.error"})
         return jsonify({
             "error": str(e),
-            "message": "Failed to create booking"
+            "message": "Failed to create incident"
         }), 500
 
 @app.route('/api/bookings/<int:booking_id>/assign', methods=['POST'])
@@ -475,6 +659,8 @@ def assign_ambulance(booking_id):
 @app.route('/api/bookings/<int:booking_id>/auto-assign', methods=['POST'])
 def auto_assign_ambulance(booking_id):
     from .models import Booking, Driver
+    from .eta import dispatch_cost
+    from . import liveness
     from datetime import datetime
     
     try:
@@ -485,10 +671,14 @@ def auto_assign_ambulance(booking_id):
         if booking.status != 'Pending':
             return jsonify({"error": "Booking cannot be auto-assigned"}), 400
         
-        available_driver = Driver.query.filter_by(
-            hospital_id=booking.hospital_id,
-            status='Available'
-        ).first()
+        # Closest free ambulance by estimated drive time to the pickup, after
+        # dropping drivers whose GPS has gone quiet
+        liveness.sweep(db.session)
+        available_driver = min(
+            Driver.query.filter_by(hospital_id=booking.hospital_id, status='Available').all(),
+            key=lambda d: dispatch_cost(d, booking),
+            default=None
+        )
         
         if available_driver:
             booking.ambulance_id = available_driver.id
@@ -515,7 +705,9 @@ def auto_assign_ambulance(booking_id):
 
 @app.route('/api/bookings/<int:booking_id>/status')
 def get_booking_status(booking_id):
-    from .models import Booking, Driver, Hospital
+    from .booking_view import booking_view
+    from .eta import booking_etas
+    from .fleet_table import position
     from flask_jwt_extended import get_jwt_identity, get_jwt, verify_jwt_in_request
     
     try:
@@ -523,12 +715,13 @@ def get_booking_status(booking_id):
         current_user_id = int(get_jwt_identity())
         claims = get_jwt()
         
+        booking = booking_view(booking_id)
         if claims.get('user_type') == 'driver':
-            booking = Booking.query.filter_by(id=booking_id, ambulance_id=current_user_id).first()
+            owner_id = booking.ambulance_id if booking else None
         else:
-            booking = Booking.query.filter_by(id=booking_id, user_id=current_user_id).first()
+            owner_id = booking.user_id if booking else None
             
-        if not booking:
+        if owner_id != current_user_id:
             return jsonify({"error": "Booking not found or unauthorized"}), 404
             
     except Exception:
@@ -548,24 +741,31 @@ def get_booking_status(booking_id):
         "cancel_reason": "No ambulance available" if booking.status == 'Auto-Cancelled' else None
     }
     
-    if booking.ambulance_id:
-        driver = Driver.query.get(booking.ambulance_id)
-        if driver:
-            result["ambulance"] = {
-                "driver_name": driver.name,
-                "driver_phone": driver.phone_number,
-                "vehicle_number": driver.vehicle_number,
-                "license_number": driver.license_number,
-                "current_latitude": driver.current_latitude,
-                "current_longitude": driver.current_longitude,
-                "assigned_at": booking.assigned_at.isoformat() if booking.assigned_at else None
-            }
+    if booking.ambulance_id and booking.driver_name is not None:
+        live = position(booking.ambulance_id)
+        result["ambulance"] = {
+            "driver_name": booking.driver_name,
+            "driver_phone": booking.driver_phone,
+            "vehicle_number": booking.driver_vehicle_number,
+            "license_number": booking.driver_license_number,
+            "current_latitude": live[0] if live else booking.driver_latitude,
+            "current_longitude": live[1] if live else booking.driver_longitude,
+            "assigned_at": booking.assigned_at.isoformat() if booking.assigned_at else None
+        }
+    
+    ambulance = result.get("ambulance")
+    result["eta"] = booking_etas(
+        booking.status,
+        (booking.pickup_latitude, booking.pickup_longitude),
+        (ambulance["current_latitude"], ambulance["current_longitude"]) if ambulance else None,
+        (booking.hospital_latitude, booking.hospital_longitude) if booking.hospital_name is not None else None
+    )
     
     return jsonify(result)
 
 @app.route('/api/bookings/code/<booking_code>')
 def get_booking_by_code(booking_code):
-    from .models import Booking, Driver, Hospital
+    from .booking_view import booking_view_by_code
     from flask_jwt_extended import get_jwt_identity, get_jwt, verify_jwt_in_request
     
     try:
@@ -573,7 +773,7 @@ def get_booking_by_code(booking_code):
         current_user_id = int(get_jwt_identity())
         claims = get_jwt()
         
-        booking = Booking.query.filter_by(booking_code=booking_code).first()
+        booking = booking_view_by_code(booking_code)
         if not booking:
             return jsonify({"error": "Booking not found"}), 404
         
@@ -588,8 +788,6 @@ def get_booking_by_code(booking_code):
     except Exception:
         return jsonify({"error": "Invalid or missing token"}), 401
     
-    hospital = Hospital.query.get(booking.hospital_id)
-    
     result = {
         "id": booking.id,
         "booking_code": booking.booking_code,
@@ -602,27 +800,25 @@ def get_booking_by_code(booking_code):
         "is_cancelled": booking.status in ['Cancelled', 'Auto-Cancelled'],
         "cancel_reason": "No ambulance available" if booking.status == 'Auto-Cancelled' else None,
         "hospital": {
-            "name": hospital.name,
-            "address": hospital.address,
-            "contact_number": hospital.contact_number
-        } if hospital else None
+            "name": booking.hospital_name,
+            "address": booking.hospital_address,
+            "contact_number": booking.hospital_contact_number
+        } if booking.hospital_name is not None else None
     }
     
-    if booking.ambulance_id:
-        driver = Driver.query.get(booking.ambulance_id)
-        if driver:
-            result["ambulance"] = {
-                "driver_name": driver.name,
-                "driver_phone": driver.phone_number,
-                "vehicle_number": driver.vehicle_number,
-                "assigned_at": booking.assigned_at.isoformat() if booking.assigned_at else None
-            }
+    if booking.ambulance_id and booking.driver_name is not None:
+        result["ambulance"] = {
+            "driver_name": booking.driver_name,
+            "driver_phone": booking.driver_phone,
+            "vehicle_number": booking.driver_vehicle_number,
+            "assigned_at": booking.assigned_at.isoformat() if booking.assigned_at else None
+        }
     
     return jsonify(result)
 
 @app.route('/api/user/ongoing-booking')
 def get_user_ongoing_booking():
-    from .models import Booking, Driver, Hospital
+    from .booking_view import ongoing_booking_view
     from flask_jwt_extended import get_jwt_identity, get_jwt, verify_jwt_in_request
     
     try:
@@ -637,16 +833,12 @@ def get_user_ongoing_booking():
         return jsonify({"error": "Invalid or missing token", "details": str(e)}), 401
     
     try:
-        # Find ongoing booking for user
-        ongoing_booking = Booking.query.filter_by(user_id=current_user_id).filter(
-            Booking.status.in_(['Pending', 'Assigned', 'On Route', 'Arrived'])
-        ).first()
+        # Find ongoing booking for user, with its hospital and ambulance, in one query
+        ongoing_booking = ongoing_booking_view(current_user_id)
         
         if not ongoing_booking:
             return jsonify({"has_ongoing": False})
         
-        hospital = Hospital.query.get(ongoing_booking.hospital_id)
-        
         result = {
             "has_ongoing": True,
             "booking": {
@@ -659,20 +851,18 @@ def get_user_ongoing_booking():
                 "requested_at": ongoing_booking.requested_at.isoformat(),
                 "is_cancelled": ongoing_booking.status in ['Cancelled', 'Auto-Cancelled'],
                 "hospital": {
-                    "name": hospital.name,
-                    "address": hospital.address
-                } if hospital else None
+                    "name": ongoing_booking.hospital_name,
+                    "address": ongoing_booking.hospital_address
+                } if ongoing_booking.hospital_name is not None else None
             }
         }
         
-        if ongoing_booking.ambulance_id:
-            driver = Driver.query.get(ongoing_booking.ambulance_id)
-            if driver:
-                result["booking"]["ambulance"] = {
-                    "driver_name": driver.name,
-                    "vehicle_number": driver.vehicle_number,
-                    "driver_phone": driver.phone_number
-                }
+        if ongoing_booking.ambulance_id and ongoing_booking.driver_name is not None:
+            result["booking"]["ambulance"] = {
+                "driver_name": ongoing_booking.driver_name,
+                "vehicle_number": ongoing_booking.driver_vehicle_number,
+                "driver_phone": ongoing_booking.driver_phone
+            }
         
         return jsonify(result)
         
@@ -682,6 +872,7 @@ def get_user_ongoing_booking():
 @app.route('/api/bookings/code/<booking_code>/cancel', methods=['POST'])
 def cancel_booking_by_code(booking_code):
     from .models import Booking, Driver
+    from .scheduler import redispatch_driver
     from flask_jwt_extended import get_jwt_identity, get_jwt, verify_jwt_in_request
     from datetime import datetime
     
@@ -704,14 +895,16 @@ def cancel_booking_by_code(booking_code):
         return jsonify({"error": "Cannot cancel completed or already cancelled booking"}), 400
     
     try:
-        # Free up the driver if assigned
+        booking.status = 'Cancelled'
+        booking.completed_at = datetime.utcnow()
+        
+        # Free up the driver if assigned and hand them the next pending case
         if booking.ambulance_id:
             driver = Driver.query.get(booking.ambulance_id)
             if driver:
                 driver.status = 'Available'
+                redispatch_driver(db.session, driver)
         
-        booking.status = 'Cancelled'
-        booking.completed_at = datetime.utcnow()
         db.session.commit()
         
         return jsonify({"message": "Booking cancelled successfully"})
@@ -722,6 +915,7 @@ def cancel_booking_by_code(booking_code):
 @app.route('/api/bookings/<int:booking_id>/cancel', methods=['POST'])
 def cancel_booking(booking_id):
     from .models import Booking, Driver
+    from .scheduler import redispatch_driver
     from flask_jwt_extended import get_jwt_identity, get_jwt, verify_jwt_in_request
     from datetime import datetime
     
@@ -730,72 +924,78 @@ def cancel_booking(booking_id):
         current_user_id = int(get_jwt_identity())
         claims = get_jwt()
         
-        print(f"Cancel request from user {current_user_id} for booking {booking_id}")
-        
         if claims.get('user_type') == 'driver':
             return jsonify({"error": "Drivers cannot cancel bookings"}), 403
         
         booking = Booking.query.filter_by(id=booking_id, user_id=current_user_id).first()
         if not booking:
-            print(f"Booking {booking_id} not found for user {current_user_id}")
+            logger.info("Cancel of unknown booking %s by user %s", booking_id, current_user_id,
+                        extra={"key": "booking.cancel_not_found"})
             return jsonify({"error": "Booking not found or unauthorized"}), 404
-        
-        print(f"Found booking {booking_id} with status {booking.status}")
             
     except Exception as e:
-        print(f"Auth error in cancel booking: {str(e)}")
+        logger.warning("Auth error in cancel booking: %s", e, extra={"key": "booking.cancel_auth_error"})
         return jsonify({"error": "Invalid or missing token"}), 401
     
     if booking.status in ['Completed', 'Cancelled', 'Auto-Cancelled']:
         return jsonify({"error": "Cannot cancel completed or already cancelled booking"}), 400
     
     try:
-        # Free up the driver if assigned
+        log_fields = {"booking_id": booking_id, "user_id": current_user_id,
+                      "previous_status": booking.status, "driver_id": booking.ambulance_id}
+        booking.status = 'Cancelled'
+        booking.completed_at = datetime.utcnow()
+        
+        # Free up the driver if assigned and hand them the next pending case
         if booking.ambulance_id:
             driver = Driver.query.get(booking.ambulance_id)
             if driver:
-                print(f"Freeing up driver {driver.id} from status {driver.status}")
                 driver.status = 'Available'
+                redispatch_driver(db.session, driver)
         
-        print(f"Changing booking {booking_id} status from {booking.status} to Cancelled")
-        booking.status = 'Cancelled'
-        booking.completed_at = datetime.utcnow()
         db.session.commit()
         
-        print(f"Successfully cancelled booking {booking_id}")
+        logger.info("Booking cancelled", extra={"key": "booking.cancelled", **log_fields})
         return jsonify({"message": "Booking cancelled successfully"})
     except Exception as e:
-        print(f"Error cancelling booking {booking_id}: {str(e)}")
+        logger.exception("Error cancelling booking %s", booking_id, extra={"key": "booking.cancel_error"})
         db.session.rollback()
         return jsonify({"error": f"Failed to cancel booking: {str(e)}"}), 500
 
 @app.route('/api/hospital/<int:hospital_id>/bookings/<int:booking_id>/track')
 def get_booking_tracking_data(hospital_id, booking_id):
-    from .models import Booking, Driver, Hospital
+    from .booking_view import booking_view
+    from .eta import booking_etas
+    from .fleet_table import ambulance_position
     
     try:
-        booking = Booking.query.filter_by(id=booking_id, hospital_id=hospital_id).first()
-        if not booking:
+        booking = booking_view(booking_id)
+        if not booking or booking.hospital_id != hospital_id:
             return jsonify({"error": "Booking not found"}), 404
         
-        hospital = Hospital.query.get(booking.hospital_id)
-        driver = Driver.query.get(booking.ambulance_id) if booking.ambulance_id else None
-        
+        has_hospital = booking.hospital_name is not None
+        latitude, longitude, fixed_at = ambulance_position(booking)
         result = {
             "booking_id": booking.id,
             "status": booking.status,
             "pickup_latitude": booking.pickup_latitude,
             "pickup_longitude": booking.pickup_longitude,
             "pickup_location": booking.pickup_location,
-            "hospital_latitude": hospital.latitude if hospital else None,
-            "hospital_longitude": hospital.longitude if hospital else None,
-            "hospital_name": hospital.name if hospital else None,
-            "ambulance_latitude": booking.ambulance_latitude or (driver.current_latitude if driver else None),
-            "ambulance_longitude": booking.ambulance_longitude or (driver.current_longitude if driver else None),
-            "driver_name": driver.name if driver else None,
-            "vehicle_number": driver.vehicle_number if driver else None,
-            "last_updated": booking.ambulance_location_updated_at.isoformat() if booking.ambulance_location_updated_at else None
+            "hospital_latitude": booking.hospital_latitude,
+            "hospital_longitude": booking.hospital_longitude,
+            "hospital_name": booking.hospital_name,
+            "ambulance_latitude": latitude,
+            "ambulance_longitude": longitude,
+            "driver_name": booking.driver_name,
+            "vehicle_number": booking.driver_vehicle_number,
+            "last_updated": fixed_at.isoformat() if fixed_at else None
         }
+        result["eta"] = booking_etas(
+            booking.status,
+            (booking.pickup_latitude, booking.pickup_longitude),
+            (result["ambulance_latitude"], result["ambulance_longitude"]),
+            (booking.hospital_latitude, booking.hospital_longitude) if has_hospital else None
+        )
         
         return jsonify(result)
     except Exception as e:
@@ -804,6 +1004,7 @@ def get_booking_tracking_data(hospital_id, booking_id):
 @app.route('/api/hospital/<int:hospital_id>/bookings/<int:booking_id>/cancel', methods=['POST'])
 def hospital_cancel_booking(hospital_id, booking_id):
     from .models import Booking, Driver
+    from .scheduler import redispatch_driver
     from datetime import datetime
     
     try:
@@ -814,14 +1015,16 @@ def hospital_cancel_booking(hospital_id, booking_id):
         if booking.status in ['Completed', 'Cancelled']:
             return jsonify({"error": "Cannot cancel completed or already cancelled booking"}), 400
         
-        # Free up the driver if assigned
+        booking.status = 'Cancelled'
+        booking.completed_at = datetime.utcnow()
+        
+        # Free up the driver if assigned and hand them the next pending case
         if booking.ambulance_id:
             driver = Driver.query.get(booking.ambulance_id)
             if driver:
                 driver.status = 'Available'
+                redispatch_driver(db.session, driver)
         
-        booking.status = 'Cancelled'
-        booking.completed_at = datetime.utcnow()
         db.session.commit()
         
         return jsonify({"message": "Booking cancelled by hospital"})
@@ -831,55 +1034,18 @@ def hospital_cancel_booking(hospital_id, booking_id):
 
 @app.route('/api/bookings/auto-cancel-expired', methods=['POST'])
 def auto_cancel_expired_bookings():
-    from .models import Booking, Driver
-    from datetime import datetime, timedelta
+    from .scheduler import dispatch_tick
     
-    # Auto-assign after 30 seconds, cancel after 2 minutes
-    assign_cutoff = datetime.utcnow() - timedelta(seconds=30)
-    cancel_cutoff = datetime.utcnow() - timedelta(minutes=2)
-    
-    # First try to auto-assign pending bookings
-    pending_for_assignment = Booking.query.filter(
-        Booking.status == 'Pending',
-        Booking.requested_at < assign_cutoff
-    ).all()
-    
-    assigned_count = 0
-    # Get all available drivers at once to avoid N+1 queries
-    available_drivers = {d.hospital_id: d for d in Driver.query.filter_by(status='Available').all()}
-    
-    for booking in pending_for_assignment:
-        available_driver = available_drivers.get(booking.hospital_id)
-        
-        if available_driver:
-            booking.ambulance_id = available_driver.id
-            booking.status = 'Assigned'
-            booking.assigned_at = datetime.utcnow()
-            booking.auto_assigned = True
-            available_driver.status = 'Busy'
-            # Remove from available list to prevent double assignment
-            del available_drivers[booking.hospital_id]
-            assigned_count += 1
-    
-    # Then cancel bookings that are still pending after 2 minutes
-    expired_bookings = Booking.query.filter(
-        Booking.status == 'Pending',
-        Booking.requested_at < cancel_cutoff
-    ).all()
-    
-    cancelled_count = 0
-    for booking in expired_bookings:
-        booking.status = 'Auto-Cancelled'
-        booking.completed_at = datetime.utcnow()
-        cancelled_count += 1
-    
-    if assigned_count > 0 or cancelled_count > 0:
-        db.session.commit()
+    # Same priority-ordered sweep the dispatch worker runs: auto-assign after
+    # 30 seconds, cancel after 2 minutes
+    stats = dispatch_tick()
+    if stats["errors"]:
+        return jsonify({"error": "Auto-assign sweep failed"}), 500
     
     return jsonify({
-        "message": f"Auto-assigned {assigned_count} bookings, cancelled {cancelled_count} expired bookings",
-        "assigned_count": assigned_count,
-        "cancelled_count": cancelled_count
+        "message": f"Auto-assigned {stats['assigned']} bookings, cancelled {stats['cancelled']} expired bookings",
+        "assigned_count": stats["assigned"],
+        "cancelled_count": stats["cancelled"]
     })
 
 # Driver Authentication APIs
@@ -932,6 +1098,8 @@ def driver_login():
 @app.route('/driver/location', methods=['POST'])
 def update_driver_location():
     from .models import Driver, Booking
+    from . import cadence, fleet_table, geofence, liveness
+    from sqlalchemy import update
     from flask_jwt_extended import get_jwt_identity, get_jwt, verify_jwt_in_request
     from datetime import datetime
     
@@ -965,30 +1133,99 @@ def update_driver_location():
         if not driver:
             return jsonify({"error": "Driver not found"}), 404
         
-        driver.current_latitude = latitude
-        driver.current_longitude = longitude
-        
-        # Update ambulance location in active bookings
-        active_booking = Booking.query.filter_by(
-            ambulance_id=current_driver_id
-        ).filter(Booking.status.in_(['Assigned', 'On Route', 'Arrived'])).first()
+        # The fleet table shares the fix with every worker now and its flusher
+        # writes drivers.current_*/updated_at; the database is the fallback
+        fixed_at = datetime.utcnow()
+        if fleet_table.record_position(current_driver_id, latitude, longitude, fixed_at, driver.status):
+            liveness.record_fix(driver, fixed_at, persist=False)
+        else:
+            driver.current_latitude = latitude
+            driver.current_longitude = longitude
+            liveness.record_fix(driver, fixed_at)
+        liveness.sweep(db.session)
+        
+        # Update ambulance location in active bookings. updated_at is set to
+        # itself so position pings don't show up as changes in the
+        # /driver/bookings?since= delta feed.
+        active_filter = (Booking.ambulance_id == current_driver_id, Booking.status.in_(['Assigned', 'On Route', 'Arrived']))
+        location_update = update(Booking).where(*active_filter).values(
+            ambulance_latitude=latitude,
+            ambulance_longitude=longitude,
+            ambulance_location_updated_at=fixed_at,
+            updated_at=Booking.updated_at
+        ).execution_options(synchronize_session=False)
+        fence_columns = (Booking.id, Booking.status, Booking.severity, Booking.pickup_latitude, Booking.pickup_longitude,
+                         Booking.hospital_id, Booking.assigned_at)
+        if db.engine.dialect.update_returning:
+            active_bookings = db.session.execute(location_update.returning(*fence_columns)).all()
+        else:
+            db.session.execute(location_update)
+            active_bookings = db.session.query(*fence_columns).filter(*active_filter).all()
         
-        if active_booking:
-            active_booking.ambulance_latitude = latitude
-            active_booking.ambulance_longitude = longitude
-            active_booking.ambulance_location_updated_at = datetime.utcnow()
+        # Auto-advance the booking in hand when the fix enters its pickup or hospital fence
+        events = []
+        current = geofence.current_booking(active_bookings) if active_bookings else None
+        if current is None:
+            geofence.forget(current_driver_id)
+        elif app.config.get('GEOFENCE_ENABLED', False):
+            events = geofence.evaluate(current_driver_id, current, latitude, longitude)
         
         db.session.commit()
         
-        return jsonify({"message": "Location updated successfully"})
+        # Tell the app when to send the next fix, given what it is doing now
+        driver_status = driver.status
+        booking_status, severity = (current.status, current.severity) if current else (None, None)
+        for event in events:
+            booking_status, severity = event["status"], event.get("severity", severity)
+        if booking_status == 'Completed':
+            booking_status, driver_status = None, 'Available'
+        next_ping = cadence.next_ping(
+            driver_status,
+            booking_status,
+            severity,
+            cadence.observed_speed_kmh(current_driver_id, latitude, longitude, data.get('speed'))
+        )
+        
+        return jsonify({"message": "Location updated successfully", "events": events, "next_ping": next_ping})
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": "Location update failed"}), 500
 
+serialize_driver_booking = make_serializer(
+    'id', 'booking_code', 'booking_type', 'emergency_type', 'severity',
+    'pickup_location', 'pickup_latitude', 'pickup_longitude', 'destination', 'status',
+    'requested_at', 'assigned_at', 'auto_assigned', 'hospital_id'
+)
+
+ACTIVE_DRIVER_STATUSES = ('Assigned', 'On Route', 'Arrived')
+
+def _format_driver_booking(booking):
+    hospital = booking.hospital
+    user = booking.user
+    
+    item = serialize_driver_booking(booking)
+    item.update({
+        "patient_name": booking.patient_name or (user.name if user else 'Unknown Patient'),
+        "patient_phone": booking.patient_phone or (user.phone_number if user else 'Unknown'),
+        "user_name": user.name if user else 'Unknown User',
+        "user_phone": user.phone_number if user else 'Unknown',
+        "user_email": user.email if user else None,
+        "hospital_name": hospital.name if hospital else None,
+        "hospital_address": hospital.address if hospital else None,
+        "hospital_contact": hospital.contact_number if hospital else None,
+        "hospital_latitude": hospital.latitude if hospital else None,
+        "hospital_longitude": hospital.longitude if hospital else None
+    })
+    return item
+
 @app.route('/driver/bookings')
 def get_driver_bookings():
-    from .models import Booking, Hospital
+    from .models import Booking
+    from .pagination import InvalidCursor, decode_cursor, encode_cursor
     from flask_jwt_extended import get_jwt_identity, get_jwt, verify_jwt_in_request
+    from sqlalchemy import and_, or_
+    from sqlalchemy.orm import joinedload
+    from datetime import datetime, timedelta
     
     try:
         verify_jwt_in_request()
@@ -1001,48 +1238,68 @@ def get_driver_bookings():
     except Exception:
         return jsonify({"error": "Invalid or missing token"}), 401
     
-    bookings = Booking.query.filter_by(ambulance_id=current_driver_id).filter(
-        Booking.status.in_(['Assigned', 'On Route', 'Arrived'])
-    ).all()
-    
-    result = []
-    for booking in bookings:
-        hospital = Hospital.query.get(booking.hospital_id)
-        user = booking.user if booking.user else None
-        
-        result.append({
-            "id": booking.id,
-            "booking_code": booking.booking_code,
-            "booking_type": booking.booking_type,
-            "emergency_type": booking.emergency_type,
-            "severity": booking.severity,
-            "patient_name": booking.patient_name or (user.name if user else 'Unknown Patient'),
-            "patient_phone": booking.patient_phone or (user.phone_number if user else 'Unknown'),
-            "user_name": user.name if user else 'Unknown User',
-            "user_phone": user.phone_number if user else 'Unknown',
-            "user_email": user.email if user else None,
-            "pickup_location": booking.pickup_location,
-            "pickup_latitude": booking.pickup_latitude,
-            "pickup_longitude": booking.pickup_longitude,
-            "destination": booking.destination,
-            "status": booking.status,
-            "requested_at": booking.requested_at.isoformat(),
-            "assigned_at": booking.assigned_at.isoformat() if booking.assigned_at else None,
-            "auto_assigned": booking.auto_assigned,
-            "hospital_id": booking.hospital_id,
-            "hospital_name": hospital.name if hospital else None,
-            "hospital_address": hospital.address if hospital else None,
-            "hospital_contact": hospital.contact_number if hospital else None,
-            "hospital_latitude": hospital.latitude if hospital else None,
-            "hospital_longitude": hospital.longitude if hospital else None
-        })
+    # Hospital and user come back in the same query instead of one lookup per booking
+    query = Booking.query.options(joinedload(Booking.hospital), joinedload(Booking.user))
+    mine = query.filter(Booking.ambulance_id == current_driver_id)
+    
+    since = request.args.get('since')
+    if since is None:
+        return jsonify([_format_driver_booking(b) for b in mine.filter(Booking.status.in_(ACTIVE_DRIVER_STATUSES)).all()])
+    
+    # Delta mode: ?since= (empty) returns the active set plus a cursor; ?since=<cursor>
+    # returns bookings whose (updated_at, id) moved past it, on the (ambulance_id,
+    # updated_at) and (previous_ambulance_id, updated_at) indexes. Bookings that
+    # left the active set or were moved to another driver are listed under
+    # "removed" so the app can drop them.
+    #
+    # updated_at is stamped by the app before commit, so a transaction can
+    # commit after a newer one was already served. The cursor handed out never
+    # passes now - DRIVER_DELTA_OVERLAP_SECONDS, so such late commits are still
+    # ahead of it; changes inside that window may be delivered more than once
+    # and the app applies them idempotently.
+    def is_removed(b):
+        return b.ambulance_id != current_driver_id or b.status not in ACTIVE_DRIVER_STATUSES
+    
+    def next_cursor(latest, current=None):
+        horizon = (datetime.utcnow() - timedelta(seconds=app.config.get('DRIVER_DELTA_OVERLAP_SECONDS', 10)), 0)
+        position = min(latest, horizon)
+        if current is not None:
+            position = max(position, current)
+        return {"updated_at": position[0].isoformat(), "id": position[1]}
+    
+    involved = or_(Booking.ambulance_id == current_driver_id, Booking.previous_ambulance_id == current_driver_id)
+    if since:
+        try:
+            values = decode_cursor(since)
+            after = datetime.fromisoformat(values['updated_at'])
+        except (InvalidCursor, KeyError, TypeError, ValueError):
+            return jsonify({"error": "Invalid cursor"}), 400
+        changed = query.filter(involved, or_(
+            Booking.updated_at > after,
+            and_(Booking.updated_at == after, Booking.id > values['id'])
+        )).order_by(Booking.updated_at, Booking.id).all()
+        if changed:
+            values = next_cursor((changed[-1].updated_at, changed[-1].id), (after, values['id']))
+    else:
+        changed = mine.filter(Booking.status.in_(ACTIVE_DRIVER_STATUSES)).all()
+        latest = Booking.query.with_entities(Booking.updated_at, Booking.id).filter(involved).order_by(
+            Booking.updated_at.desc(), Booking.id.desc()
+        ).first()
+        values = next_cursor(tuple(latest)) if latest else None
     
-    return jsonify(result)
+    return jsonify({
+        "bookings": [_format_driver_booking(b) for b in changed if not is_removed(b)],
+        "removed": [b.id for b in changed if is_removed(b)],
+        "cursor": encode_cursor(values) if values else ""
+    })
 
 @app.route('/api/bookings/<int:booking_id>/driver-location')
 def get_driver_location(booking_id):
-    from .models import Booking, Driver
+    from .booking_view import booking_view
+    from .eta import eta_seconds
+    from .fleet_table import ambulance_position
     from flask_jwt_extended import get_jwt_identity, get_jwt, verify_jwt_in_request
+    from datetime import datetime
     
     try:
         verify_jwt_in_request()
@@ -1055,34 +1312,34 @@ def get_driver_location(booking_id):
     except Exception:
         return jsonify({"error": "Invalid or missing token"}), 401
     
-    booking = Booking.query.filter_by(id=booking_id, user_id=current_user_id).first()
-    if not booking:
+    booking = booking_view(booking_id)
+    if not booking or booking.user_id != current_user_id:
         return jsonify({"error": "Booking not found or unauthorized"}), 404
     
     if not booking.ambulance_id:
         return jsonify({"error": "No driver assigned yet"}), 404
     
-    driver = Driver.query.get(booking.ambulance_id)
-    if not driver:
+    if booking.driver_name is None:
         return jsonify({"error": "Driver not found"}), 404
     
-    # Get location from booking table for better accuracy
-    if booking.ambulance_latitude and booking.ambulance_longitude:
-        return jsonify({
-            "driver_latitude": booking.ambulance_latitude,
-            "driver_longitude": booking.ambulance_longitude,
-            "last_updated": booking.ambulance_location_updated_at.isoformat() if booking.ambulance_location_updated_at else datetime.utcnow().isoformat()
-        })
-    else:
-        return jsonify({
-            "driver_latitude": driver.current_latitude,
-            "driver_longitude": driver.current_longitude,
-            "last_updated": datetime.utcnow().isoformat()
-        })
+    # Live fix from the fleet table while on the job, then the booking's, then the driver's
+    latitude, longitude, fixed_at = ambulance_position(booking)
+    result = {
+        "driver_latitude": latitude,
+        "driver_longitude": longitude,
+        "last_updated": (fixed_at or datetime.utcnow()).isoformat()
+    }
+    
+    # Seconds until the ambulance reaches the pickup, while it is still on its way
+    result["eta_seconds"] = eta_seconds(
+        result["driver_latitude"], result["driver_longitude"], booking.pickup_latitude, booking.pickup_longitude
+    ) if booking.status in ('Assigned', 'On Route') else None
+    return jsonify(result)
 
 @app.route('/booking/status', methods=['POST'])
 def update_booking_status():
     from .models import Booking, Driver
+    from .scheduler import redispatch_driver
     from datetime import datetime
     from flask_jwt_extended import get_jwt_identity, get_jwt, verify_jwt_in_request
     
@@ -1121,16 +1378,21 @@ def update_booking_status():
         
         booking.status = status
         
+        result = {"message": "Booking status updated successfully"}
         if status == 'Completed':
             booking.completed_at = datetime.utcnow()
             if booking.ambulance_id:
                 driver = Driver.query.get(booking.ambulance_id)
                 if driver:
                     driver.status = 'Available'
+                    next_booking = redispatch_driver(db.session, driver)
+                    if next_booking:
+                        result["next_booking"] = {"id": next_booking.id, "booking_code": next_booking.booking_code,
+                                                  "severity": next_booking.severity}
         
         db.session.commit()
         
-        return jsonify({"message": "Booking status updated successfully"})
+        return jsonify(result)
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": "Status update failed"}), 500
@@ -1138,6 +1400,8 @@ def update_booking_status():
 @app.route('/driver/availability', methods=['POST'])
 def set_driver_availability():
     from .models import Driver
+    from . import liveness
+    from datetime import datetime
     from flask_jwt_extended import get_jwt_identity, get_jwt, verify_jwt_in_request
     
     try:
@@ -1163,6 +1427,8 @@ def set_driver_availability():
     
     driver.is_available = is_available
     driver.status = 'Available' if is_available else 'Offline'
+    if is_available:
+        liveness.record_fix(driver, datetime.utcnow())
     db.session.commit()
     
     return jsonify({"message": "Availability updated successfully"})
@@ -1195,25 +1461,54 @@ def get_user(user_id):
     })
 
 # Hospital and Driver routes
+serialize_hospital = make_serializer(
+    'id', 'name', 'address', 'contact_number', 'latitude', 'longitude',
+    'type', 'emergency_services', 'ambulance_count'
+)
+
 @app.route('/api/hospitals')
 def get_hospitals():
+    from .hospital_cache import get_catalogue, cache_headers
+    from flask import Response
+    
     from .models import Hospital
-    hospitals = Hospital.query.all()
-    return jsonify([{
-        "id": h.id,
-        "name": h.name,
-        "address": h.address,
-        "contact_number": h.contact_number,
-        "latitude": h.latitude,
-        "longitude": h.longitude,
-        "type": h.type,
-        "emergency_services": h.emergency_services,
-        "ambulance_count": h.ambulance_count
-    } for h in hospitals])
+    from .pagination import InvalidCursor, page_args, paginate_keyset, stream_ndjson, wants_ndjson
+    
+    if wants_ndjson(request.args):
+        return stream_ndjson(Hospital.query.order_by(Hospital.id), serialize_hospital, filename='hospitals.ndjson')
+    
+    # Paging is opt-in here: the unpaged catalogue is small and served from cache
+    if 'limit' in request.args or 'cursor' in request.args:
+        limit, cursor, order = page_args(request.args)
+        try:
+            hospitals, next_cursor = paginate_keyset(Hospital.query, Hospital, limit, cursor, order)
+        except InvalidCursor as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify({
+            "hospitals": [serialize_hospital(h) for h in hospitals],
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None
+        })
+    
+    rows, body, etag = get_catalogue()
+    return cache_headers(Response(body, mimetype='application/json'), etag, request)
+
+def haversine_distance(lat1, lon1, lat2, lon2):
+    import math
+    
+    R = 6371  # Earth's radius in kilometers
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    a = (math.sin(dlat/2) * math.sin(dlat/2) + 
+         math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * 
+         math.sin(dlon/2) * math.sin(dlon/2))
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+    return R * c
 
 @app.route('/api/hospitals/nearby')
 def get_nearby_hospitals():
-    from .models import Hospital
+    from .hospital_cache import get_catalogue, cache_headers
+    import hashlib
     
     try:
         lat = request.args.get('lat', type=float)
@@ -1230,44 +1525,36 @@ def get_nearby_hospitals():
         if radius <= 0 or radius > 100:
             return jsonify({"error": "Radius must be between 1 and 100 km"}), 400
         
-        hospitals = Hospital.query.all()
-        nearby = []
+        hospitals, _, catalogue_etag = get_catalogue()
         
+        # Same catalogue + same search params => same body, so revalidation can skip the distance scan
+        etag = hashlib.sha1(f"{catalogue_etag}:{lat}:{lng}:{radius}".encode()).hexdigest()
+        if etag in request.if_none_match:
+            return cache_headers(jsonify({}), etag, request)
+        
+        nearby = []
         for h in hospitals:
-            if h.latitude is None or h.longitude is None:
+            if h["latitude"] is None or h["longitude"] is None:
                 continue
-                
-            # Haversine formula for accurate distance calculation
-            import math
             
-            def haversine_distance(lat1, lon1, lat2, lon2):
-                R = 6371  # Earth's radius in kilometers
-                dlat = math.radians(lat2 - lat1)
-                dlon = math.radians(lon2 - lon1)
-                a = (math.sin(dlat/2) * math.sin(dlat/2) + 
-                     math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * 
-                     math.sin(dlon/2) * math.sin(dlon/2))
-                c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-                return R * c
-            
-            distance = haversine_distance(lat, lng, h.latitude, h.longitude)
+            # Haversine formula for accurate distance calculation
+            distance = haversine_distance(lat, lng, h["latitude"], h["longitude"])
             if distance <= radius:
                 nearby.append({
-                    "id": h.id,
-                    "name": h.name,
-                    "address": h.address,
-                    "latitude": h.latitude,
-                    "longitude": h.longitude,
-                    "type": h.type,
-                    "emergency_services": h.emergency_services,
+                    "id": h["id"],
+                    "name": h["name"],
+                    "address": h["address"],
+                    "latitude": h["latitude"],
+                    "longitude": h["longitude"],
+                    "type": h["type"],
+                    "emergency_services": h["emergency_services"],
                     "distance": round(distance, 2),
-                    "contact_number": h.contact_number
+                    "contact_number": h["contact_number"]
                 })
         
-        # Sort by distance using numeric value directly
-        nearby.sort(key=lambda x: x.get('distance', float('inf')) if isinstance(x.get('distance'), (int, float)) else float('inf'))
+        nearby.sort(key=lambda x: x["distance"])
         
-        return jsonify({
+        return cache_headers(jsonify({
             "hospitals": nearby,
             "total": len(nearby),
             "search_params": {
@@ -1275,7 +1562,7 @@ def get_nearby_hospitals():
                 "longitude": lng,
                 "radius_km": radius
             }
-        })
+        }), etag, request)
     except Exception as e:
         return jsonify({"error": "Failed to fetch nearby hospitals"}), 500
 
@@ -1290,56 +1577,62 @@ def seed_hospitals():
 
 @app.route('/api/drivers')
 def get_all_drivers():
-    from .models import Driver, Hospital
+    from .models import Driver
+    from .driver_listing import driver_listing_query, parse_listing_filters, serialize_driver_row
+    from .pagination import InvalidCursor, page_args, paginate_keyset, stream_ndjson, wants_ndjson
+    
+    try:
+        filters = parse_listing_filters(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
-    drivers = db.session.query(Driver, Hospital).join(Hospital, Driver.hospital_id == Hospital.id).all()
+    query = driver_listing_query(**filters)
+    
+    if wants_ndjson(request.args):
+        return stream_ndjson(query.order_by(Driver.id), serialize_driver_row, filename='drivers.ndjson')
+    
+    limit, cursor, order = page_args(request.args)
+    try:
+        drivers, next_cursor = paginate_keyset(query, Driver, limit, cursor, order)
+    except InvalidCursor as e:
+        return jsonify({"error": str(e)}), 400
     
     return jsonify({
-        "total_drivers": len(drivers),
-        "drivers": [{
-            "id": driver.id,
-            "name": driver.name,
-            "phone": driver.phone_number,
-            "vehicle_number": driver.vehicle_number,
-            "status": driver.status,
-            "location": driver.current_location,
-            "login_id": driver.driver_id,
-            "hospital": {
-                "id": hospital.id,
-                "name": hospital.name,
-                "address": hospital.address,
-                "contact": hospital.contact_number
-            }
-        } for driver, hospital in drivers]
+        "count": len(drivers),  # rows on this page, not the table total
+        "drivers": [serialize_driver_row(row) for row in drivers],
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None
     })
 
 # Root endpoint with API documentation
 @app.route('/')
 def api_list():
-    try:
-        from .models import Hospital, Driver, Booking
-        hospital_count = Hospital.query.count()
-        driver_count = Driver.query.count()
-        booking_count = Booking.query.count()
-    except Exception as e:
-        hospital_count = 0
-        driver_count = 0
-        booking_count = 0
-        
-    return {
-        "message": "Ambulance Booking API - All Routes",
-        "statistics": {
-            "total_hospitals": hospital_count,
-            "total_drivers": driver_count,
-            "total_bookings": booking_count
-        },
+    from .stats import get_table_counts, stats_requested
+    
+    result = {
+        "message": "Ambulance Booking API - All Routes"
+    }
+    
+    if stats_requested(request.args):
+        try:
+            counts = get_table_counts()["counts"]
+        except Exception as e:
+            counts = {"hospitals": 0, "drivers": 0, "bookings": 0}
+        
+        result["statistics"] = {
+            "total_hospitals": counts["hospitals"],
+            "total_drivers": counts["drivers"],
+            "total_bookings": counts["bookings"]
+        }
+    
+    result.update({
         "endpoints": {
             "Health & System": {
-                "GET /api/health": "Check server and database status",
+                "GET /api/health": "Check server and database status (?stats=1 for table counts)",
                 "POST /api/clear-bookings": "Clear all bookings and reset drivers"
             },
             "Hospital Management": {
-                "GET /api/hospitals": "Get all hospitals",
+                "GET /api/hospitals": "Get all hospitals (optional: limit, cursor, order; format=ndjson to export)",
                 "GET /api/hospitals/nearby": "Get nearby hospitals (params: lat, lng, radius)",
                 "POST /api/hospitals/seed": "Seed sample hospitals",
                 "POST /api/hospital/login": "Hospital dashboard login",
@@ -1367,6 +1660,7 @@ def api_list():
                 "GET /api/bookings/<id>/status": "Get booking status (JWT required)",
                 "POST /api/bookings/<id>/assign": "Manually assign ambulance",
                 "POST /api/bookings/<id>/auto-assign": "Auto-assign available ambulance",
+                "POST /api/incidents": "Create linked bookings for a multi-patient incident",
                 "POST /api/bookings/<id>/cancel": "Cancel booking (user)",
                 "POST /api/hospital/<id>/bookings/<id>/cancel": "Cancel booking (hospital)",
                 "GET /api/user/ongoing-booking": "Check user's ongoing booking",
@@ -1382,7 +1676,7 @@ def api_list():
                 "GET /dashboard/login": "Hospital login page"
             },
             "Driver Routes": {
-                "GET /api/drivers": "Get all drivers from all hospitals"
+                "GET /api/drivers": "Get drivers from all hospitals, paged (params: status, hospital_id, bbox=south,west,north,east, limit, cursor, order; format=ndjson to export)"
             }
         },
         "authentication": {
@@ -1408,10 +1702,13 @@ def api_list():
             "JWT": "Tokens expire in 30 days",
             "Phone_Format": "Accepts international formats, cleaned automatically",
             "Driver_Login": "Uses login_id/password authentication only",
-            "Real_Time": "Uses polling for real-time updates"
+            "Real_Time": "Uses polling for real-time updates",
+            "Statistics": "Pass ?stats=1 to / or /api/health for cached table counts"
         }
-    }
+    })
+    
+    return result
 
 if __name__ == '__main__':
-    start_scheduler()
+    # Dispatch sweeps run in a separate process: `flask --app api.main dispatch run`
     app.run(debug=True)
\ No newline at end of file
@@ -1,8 +1,9 @@
 from datetime import datetime
+from sqlalchemy import event
 from .extensions import db
 
 class TimestampMixin:
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
 class User(db.Model, TimestampMixin):
@@ -40,11 +41,11 @@ class Driver(db.Model, TimestampMixin):
     phone_number = db.Column(db.String(32), nullable=False)
     license_number = db.Column(db.String(32), unique=True, nullable=False)
     vehicle_number = db.Column(db.String(32), unique=True, nullable=False)
-    status = db.Column(db.String(20), default='Available', nullable=False)  # Available/Busy/Offline
+    status = db.Column(db.String(20), default='Available', nullable=False, index=True)  # Available/Busy/Offline
     current_latitude = db.Column(db.Float, nullable=True)
     current_longitude = db.Column(db.Float, nullable=True)
     is_available = db.Column(db.Boolean, default=True, nullable=False)
-    hospital_id = db.Column(db.Integer, db.ForeignKey('hospitals.id'), nullable=False)
+    hospital_id = db.Column(db.Integer, db.ForeignKey('hospitals.id'), nullable=False, index=True)
     driver_id = db.Column(db.String(50), unique=True, nullable=True)  # Auto-generated login ID
     password = db.Column(db.String(255), default='driver123', nullable=True)  # Default password
     
@@ -73,10 +74,26 @@ class Booking(db.Model, TimestampMixin):
     assigned_at = db.Column(db.DateTime, nullable=True)
     completed_at = db.Column(db.DateTime, nullable=True)
     auto_assigned = db.Column(db.Boolean, default=False, nullable=False)
+    incident_code = db.Column(db.String(12), nullable=True, index=True)  # Links bookings from one mass-casualty incident
     ambulance_latitude = db.Column(db.Float, nullable=True)
     ambulance_longitude = db.Column(db.Float, nullable=True)
     ambulance_location_updated_at = db.Column(db.DateTime, nullable=True)
+    previous_ambulance_id = db.Column(db.Integer, nullable=True)  # Last driver taken off this booking, for their delta feed
     
     user = db.relationship('User', back_populates='bookings')
     hospital = db.relationship('Hospital')
     ambulance = db.relationship('Driver', back_populates='bookings')
+
+    __table_args__ = (
+        # Backs the dispatch sweep's Pending-and-older-than scans
+        db.Index('ix_bookings_status_requested_at', 'status', 'requested_at'),
+        # Backs the driver app's /driver/bookings?since= delta polls
+        db.Index('ix_bookings_ambulance_id_updated_at', 'ambulance_id', 'updated_at'),
+        db.Index('ix_bookings_previous_ambulance_id_updated_at', 'previous_ambulance_id', 'updated_at'),
+    )
+
+@event.listens_for(Booking.ambulance_id, 'set')
+def _remember_previous_ambulance(target, value, oldvalue, initiator):
+    """A booking moved to another driver (or unassigned) stays visible to the old one as removed"""
+    if isinstance(oldvalue, int) and oldvalue != value:
+        target.previous_ambulance_id = oldvalue
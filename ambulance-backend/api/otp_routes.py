@@ -1,6 +1,9 @@
+import logging
 from flask import Blueprint, request, jsonify
 from werkzeug.exceptions import BadRequest
 
+logger = logging.getLogger(__name__)
+
 otp_bp = Blueprint('otp', __name__)
 
 FIXED_OTP = "1234"
@@ -18,7 +21,7 @@ def send_otp_helper(phone_number):
         if not clean_phone.isdigit() or len(clean_phone) < 10:
             return {'error': 'Invalid phone number format'}, 400
         
-        print(f"Generated OTP for {phone_number}: {FIXED_OTP}")
+        logger.info("OTP sent", extra={"key": "otp.sent", "phone_suffix": clean_phone[-4:]})
         return {'message': 'OTP sent successfully'}, 200
     except Exception as e:
         return {'error': f'Server error: {str(e)}'}, 500
@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+# Seconds of waiting each class is treated as already having: a Low booking
+# that has waited 75s longer than a Critical one ranks level with it, so
+# nothing starves before the 2-minute auto-cancel
+SEVERITY_HEAD_START = {'Critical': 75, 'High': 55, 'Medium': 30, 'Low': 0}
+BOOKING_TYPE_HEAD_START = {'Emergency': 15, 'Accident': 15, 'Normal': 0}
+DEFAULT_SEVERITY = 'Medium'
+
+def head_start(severity, booking_type):
+    return (
+        SEVERITY_HEAD_START.get(severity, SEVERITY_HEAD_START[DEFAULT_SEVERITY])
+        + BOOKING_TYPE_HEAD_START.get(booking_type, 0)
+    )
+
+def priority_key(severity, booking_type, requested_at):
+    """Sort key for the dispatch queue: severity first, then wait, with aging.
+
+    Priority is head start + seconds waited. Every booking ages at the same
+    rate, so the order between two bookings never changes over time and
+    the key reduces to requested_at moved back by the head start. Ties go
+    to the more severe class, then the earlier request.
+    """
+    seconds = head_start(severity, booking_type)
+    return (requested_at - timedelta(seconds=seconds), -seconds, requested_at)
+
+def prioritize(bookings):
+    """Order bookings (or rows with severity/booking_type/requested_at) by dispatch priority"""
+    return sorted(bookings, key=lambda b: priority_key(b.severity, b.booking_type, b.requested_at))
@@ -0,0 +1,246 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from flask import Blueprint, Response, current_app, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+profiler_bp = Blueprint('profiler', __name__, url_prefix='/api/admin/profiler')
+
+MAX_STACK_DEPTH = 128
+MAX_SQL_PER_REQUEST = 200
+
+class ProfiledRequest:
+    __slots__ = ('endpoint', 'method', 'path', 'start', 'stacks', 'sql', 'cursor_start')
+
+    def __init__(self, endpoint, method, path):
+        self.endpoint = endpoint
+        self.method = method
+        self.path = path
+        self.start = time.perf_counter()
+        self.stacks = Counter()
+        self.sql = []
+        self.cursor_start = None
+
+class Capture:
+    """Collapsed stacks for one endpoint, merged from every request in a time window"""
+
+    def __init__(self, endpoint, seconds):
+        self.endpoint = endpoint
+        self.started_at = time.time()
+        self.until = self.started_at + seconds
+        self.requests = 0
+        self.stacks = Counter()
+
+    @property
+    def active(self):
+        return time.time() < self.until
+
+# Runtime-toggled settings; seeded from config by init_profiler and changed via the admin endpoint
+_settings = {'enabled': False, 'threshold_ms': 500, 'interval_ms': 5, 'endpoint': None}
+_active = {}
+_slow = deque(maxlen=50)
+_capture = None
+_lock = threading.Lock()
+_sampler = None
+_local = threading.local()
+
+def _collapse(frame):
+    """Render a frame chain root-first in the collapsed-stack format flamegraph.pl expects"""
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+def _sampling_wanted():
+    return _settings['enabled'] or (_capture is not None and _capture.active)
+
+def _sample_loop():
+    global _sampler
+    while True:
+        time.sleep(_settings['interval_ms'] / 1000.0)
+        with _lock:
+            if not _sampling_wanted():
+                _sampler = None
+                return
+            active = list(_active.items())
+        if not active:
+            continue
+        frames = sys._current_frames()
+        samples = [(record, _collapse(frames[thread_id])) for thread_id, record in active if thread_id in frames]
+        # Stacks are only touched under the lock: the request thread merges them in teardown
+        with _lock:
+            for record, stack in samples:
+                record.stacks[stack] += 1
+
+def _ensure_sampler():
+    global _sampler
+    with _lock:
+        if _sampler is None and _sampling_wanted():
+            _sampler = threading.Thread(target=_sample_loop, name='profiler-sampler', daemon=True)
+            _sampler.start()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    record = getattr(_local, 'record', None)
+    if record is not None:
+        record.cursor_start = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    record = getattr(_local, 'record', None)
+    if record is None or record.cursor_start is None:
+        return
+    if len(record.sql) < MAX_SQL_PER_REQUEST:
+        record.sql.append((statement, (time.perf_counter() - record.cursor_start) * 1000))
+    record.cursor_start = None
+
+def _start_request():
+    if not _settings['enabled'] and _capture is None:
+        return
+    endpoint = request.endpoint
+    capture = _capture
+    in_capture = capture is not None and capture.active and capture.endpoint == endpoint
+    if not in_capture and not (_settings['enabled'] and _settings['endpoint'] in (None, endpoint)):
+        return
+    record = ProfiledRequest(endpoint, request.method, request.path)
+    _local.record = record
+    with _lock:
+        _active[threading.get_ident()] = record
+
+def _finish_request(exc):
+    record = getattr(_local, 'record', None)
+    if record is None:
+        return
+    _local.record = None
+    with _lock:
+        _active.pop(threading.get_ident(), None)
+        # The sampler may still hold this record from its last pass; take the stacks it writes to
+        stacks, record.stacks = record.stacks, Counter()
+
+    duration_ms = (time.perf_counter() - record.start) * 1000
+    capture = _capture
+    if capture is not None and capture.endpoint == record.endpoint and capture.active:
+        with _lock:
+            capture.requests += 1
+            capture.stacks.update(stacks)
+
+    if _settings['enabled'] and duration_ms >= _settings['threshold_ms']:
+        _slow.append({
+            "endpoint": record.endpoint,
+            "method": record.method,
+            "path": record.path,
+            "duration_ms": round(duration_ms, 1),
+            "recorded_at": time.time(),
+            "sql_ms": round(sum(ms for _, ms in record.sql), 1),
+            "sql": [{"statement": statement, "ms": round(ms, 2)} for statement, ms in record.sql],
+            "stacks": [f"{stack} {count}" for stack, count in stacks.most_common()]
+        })
+
+def _authorized():
+    admin_token = os.getenv('ADMIN_CLEAR_TOKEN', 'admin-clear-token')
+    return request.headers.get('Authorization') == f'Bearer {admin_token}'
+
+def _status():
+    capture = _capture
+    return {
+        **_settings,
+        "active_requests": len(_active),
+        "slow_requests": len(_slow),
+        "capture": {
+            "endpoint": capture.endpoint,
+            "active": capture.active,
+            "seconds_left": max(0, round(capture.until - time.time(), 1)),
+            "requests": capture.requests
+        } if capture else None
+    }
+
+@profiler_bp.route('', methods=['GET', 'POST'])
+def profiler_settings():
+    """GET returns the profiler state; POST updates enabled/threshold_ms/interval_ms/endpoint"""
+    if not _authorized():
+        return jsonify({"error": "Unauthorized"}), 401
+
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        try:
+            if 'threshold_ms' in data:
+                _settings['threshold_ms'] = max(0.0, float(data['threshold_ms']))
+            if 'interval_ms' in data:
+                _settings['interval_ms'] = min(1000.0, max(1.0, float(data['interval_ms'])))
+        except (TypeError, ValueError):
+            return jsonify({"error": "threshold_ms and interval_ms must be numbers"}), 400
+        if 'endpoint' in data:
+            endpoint = data['endpoint'] or None
+            if endpoint and endpoint not in current_app.view_functions:
+                return jsonify({"error": f"Unknown endpoint: {endpoint}"}), 400
+            _settings['endpoint'] = endpoint
+        if 'enabled' in data:
+            _settings['enabled'] = bool(data['enabled'])
+            if not _settings['enabled']:
+                _slow.clear()
+        _ensure_sampler()
+
+    return jsonify(_status())
+
+@profiler_bp.route('/slow')
+def slow_requests():
+    """Most recent requests over the threshold, newest first, with SQL timings and sampled stacks"""
+    if not _authorized():
+        return jsonify({"error": "Unauthorized"}), 401
+    endpoint = request.args.get('endpoint')
+    entries = [entry for entry in reversed(_slow) if not endpoint or entry["endpoint"] == endpoint]
+    return jsonify({"slow_requests": entries, "threshold_ms": _settings['threshold_ms']})
+
+@profiler_bp.route('/capture', methods=['GET', 'POST'])
+def capture():
+    """POST {endpoint, seconds} starts a capture window; GET downloads the collapsed stacks"""
+    global _capture
+    if not _authorized():
+        return jsonify({"error": "Unauthorized"}), 401
+
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        endpoint = data.get('endpoint')
+        if not endpoint or endpoint not in current_app.view_functions:
+            return jsonify({"error": "A valid endpoint name is required, e.g. hospital_dashboard_data"}), 400
+        try:
+            seconds = min(600.0, max(1.0, float(data.get('seconds', 60))))
+        except (TypeError, ValueError):
+            return jsonify({"error": "seconds must be a number"}), 400
+        _capture = Capture(endpoint, seconds)
+        _ensure_sampler()
+        return jsonify(_status()), 202
+
+    if _capture is None:
+        return jsonify({"error": "No capture has been started"}), 404
+    with _lock:
+        lines = [f"{stack} {count}" for stack, count in sorted(_capture.stacks.items())]
+    filename = f"{_capture.endpoint}-{int(_capture.started_at)}.collapsed"
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain', headers={
+        'Content-Disposition': f'attachment; filename={filename}',
+        'X-Capture-Requests': str(_capture.requests),
+        'X-Capture-Active': str(_capture.active).lower()
+    })
+
+def init_profiler(app):
+    """Register request hooks and admin routes; sampling stays off until enabled.
+
+    Settings are per process: with several workers, each one has to be
+    toggled (or started with PROFILER_ENABLED) separately.
+    """
+    _settings['enabled'] = app.config.get('PROFILER_ENABLED', False)
+    _settings['threshold_ms'] = app.config.get('PROFILER_THRESHOLD_MS', 500)
+    _settings['interval_ms'] = app.config.get('PROFILER_INTERVAL_MS', 5)
+
+    app.before_request(_start_request)
+    app.teardown_request(_finish_request)
+    app.register_blueprint(profiler_bp)
+
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    _ensure_sampler()
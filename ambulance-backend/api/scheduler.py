@@ -1,65 +1,234 @@
-import threading
+import logging
 import time
+from collections import defaultdict
 from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
 from .extensions import db
-from .models import Booking
+from .models import Booking, Driver
+from .eta import dispatch_cost, eta_seconds
+from .priority import prioritize
+from .hospital_selection import note_free_change
+from . import liveness
 
-def auto_assign_and_cancel_bookings():
-    """Background task to auto-assign after 30 seconds and cancel after 2 minutes"""
-    while True:
+logger = logging.getLogger(__name__)
+
+ASSIGN_AFTER = timedelta(seconds=30)
+CANCEL_AFTER = timedelta(minutes=2)
+
+def _pending_queue(session, cutoff, scan_limit):
+    """Stale Pending bookings (oldest scan_limit) in dispatch priority order"""
+    with session.begin():
+        candidates = session.execute(
+            select(Booking.id, Booking.severity, Booking.booking_type, Booking.requested_at)
+            .where(Booking.status == 'Pending', Booking.requested_at < cutoff)
+            .order_by(Booking.requested_at)
+            .limit(scan_limit)
+        ).all()
+    return [row.id for row in prioritize(candidates)]
+
+def _assign_batch(session, booking_ids, stats):
+    """Assign one batch of bookings, highest priority first, in a single short transaction"""
+    with session.begin():
+        bookings = {b.id: b for b in session.execute(
+            select(Booking)
+            .where(Booking.id.in_(booking_ids), Booking.status == 'Pending')
+            .with_for_update(skip_locked=True)
+        ).scalars()}
+        if not bookings:
+            return
+
+        # One locked lookup for every hospital in the batch instead of one query per booking
+        drivers_by_hospital = defaultdict(list)
+        for driver in session.execute(
+            select(Driver)
+            .where(Driver.hospital_id.in_({b.hospital_id for b in bookings.values()}), Driver.status == 'Available')
+            .order_by(Driver.id)
+            .with_for_update(skip_locked=True)
+        ).scalars():
+            drivers_by_hospital[driver.hospital_id].append(driver)
+
+        now = datetime.utcnow()
+        for booking_id in booking_ids:
+            booking = bookings.get(booking_id)
+            drivers = drivers_by_hospital.get(booking.hospital_id) if booking else None
+            if not drivers:
+                continue
+            # Closest free ambulance by estimated drive time to the pickup
+            driver = min(drivers, key=lambda d: dispatch_cost(d, booking))
+            drivers.remove(driver)
+            booking.ambulance_id = driver.id
+            booking.status = 'Assigned'
+            booking.assigned_at = now
+            booking.auto_assigned = True
+            driver.status = 'Busy'
+            stats["assigned"] += 1
+            logger.debug("Auto-assigned %s booking %s to driver %s", booking.severity, booking.id, driver.id)
+
+def _cancel_batch(session, cutoff, batch_size, stats):
+    """Auto-cancel one batch of expired Pending bookings; returns the number cancelled"""
+    with session.begin():
+        ids = session.execute(
+            select(Booking.id)
+            .where(Booking.status == 'Pending', Booking.requested_at < cutoff)
+            .order_by(Booking.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).scalars().all()
+        if not ids:
+            return 0
+        result = session.execute(
+            update(Booking)
+            .where(Booking.id.in_(ids), Booking.status == 'Pending')
+            .values(status='Auto-Cancelled', completed_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        stats["cancelled"] += result.rowcount
+        return len(ids)
+
+def fast_dispatch(session, booking, budget_ms=None):
+    """Claim the nearest free ambulance for a new booking inside its create request.
+
+    Tries the hospital's Available drivers cheapest drive time first, each
+    with a conditional UPDATE so a driver claimed concurrently by the sweep
+    or an operator is skipped, until one claim succeeds or budget_ms
+    (FAST_DISPATCH_BUDGET_MS) is spent. On success the booking is marked
+    Assigned in memory; the caller commits. Returns the claimed driver row
+    (id, name, phone_number, vehicle_number, eta) or None, in which case
+    the booking stays Pending for the normal flow.
+    """
+    config = current_app.config
+    budget = (budget_ms if budget_ms is not None else config.get('FAST_DISPATCH_BUDGET_MS', 250)) / 1000.0
+    started = time.perf_counter()
+
+    def out_of_time():
+        if time.perf_counter() - started <= budget:
+            return False
+        logger.info("Fast dispatch ran out of time", extra={"key": "scheduler.fast_dispatch_timeout",
+                                                            "hospital_id": booking.hospital_id})
+        return True
+
+    # The liveness sweep and the candidate query count against the budget too
+    liveness.sweep(session)
+    if out_of_time():
+        return None
+    candidates = session.execute(
+        select(Driver.id, Driver.name, Driver.phone_number, Driver.vehicle_number,
+               Driver.current_latitude, Driver.current_longitude)
+        .where(Driver.hospital_id == booking.hospital_id, Driver.status == 'Available')
+    ).all()
+    for driver in sorted(candidates, key=lambda d: dispatch_cost(d, booking)):
+        if out_of_time():
+            return None
+        claimed = session.execute(
+            update(Driver)
+            .where(Driver.id == driver.id, Driver.status == 'Available')
+            .values(status='Busy')
+            .execution_options(synchronize_session=False, availability_noted=True)
+        ).rowcount
+        if claimed:
+            note_free_change(session, booking.hospital_id, -1)
+            booking.ambulance_id = driver.id
+            booking.status = 'Assigned'
+            booking.assigned_at = datetime.utcnow()
+            booking.auto_assigned = True
+            return driver
+    return None
+
+def redispatch_driver(session, driver):
+    """Offer a just-freed driver to the highest-priority Pending booking at their hospital.
+
+    Runs inside the caller's transaction, after the driver was set back to
+    Available, so during a surge the ambulance goes straight to the next
+    case instead of idling until the next tick. Bookings whose pickup is
+    more than REDISPATCH_MAX_ETA_SECONDS away are left for the sweep.
+    Both claims are conditional UPDATEs, so a concurrent manual assignment
+    or sweep wins. Returns the claimed booking's (id, booking_code,
+    severity) row or None. The caller commits.
+    """
+    config = current_app.config
+    if not config.get('REDISPATCH_ENABLED', True):
+        return None
+    max_eta = config.get('REDISPATCH_MAX_ETA_SECONDS', 1200)
+    candidates = session.execute(
+        select(Booking.id, Booking.booking_code, Booking.severity, Booking.booking_type, Booking.requested_at,
+               Booking.pickup_latitude, Booking.pickup_longitude)
+        .where(Booking.hospital_id == driver.hospital_id, Booking.status == 'Pending')
+        .order_by(Booking.requested_at)
+        .limit(config.get('REDISPATCH_SCAN_LIMIT', 200))
+    ).all()
+
+    for booking in prioritize(candidates):
+        cost = eta_seconds(driver.current_latitude, driver.current_longitude,
+                           booking.pickup_latitude, booking.pickup_longitude)
+        if cost is not None and cost > max_eta:
+            continue
+        claimed = session.execute(
+            update(Driver)
+            .where(Driver.id == driver.id, Driver.status == 'Available')
+            .values(status='Busy')
+            .execution_options(synchronize_session=False, availability_noted=True)
+        ).rowcount
+        if not claimed:
+            return None
+        assigned = session.execute(
+            update(Booking)
+            .where(Booking.id == booking.id, Booking.status == 'Pending')
+            .values(ambulance_id=driver.id, status='Assigned', assigned_at=datetime.utcnow(), auto_assigned=True)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if assigned:
+            note_free_change(session, driver.hospital_id, -1)
+            logger.info("Re-dispatched freed driver", extra={"key": "scheduler.redispatch", "driver_id": driver.id,
+                                                           "booking_id": booking.id, "severity": booking.severity,
+                                                           "eta_seconds": cost})
+            return booking
+        # Someone else took the booking first; give the driver back and try the next one
+        session.execute(
+            update(Driver)
+            .where(Driver.id == driver.id)
+            .values(status='Available')
+            .execution_options(synchronize_session=False, availability_noted=True)
+        )
+    return None
+
+def dispatch_tick(batch_size=None):
+    """One sweep: auto-assign bookings pending for 30 seconds and cancel them after 2 minutes.
+
+    Stale bookings are served in priority order (see api.priority), so Critical
+    cases get first claim on a hospital's free ambulances. Drivers whose GPS
+    has gone quiet are taken out of the pool first (see api.liveness).
+
+    Runs on its own Session bound to the app's engine (an app context is
+    required), one short transaction per batch of at most DISPATCH_BATCH_SIZE
+    rows. Rows locked by another transaction are skipped, not waited on.
+    Returns the tick metrics.
+    """
+    batch_size = batch_size or current_app.config.get('DISPATCH_BATCH_SIZE', 100)
+    stats = {"scanned": 0, "assigned": 0, "cancelled": 0, "offlined": 0, "batches": 0, "errors": 0}
+    started = time.perf_counter()
+    now = datetime.utcnow()
+
+    with Session(db.engine, expire_on_commit=False) as session:
         try:
-            with db.session.begin():
-                from .models import Driver
-                
-                # Auto-assign bookings after 30 seconds
-                assign_cutoff = datetime.utcnow() - timedelta(seconds=30)
-                pending_bookings = Booking.query.filter(
-                    Booking.status == 'Pending',
-                    Booking.requested_at < assign_cutoff
-                ).all()
-                
-                for booking in pending_bookings:
-                    available_driver = Driver.query.filter_by(
-                        hospital_id=booking.hospital_id,
-                        status='Available'
-                    ).first()
-                    
-                    if available_driver:
-                        booking.ambulance_id = available_driver.id
-                        booking.status = 'Assigned'
-                        booking.assigned_at = datetime.utcnow()
-                        booking.auto_assigned = True
-                        available_driver.status = 'Busy'
-                        print(f"Auto-assigned booking {booking.id} to driver {available_driver.id}")
-                
-                # Auto-cancel bookings after 2 minutes if still pending
-                cancel_cutoff = datetime.utcnow() - timedelta(minutes=2)
-                expired_bookings = Booking.query.filter(
-                    Booking.status == 'Pending',
-                    Booking.requested_at < cancel_cutoff
-                ).all()
-                
-                for booking in expired_bookings:
-                    booking.status = 'Auto-Cancelled'
-                    booking.completed_at = datetime.utcnow()
-                    print(f"Auto-cancelled booking {booking.id} - no driver available")
-                
-                if pending_bookings or expired_bookings:
-                    db.session.commit()
-                    if pending_bookings:
-                        print(f"Auto-assigned {len([b for b in pending_bookings if b.status == 'Assigned'])} bookings")
-                    if expired_bookings:
-                        print(f"Auto-cancelled {len(expired_bookings)} expired bookings")
-                    
+            with session.begin():
+                stats["offlined"] = len(liveness.sweep(session))
+            queue = _pending_queue(session, now - ASSIGN_AFTER, current_app.config.get('DISPATCH_QUEUE_SCAN_LIMIT', 5000))
+            # Expired bookings are the oldest in the queue, so this counts each stale booking once
+            stats["scanned"] += len(queue)
+            for i in range(0, len(queue), batch_size):
+                _assign_batch(session, queue[i:i + batch_size], stats)
+                stats["batches"] += 1
+
+            while True:
+                stats["batches"] += 1
+                if _cancel_batch(session, now - CANCEL_AFTER, batch_size, stats) < batch_size:
+                    break
         except Exception as e:
-            print(f"Error in auto-cancel task: {e}")
-            db.session.rollback()
-        
-        # Check every 30 seconds
-        time.sleep(30)
-
-def start_scheduler():
-    """Start the background scheduler"""
-    scheduler_thread = threading.Thread(target=auto_assign_and_cancel_bookings, daemon=True)
-    scheduler_thread.start()
-    print("✅ Auto-assign and cancel scheduler started")
\ No newline at end of file
+            stats["errors"] += 1
+            logger.exception("Error in dispatch tick: %s", e, extra={"key": "scheduler.error"})
+
+    stats["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    logger.info("Scheduler tick", extra={"key": "scheduler.tick", **stats})
+    return stats
@@ -0,0 +1,77 @@
+from datetime import date, datetime
+from decimal import Decimal
+from operator import attrgetter
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson is optional - fall back to the stdlib encoder
+    orjson = None
+
+def _default(o):
+    """Encode types the stdlib/orjson encoders don't handle the way our API expects"""
+    if isinstance(o, (datetime, date)):
+        return o.isoformat()
+    if isinstance(o, Decimal):
+        return float(o)
+    if hasattr(o, '_asdict'):
+        return o._asdict()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+class IsoJSONProvider(DefaultJSONProvider):
+    """Stdlib JSON provider that encodes datetimes as ISO-8601 instead of HTTP dates"""
+    default = staticmethod(_default)
+
+class OrjsonProvider(DefaultJSONProvider):
+    """orjson-backed provider; datetimes are encoded natively as ISO-8601"""
+
+    def dumps(self, obj, **kwargs):
+        return self.dumps_bytes(obj).decode('utf-8')
+
+    def dumps_bytes(self, obj):
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj) + b"\n", mimetype=self.mimetype)
+
+def init_json_provider(app):
+    """Install the fastest available JSON provider on the app"""
+    provider_class = OrjsonProvider if orjson is not None and app.config.get('JSON_USE_ORJSON', True) else IsoJSONProvider
+    app.json = provider_class(app)
+    return app.json
+
+def dumps_bytes(obj):
+    """Encode obj to UTF-8 JSON bytes with the same rules as the app provider"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    import json
+    return json.dumps(obj, default=_default, separators=(',', ':')).encode('utf-8')
+
+def make_serializer(*fields):
+    """Build a row -> dict function once, instead of a dict literal per row.
+
+    Each field is either an attribute name, or a (key, attribute) pair to
+    rename it in the output; dotted attribute paths are allowed. Works for
+    ORM objects and for projected Row objects alike. Datetimes are left as
+    is and encoded by the JSON provider.
+
+        serialize_user = make_serializer('id', 'name', ('phone', 'phone_number'))
+        [serialize_user(u) for u in users]
+    """
+    keys = tuple(f if isinstance(f, str) else f[0] for f in fields)
+    attrs = tuple(f if isinstance(f, str) else f[1] for f in fields)
+    getter = attrgetter(*attrs)
+
+    if len(keys) == 1:
+        key = keys[0]
+        return lambda row: {key: getter(row)}
+
+    def serialize(row):
+        return dict(zip(keys, getter(row)))
+
+    serialize.fields = keys
+    return serialize
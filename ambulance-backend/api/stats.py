@@ -0,0 +1,78 @@
+import threading
+import time
+from flask import current_app
+from sqlalchemy import text, bindparam
+from .extensions import db
+
+# Tables reported by the root and health endpoints, keyed by response name
+STATS_TABLES = {
+    'hospitals': 'hospitals',
+    'drivers': 'drivers',
+    'bookings': 'bookings'
+}
+
+_refresh_lock = threading.Lock()
+_cache = {"counts": None, "refreshed_at": 0.0, "source": None}
+
+def _estimated_counts():
+    """Planner row estimates from pg_class - O(1), no table scan"""
+    rows = db.session.execute(
+        text("SELECT relname, reltuples::bigint FROM pg_class WHERE relname IN :names AND relkind = 'r'")
+        .bindparams(bindparam('names', expanding=True)),
+        {"names": list(STATS_TABLES.values())}
+    ).fetchall()
+    estimates = {relname: int(reltuples) for relname, reltuples in rows}
+
+    counts = {}
+    for key, table in STATS_TABLES.items():
+        estimate = estimates.get(table, -1)
+        if estimate < 0:
+            # Never vacuumed/analyzed yet (reltuples = -1), fall back to an exact count once
+            estimate = db.session.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+        counts[key] = estimate
+    return counts
+
+def _exact_counts():
+    return {
+        key: db.session.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+        for key, table in STATS_TABLES.items()
+    }
+
+def refresh_table_counts():
+    """Recompute the cached counts (estimates on Postgres, exact elsewhere)"""
+    if db.engine.dialect.name == 'postgresql':
+        counts, source = _estimated_counts(), 'estimate'
+    else:
+        counts, source = _exact_counts(), 'exact'
+
+    _cache.update(counts=counts, refreshed_at=time.monotonic(), source=source)
+    return counts
+
+def get_table_counts():
+    """Return cached table counts, refreshing at most once per STATS_CACHE_TTL_SECONDS.
+
+    Only one request refreshes an expired cache; concurrent callers get the
+    previous snapshot instead of piling up behind the same queries.
+    """
+    ttl = current_app.config.get('STATS_CACHE_TTL_SECONDS', 60)
+    age = time.monotonic() - _cache["refreshed_at"]
+
+    if _cache["counts"] is None or age >= ttl:
+        if _refresh_lock.acquire(blocking=_cache["counts"] is None):
+            try:
+                refresh_table_counts()
+            finally:
+                _refresh_lock.release()
+
+    return {
+        "counts": dict(_cache["counts"]),
+        "source": _cache["source"],
+        "age_seconds": round(time.monotonic() - _cache["refreshed_at"], 1)
+    }
+
+def check_database():
+    """Constant-time connectivity probe"""
+    db.session.execute(text("SELECT 1"))
+
+def stats_requested(args):
+    return args.get('stats', '').lower() in ('1', 'true', 'yes', 'on')
@@ -0,0 +1,140 @@
+"""Rider status polling benchmark: per-entity lookups vs the joined booking view.
+
+Creates --trackers riders, each with one active booking, then runs --rounds
+polling rounds in which every tracker polls its booking status once. Between
+rounds a --churn fraction of bookings change status through the ORM, as
+driver status updates would.
+
+Compares the old booking + Driver.query.get + Hospital.query.get shape with
+the joined view. Reports database round trips per poll and wall time, plus
+the time with --rtt-ms of network latency added per round trip (SQLite has
+none, a networked Postgres does). Nothing is cached, so the numbers hold at
+any polling rate, including the rider app's (LiveTrackingScreen polls status
+every 3s and location every 5s).
+
+    cd ambulance-backend
+    python -m benchmarks.bench_booking_view --trackers 10000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+def insert_trackers(n):
+    from api.extensions import db
+    from api.models import Booking, Driver, Hospital, User
+
+    hospitals = db.session.query(Hospital.id, Hospital.latitude, Hospital.longitude).all()
+    rng = random.Random(42)
+    db.session.bulk_insert_mappings(User, [
+        {"phone_number": f"+9170000{i:05d}", "name": f"Rider {i}"} for i in range(n)
+    ])
+    db.session.bulk_insert_mappings(Driver, [{
+        "name": f"Driver {i}",
+        "phone_number": f"+9180000{i:05d}",
+        "license_number": f"LIC{i:07d}",
+        "vehicle_number": f"WB{i:07d}",
+        "status": 'Busy',
+        "current_latitude": hospitals[i % len(hospitals)].latitude + rng.uniform(-0.05, 0.05),
+        "current_longitude": hospitals[i % len(hospitals)].longitude + rng.uniform(-0.05, 0.05),
+        "hospital_id": hospitals[i % len(hospitals)].id,
+        "driver_id": f"driver{i:07d}"
+    } for i in range(n)])
+    db.session.commit()
+
+    user_ids = [row[0] for row in db.session.query(User.id).order_by(User.id)]
+    driver_ids = [row[0] for row in db.session.query(Driver.id).order_by(Driver.id)]
+    db.session.bulk_insert_mappings(Booking, [{
+        "booking_code": f"{i:08d}",
+        "user_id": user_ids[i],
+        "hospital_id": hospitals[i % len(hospitals)].id,
+        "ambulance_id": driver_ids[i],
+        "pickup_location": f"Pickup {i}",
+        "pickup_latitude": hospitals[i % len(hospitals)].latitude + rng.uniform(-0.05, 0.05),
+        "pickup_longitude": hospitals[i % len(hospitals)].longitude + rng.uniform(-0.05, 0.05),
+        "booking_type": 'Emergency',
+        "severity": 'High',
+        "status": 'Assigned'
+    } for i in range(n)])
+    db.session.commit()
+    return [tuple(row) for row in db.session.query(Booking.id, Booking.user_id).order_by(Booking.id)]
+
+def legacy_status(booking_id, user_id):
+    """The pre-view shape of get_booking_status: three round trips"""
+    from api.models import Booking, Driver, Hospital
+
+    booking = Booking.query.filter_by(id=booking_id, user_id=user_id).first()
+    driver = Driver.query.get(booking.ambulance_id) if booking.ambulance_id else None
+    hospital = Hospital.query.get(booking.hospital_id)
+    return (booking.status, driver.name if driver else None, hospital.latitude if hospital else None)
+
+def view_status(booking_id, user_id):
+    from api.booking_view import booking_view
+
+    booking = booking_view(booking_id)
+    assert booking.user_id == user_id
+    return (booking.status, booking.driver_name, booking.hospital_latitude)
+
+def run(label, poll, trackers, churn_plan, rtt_ms):
+    from sqlalchemy import event
+    from api.extensions import db
+    from api.models import Booking
+
+    statements = [0]
+    def count(*args):
+        statements[0] += 1
+
+    elapsed = 0.0
+    polls = 0
+    for churned in churn_plan:
+        # Status changes committed between rounds; not counted as polling traffic
+        for booking_id in churned:
+            booking = db.session.get(Booking, booking_id)
+            booking.status = 'On Route' if booking.status == 'Assigned' else 'Assigned'
+        db.session.commit()
+        db.session.remove()
+
+        event.listen(db.engine, 'before_cursor_execute', count)
+        start = time.perf_counter()
+        for booking_id, user_id in trackers:
+            poll(booking_id, user_id)
+            db.session.remove()  # each poll is its own request
+        elapsed += time.perf_counter() - start
+        event.remove(db.engine, 'before_cursor_execute', count)
+        polls += len(trackers)
+
+    per_poll = statements[0] / polls
+    print(f"  {label:<28}{per_poll:>11.2f}{elapsed * 1000:>11.0f}{(elapsed * 1000 + statements[0] * rtt_ms):>14.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--trackers', type=int, default=10000)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--churn', type=float, default=0.05, help="Fraction of bookings changing status per round")
+    parser.add_argument('--rtt-ms', type=float, default=0.5, help="Network round trip to add per statement")
+    parser.add_argument('--database-uri', help="Defaults to a temporary SQLite file")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    os.environ['TEST_DATABASE_URI'] = args.database_uri or f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+
+    from api import create_app
+    app = create_app('testing')
+
+    with app.app_context():
+        start = time.perf_counter()
+        trackers = insert_trackers(args.trackers)
+        print(f"Inserted {args.trackers} riders, drivers and bookings in {time.perf_counter() - start:.2f}s")
+
+        rng = random.Random(7)
+        booking_ids = [booking_id for booking_id, _ in trackers]
+        churn_plan = [rng.sample(booking_ids, int(len(booking_ids) * args.churn)) for _ in range(args.rounds)]
+
+        print(f"{args.rounds} rounds x {args.trackers} trackers, {args.churn:.0%} status churn per round")
+        print(f"  {'':<28}{'trips/poll':>11}{'wall ms':>11}{f'+{args.rtt_ms:g}ms rtt':>14}")
+        run("per-entity lookups", legacy_status, trackers, churn_plan, args.rtt_ms)
+        run("joined view", view_status, trackers, churn_plan, args.rtt_ms)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""Booking creation benchmark: lookup-then-insert vs single INSERT ... SELECT ... RETURNING.
+
+Times --bookings creations through the old create_booking sequence
+(create_all, hospital count, hospital and user lookups, code collision
+check, ORM insert) against api.bookings.insert_booking, which validates
+the user and hospital in the insert itself. Reports statements per
+booking and p50/p95 latency, plus p50 with --rtt-ms of network latency
+added per round trip (SQLite has none, a networked Postgres does).
+
+    cd ambulance-backend
+    python -m benchmarks.bench_create_booking --bookings 2000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+def legacy_create(user_id, hospital_id, data):
+    """The pre-RETURNING shape of create_booking's database work"""
+    from api.extensions import db
+    from api.bookings import generate_booking_code
+    from api.models import Booking, Hospital, User
+
+    db.create_all()
+    if Hospital.query.count() == 0:
+        raise RuntimeError("no hospitals")
+    hospital = Hospital.query.get(hospital_id)
+    user = User.query.get(user_id)
+    if not hospital or not user:
+        raise RuntimeError("missing reference")
+    while True:
+        code = generate_booking_code()
+        if not Booking.query.filter_by(booking_code=code).first():
+            break
+    booking = Booking(
+        booking_code=code,
+        user_id=user_id,
+        hospital_id=hospital_id,
+        pickup_location=data['pickup_location'],
+        booking_type=data['booking_type'],
+        accident_details=json.dumps({}),
+        patient_name=user.name,
+        patient_phone=user.phone_number
+    )
+    db.session.add(booking)
+    db.session.commit()
+    return booking.id
+
+def single_statement_create(user_id, hospital_id, data):
+    from api.extensions import db
+    from api.bookings import generate_booking_code, insert_booking
+    from api.hospital_cache import get_catalogue
+
+    if not get_catalogue()[0]:
+        raise RuntimeError("no hospitals")
+    created = insert_booking(db.session, user_id, hospital_id, {
+        "booking_code": generate_booking_code(),
+        "pickup_location": data['pickup_location'],
+        "booking_type": data['booking_type'],
+        "accident_details": json.dumps({}),
+        "status": 'Pending',
+        "auto_assigned": False
+    })
+    if created is None:
+        raise RuntimeError("missing reference")
+    db.session.commit()
+    return created.id
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(pct / 100.0 * len(samples)))]
+
+def run(label, create, n, user_id, hospital_ids, rtt_ms):
+    from sqlalchemy import event
+    from api.extensions import db
+
+    statements = [0]
+    def count(*args):
+        statements[0] += 1
+
+    data = {"pickup_location": "Benchmark Road", "booking_type": "Normal"}
+    create(user_id, hospital_ids[0], data)  # warm caches
+    db.session.remove()
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    latencies = []
+    for i in range(n):
+        start = time.perf_counter()
+        create(user_id, hospital_ids[i % len(hospital_ids)], data)
+        latencies.append((time.perf_counter() - start) * 1000)
+        db.session.remove()  # each creation is its own request
+    event.remove(db.engine, 'before_cursor_execute', count)
+
+    per_booking = statements[0] / n
+    print(f"  {label:<32}{per_booking:>14.2f}{percentile(latencies, 50):>9.2f}{percentile(latencies, 95):>9.2f}"
+          f"{percentile(latencies, 50) + per_booking * rtt_ms:>14.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bookings', type=int, default=2000)
+    parser.add_argument('--rtt-ms', type=float, default=0.5, help="Network round trip to add per statement")
+    parser.add_argument('--database-uri', help="Defaults to a temporary SQLite file")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    os.environ['TEST_DATABASE_URI'] = args.database_uri or f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+
+    from api import create_app
+    from api.extensions import db
+    from api.models import Hospital, User
+    app = create_app('testing')
+
+    with app.app_context():
+        user = User(phone_number='+917000000000', name='Benchmark Rider')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+        hospital_ids = [row[0] for row in db.session.query(Hospital.id)]
+
+        print(f"{args.bookings} bookings per path")
+        print(f"  {'':<32}{'stmts/booking':>14}{'p50 ms':>9}{'p95 ms':>9}{f'p50+{args.rtt_ms:g}ms rtt':>14}")
+        run("lookups + ORM insert", legacy_create, args.bookings, user_id, hospital_ids, args.rtt_ms)
+        run("INSERT ... SELECT ... RETURNING", single_statement_create, args.bookings, user_id, hospital_ids, args.rtt_ms)
+
+if __name__ == '__main__':
+    main()
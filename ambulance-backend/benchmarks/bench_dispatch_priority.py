@@ -0,0 +1,120 @@
+"""Dispatch queue simulation: FIFO vs severity-aware priority under surge.
+
+Simulates one hospital's fleet through a surge where bookings arrive faster
+than ambulances free up. Every --tick seconds the sweep assigns bookings
+that have waited ASSIGN_AFTER to free drivers, in either FIFO order or
+api.priority order, and auto-cancels those still pending after
+CANCEL_AFTER - the same rules as api.scheduler.dispatch_tick.
+
+Reports, per severity class, the share of bookings served and the
+p50/p95 time-to-assign.
+
+    cd ambulance-backend
+    python -m benchmarks.bench_dispatch_priority --drivers 20 --rate 6 --minutes 30
+"""
+import argparse
+import heapq
+import random
+from collections import defaultdict, namedtuple
+from datetime import datetime, timedelta
+
+from api.datagen import BOOKING_TYPE_MIX, SEVERITY_MIX
+from api.priority import prioritize
+from api.scheduler import ASSIGN_AFTER, CANCEL_AFTER
+
+SimBooking = namedtuple('SimBooking', 'id severity booking_type requested_at')
+
+def generate_arrivals(rng, rate_per_minute, minutes, start):
+    severities, severity_weights = zip(*SEVERITY_MIX)
+    types, type_weights = zip(*BOOKING_TYPE_MIX)
+    arrivals = []
+    t = 0.0
+    while True:
+        t += rng.expovariate(rate_per_minute / 60.0)
+        if t > minutes * 60:
+            return arrivals
+        arrivals.append(SimBooking(
+            len(arrivals),
+            rng.choices(severities, severity_weights)[0],
+            rng.choices(types, type_weights)[0],
+            start + timedelta(seconds=t)
+        ))
+
+def simulate(arrivals, drivers, service_minutes, tick, order, seed, start):
+    rng = random.Random(seed)
+    free = drivers
+    releases = []  # min-heap of driver release times
+    pending = []
+    waits = defaultdict(list)
+    cancelled = defaultdict(int)
+    next_arrival = 0
+    now = start
+    end = arrivals[-1].requested_at + CANCEL_AFTER + timedelta(seconds=tick)
+
+    while now <= end:
+        while next_arrival < len(arrivals) and arrivals[next_arrival].requested_at <= now:
+            pending.append(arrivals[next_arrival])
+            next_arrival += 1
+        while releases and releases[0] <= now:
+            heapq.heappop(releases)
+            free += 1
+
+        stale = [b for b in pending if now - b.requested_at >= ASSIGN_AFTER]
+        queue = prioritize(stale) if order == 'priority' else sorted(stale, key=lambda b: b.requested_at)
+        served = set()
+        for booking in queue:
+            if not free:
+                break
+            free -= 1
+            served.add(booking.id)
+            waits[booking.severity].append((now - booking.requested_at).total_seconds())
+            heapq.heappush(releases, now + timedelta(minutes=rng.expovariate(1.0 / service_minutes)))
+
+        still_pending = []
+        for booking in pending:
+            if booking.id in served:
+                continue
+            if now - booking.requested_at >= CANCEL_AFTER:
+                cancelled[booking.severity] += 1
+            else:
+                still_pending.append(booking)
+        pending = still_pending
+        now += timedelta(seconds=tick)
+
+    return waits, cancelled
+
+def percentile(samples, pct):
+    if not samples:
+        return float('nan')
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(pct / 100.0 * len(samples)))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--drivers', type=int, default=20)
+    parser.add_argument('--rate', type=float, default=6.0, help="Bookings per minute during the surge")
+    parser.add_argument('--minutes', type=float, default=30, help="Surge duration")
+    parser.add_argument('--service-minutes', type=float, default=12, help="Mean time an ambulance stays busy")
+    parser.add_argument('--tick', type=float, default=5, help="Sweep interval in seconds")
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    start = datetime(2025, 1, 1)
+    arrivals = generate_arrivals(random.Random(args.seed), args.rate, args.minutes, start)
+    totals = defaultdict(int)
+    for booking in arrivals:
+        totals[booking.severity] += 1
+    print(f"{len(arrivals)} bookings over {args.minutes:g} min, {args.drivers} ambulances, "
+          f"mean service {args.service_minutes:g} min, sweep every {args.tick:g}s")
+
+    for order in ('fifo', 'priority'):
+        waits, cancelled = simulate(arrivals, args.drivers, args.service_minutes, args.tick, order, args.seed, start)
+        print(f"\n{order}")
+        print(f"  {'severity':<10}{'total':>7}{'served':>9}{'cancel':>8}{'p50 s':>8}{'p95 s':>8}")
+        for severity, _ in SEVERITY_MIX:
+            served = len(waits[severity])
+            print(f"  {severity:<10}{totals[severity]:>7}{served / max(totals[severity], 1):>9.0%}"
+                  f"{cancelled[severity]:>8}{percentile(waits[severity], 50):>8.0f}{percentile(waits[severity], 95):>8.0f}")
+
+if __name__ == '__main__':
+    main()
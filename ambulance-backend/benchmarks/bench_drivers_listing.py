@@ -0,0 +1,119 @@
+"""Fleet listing benchmark: ORM entity materialization vs column projection.
+
+Loads N drivers spread over the seeded hospitals, then times building the
+/api/drivers payload with the old query(Driver, Hospital) shape against
+the projected driver_listing_query(), both for the full fleet and for a
+filtered bounding-box page.
+
+    cd ambulance-backend
+    python -m benchmarks.bench_drivers_listing --drivers 50000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+def time_it(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+def insert_drivers(n):
+    from api.extensions import db
+    from api.models import Driver, Hospital
+
+    hospitals = db.session.query(Hospital.id, Hospital.latitude, Hospital.longitude).all()
+    rng = random.Random(42)
+    statuses = ['Available'] * 6 + ['Busy'] * 3 + ['Offline']
+
+    batch = []
+    for i in range(n):
+        hospital = hospitals[i % len(hospitals)]
+        batch.append({
+            "name": f"Driver {i}",
+            "phone_number": f"+9180000{i:05d}",
+            "license_number": f"LIC{i:07d}",
+            "vehicle_number": f"WB{i:07d}",
+            "status": rng.choice(statuses),
+            "current_latitude": hospital.latitude + rng.uniform(-0.05, 0.05),
+            "current_longitude": hospital.longitude + rng.uniform(-0.05, 0.05),
+            "is_available": True,
+            "hospital_id": hospital.id,
+            "driver_id": f"driver{i:07d}",
+            "password": "driver123"
+        })
+    db.session.bulk_insert_mappings(Driver, batch)
+    db.session.commit()
+
+def orm_listing(filters):
+    """The pre-projection implementation (with the location attribute fixed)"""
+    from api.extensions import db
+    from api.models import Driver, Hospital
+
+    query = db.session.query(Driver, Hospital).join(Hospital, Driver.hospital_id == Hospital.id)
+    if filters.get('statuses'):
+        query = query.filter(Driver.status.in_(filters['statuses']))
+    if filters.get('bbox'):
+        south, west, north, east = filters['bbox']
+        query = query.filter(Driver.current_latitude.between(south, north), Driver.current_longitude.between(west, east))
+
+    result = [{
+        "id": driver.id,
+        "name": driver.name,
+        "phone": driver.phone_number,
+        "vehicle_number": driver.vehicle_number,
+        "status": driver.status,
+        "location": f"{driver.current_latitude},{driver.current_longitude}" if driver.current_latitude and driver.current_longitude else "Unknown",
+        "login_id": driver.driver_id,
+        "hospital": {
+            "id": hospital.id,
+            "name": hospital.name,
+            "address": hospital.address,
+            "contact": hospital.contact_number
+        }
+    } for driver, hospital in query.order_by(Driver.id).all()]
+    db.session.expunge_all()
+    return result
+
+def projected_listing(filters):
+    from api.models import Driver
+    from api.driver_listing import driver_listing_query, serialize_driver_row
+
+    return [serialize_driver_row(row) for row in driver_listing_query(**filters).order_by(Driver.id).all()]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--drivers', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--database-uri', help="Defaults to a temporary SQLite file")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    os.environ['TEST_DATABASE_URI'] = args.database_uri or f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+
+    from api import create_app
+    app = create_app('testing')
+
+    with app.app_context():
+        start = time.perf_counter()
+        insert_drivers(args.drivers)
+        print(f"Inserted {args.drivers} drivers in {time.perf_counter() - start:.2f}s")
+
+        scenarios = [
+            ("full fleet", {}),
+            ("Available in central bbox", {"statuses": ["Available"], "bbox": (22.50, 88.32, 22.55, 88.40)})
+        ]
+        for label, filters in scenarios:
+            orm_ms, orm_rows = time_it(lambda: orm_listing(filters), args.repeat)
+            proj_ms, proj_rows = time_it(lambda: projected_listing(filters), args.repeat)
+            assert orm_rows == proj_rows, "projection must produce the same payload"
+            print(f"{label} ({len(proj_rows)} rows, best of {args.repeat}):")
+            print(f"  ORM query(Driver, Hospital)   {orm_ms:9.1f} ms")
+            print(f"  projected driver_listing      {proj_ms:9.1f} ms   x{orm_ms / proj_ms:4.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Fleet table benchmark: driver position reads/writes through the shared mmap file.
+
+Starts --writers processes that each write fixes for their share of
+--drivers as fast as they can, while --readers processes read random
+drivers' positions, all against one fleet table file, for --seconds.
+Every fix is written with longitude == latitude, so a reader seeing the
+two differ has caught a torn slot. Reports writes/s, reads/s, per-op cost
+and torn reads (which should be 0), alongside the database round trip a
+position read cost before (--rtt-ms).
+
+    cd ambulance-backend
+    python -m benchmarks.bench_fleet_table --writers 4 --readers 4
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+def writer(path, slots, drivers, seconds, results):
+    from api.fleet_table import FleetTable
+
+    table = FleetTable(path, slots)
+    rng = random.Random(os.getpid())
+    writes = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        value = rng.uniform(-90, 90)
+        table.write(rng.choice(drivers), value, value, time.time(), 'Busy')
+        writes += 1
+    results.put(('write', writes, 0))
+
+def reader(path, slots, n_drivers, seconds, results):
+    from api.fleet_table import FleetTable
+
+    table = FleetTable(path, slots)
+    rng = random.Random(os.getpid())
+    reads = torn = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        entry = table.read(rng.randint(1, n_drivers))
+        if entry is not None and entry[0] != entry[1]:
+            torn += 1
+        reads += 1
+    results.put(('read', reads, torn))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--drivers', type=int, default=5000)
+    parser.add_argument('--slots', type=int, default=16384)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--rtt-ms', type=float, default=0.5, help="Network round trip of the database read it replaces")
+    args = parser.parse_args()
+
+    from api.fleet_table import FleetTable
+
+    path = os.path.join(tempfile.mkdtemp(), 'fleet.table')
+    FleetTable(path, args.slots)  # create the file before the workers race to
+    ids = list(range(1, args.drivers + 1))
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=writer, args=(path, args.slots, ids[i::args.writers], args.seconds, results))
+        for i in range(args.writers)
+    ] + [
+        multiprocessing.Process(target=reader, args=(path, args.slots, args.drivers, args.seconds, results))
+        for _ in range(args.readers)
+    ]
+    for process in processes:
+        process.start()
+    totals = {'write': [0, 0], 'read': [0, 0]}
+    for _ in processes:
+        kind, ops, torn = results.get()
+        totals[kind][0] += ops
+        totals[kind][1] += torn
+    for process in processes:
+        process.join()
+
+    print(f"{args.drivers} drivers, {args.writers} writer and {args.readers} reader processes, {args.seconds:g}s")
+    print(f"  {'':<8}{'ops/s':>12}{'us/op':>9}{'torn':>7}")
+    for kind, workers in (('write', args.writers), ('read', args.readers)):
+        ops, torn = totals[kind]
+        if workers and ops:
+            print(f"  {kind:<8}{ops / args.seconds:>12.0f}{workers * args.seconds / ops * 1e6:>9.2f}{torn:>7}")
+    print(f"  a database position read costs at least {args.rtt_ms * 1000:.0f}us of round trip alone")
+
+if __name__ == '__main__':
+    main()
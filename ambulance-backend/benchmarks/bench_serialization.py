@@ -0,0 +1,85 @@
+"""Serialization benchmark for large list responses.
+
+Compares the hand-written dict-per-row + stdlib jsonify path against the
+generated row serializers + orjson provider, on a 10k-row user payload.
+
+    cd ambulance-backend
+    python -m benchmarks.bench_serialization --rows 10000 --repeat 5
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from flask import Flask
+
+from api.serialization import IsoJSONProvider, OrjsonProvider, make_serializer, orjson
+
+def make_rows(n):
+    base = datetime(2025, 1, 1)
+    return [SimpleNamespace(
+        id=i,
+        name=f"User {i}",
+        email=f"user{i}@example.com",
+        phone_number=f"+9190000{i:05d}",
+        address=f"{i} Park Street, Kolkata",
+        emergency_contacts=None,
+        created_at=base + timedelta(seconds=i)
+    ) for i in range(n)]
+
+def legacy_dicts(rows):
+    return [{
+        'id': user.id,
+        'name': user.name,
+        'email': user.email,
+        'phone_number': user.phone_number,
+        'address': user.address,
+        'emergency_contacts': user.emergency_contacts,
+        'created_at': user.created_at.isoformat() if user.created_at else None
+    } for user in rows]
+
+serialize_user = make_serializer(
+    'id', 'name', 'email', 'phone_number', 'address', 'emergency_contacts', 'created_at'
+)
+
+def time_it(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    app = Flask(__name__)
+
+    app.json = IsoJSONProvider(app)
+    with app.app_context():
+        legacy = time_it(lambda: app.json.response({'users': legacy_dicts(rows)}), args.repeat)
+        generated_std = time_it(lambda: app.json.response({'users': [serialize_user(u) for u in rows]}), args.repeat)
+
+    results = [
+        ("dict literal + isoformat + stdlib json", legacy),
+        ("make_serializer + stdlib json", generated_std),
+    ]
+
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
+        with app.app_context():
+            generated_orjson = time_it(lambda: app.json.response({'users': [serialize_user(u) for u in rows]}), args.repeat)
+        results.append(("make_serializer + orjson", generated_orjson))
+    else:
+        print("orjson not installed - skipping orjson provider")
+
+    print(f"Serializing {args.rows} rows (best of {args.repeat}):")
+    for label, ms in results:
+        print(f"  {label:<42} {ms:8.2f} ms   x{legacy / ms:4.1f}")
+
+if __name__ == '__main__':
+    main()
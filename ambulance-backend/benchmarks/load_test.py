@@ -0,0 +1,249 @@
+"""Hermetic load test for the booking lifecycle.
+
+Boots the app with the testing config against a temporary SQLite file (or
+--database-uri, e.g. a local Postgres) and drives every rider through the
+full lifecycle with N concurrent workers:
+
+    OTP login -> create booking -> assign ambulance -> driver location
+    stream -> On Route / Arrived -> Completed, polling status on the way
+
+Reports p50/p95/p99 latency and throughput per endpoint. With
+--save-baseline the results are stored as JSON; later runs compare against
+that file and exit non-zero when p95 latency or throughput regress by more
+than --tolerance, or when the error rate exceeds --max-error-rate.
+
+    cd ambulance-backend
+    python -m benchmarks.load_test --workers 8 --iterations 20 --save-baseline
+    python -m benchmarks.load_test --workers 8 --iterations 20
+"""
+import argparse
+import json
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), 'baselines')
+OTP = '1234'
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not samples:
+        return 0.0
+    rank = max(0, min(len(samples) - 1, int(round(pct / 100.0 * len(samples) + 0.5)) - 1))
+    return samples[rank]
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, label, seconds, ok):
+        with self._lock:
+            self.latencies[label].append(seconds * 1000)
+            if not ok:
+                self.errors[label] += 1
+
+    def summary(self, wall_seconds):
+        endpoints = {}
+        for label, samples in sorted(self.latencies.items()):
+            samples = sorted(samples)
+            endpoints[label] = {
+                "count": len(samples),
+                "errors": self.errors[label],
+                "p50_ms": round(percentile(samples, 50), 2),
+                "p95_ms": round(percentile(samples, 95), 2),
+                "p99_ms": round(percentile(samples, 99), 2),
+                "throughput_rps": round(len(samples) / wall_seconds, 1)
+            }
+        total = sum(e["count"] for e in endpoints.values())
+        errors = sum(e["errors"] for e in endpoints.values())
+        return {
+            "wall_seconds": round(wall_seconds, 2),
+            "total_requests": total,
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "throughput_rps": round(total / wall_seconds, 1),
+            "endpoints": endpoints
+        }
+
+class Session:
+    """One simulated client: a Flask test client plus its bearer token"""
+
+    def __init__(self, app, recorder):
+        self.client = app.test_client()
+        self.recorder = recorder
+        self.token = None
+
+    def call(self, label, method, url, json_body=None, expect=(200, 201)):
+        headers = {'Authorization': f'Bearer {self.token}'} if self.token else {}
+        start = time.perf_counter()
+        response = self.client.open(url, method=method, json=json_body, headers=headers)
+        self.recorder.record(label, time.perf_counter() - start, response.status_code in expect)
+        return response
+
+def setup_fleet(app, drivers_per_hospital):
+    """Create drivers for every seeded hospital and return (hospital_id, login_id, password) tuples"""
+    client = app.test_client()
+    hospitals = client.get('/api/hospitals').get_json()
+    fleet = []
+    for hospital in hospitals:
+        for i in range(drivers_per_hospital):
+            response = client.post(f"/api/hospital/{hospital['id']}/drivers", json={
+                "name": f"Loadtest {hospital['id']} {i}",
+                "phone": f"+9170{hospital['id']:03d}{i:05d}",
+                "vehicle": f"LT{hospital['id']:03d}{i:05d}",
+                "license_number": f"LTL{hospital['id']:03d}{i:05d}"
+            }).get_json()
+            fleet.append((hospital['id'], hospital['latitude'], hospital['longitude'],
+                          response['login_id'], response['password']))
+    return fleet
+
+def rider_lifecycle(app, recorder, worker_id, iterations, pings, fleet_pool):
+    rider = Session(app, recorder)
+    phone = f"+91600{worker_id:07d}"
+
+    rider.call('POST /api/auth/signup', 'POST', '/api/auth/signup', {"phone_number": phone})
+    rider.call('POST /api/auth/signup/verify', 'POST', '/api/auth/signup/verify',
+               {"phone_number": phone, "otp": OTP})
+
+    for _ in range(iterations):
+        rider.token = None
+        rider.call('POST /api/auth/login', 'POST', '/api/auth/login', {"phone_number": phone})
+        login = rider.call('POST /api/auth/login/verify', 'POST', '/api/auth/login/verify',
+                           {"phone_number": phone, "otp": OTP}).get_json() or {}
+        rider.token = login.get('token')
+        if not rider.token:
+            continue
+
+        hospital_id, lat, lng, login_id, password, driver = fleet_pool.get()
+        try:
+            created = rider.call('POST /api/bookings', 'POST', '/api/bookings', {
+                "pickup_location": "Load test pickup",
+                "pickup_latitude": lat + 0.01,
+                "pickup_longitude": lng + 0.01,
+                "booking_type": "Emergency",
+                "severity": "High",
+                "hospital_id": hospital_id
+            }).get_json() or {}
+            booking_id = created.get('booking_id')
+            if not booking_id:
+                continue
+
+            rider.call('GET /api/bookings/<id>/status', 'GET', f'/api/bookings/{booking_id}/status')
+            driver_id = driver.driver_pk
+            driver.call('POST /api/bookings/<id>/assign', 'POST', f'/api/bookings/{booking_id}/assign',
+                        {"driver_id": driver_id})
+
+            for step in range(pings):
+                frac = (step + 1) / pings
+                driver.call('POST /driver/location', 'POST', '/driver/location', {
+                    "latitude": lat + 0.01 * frac,
+                    "longitude": lng + 0.01 * frac
+                })
+                if step == pings // 2:
+                    driver.call('GET /driver/bookings', 'GET', '/driver/bookings')
+                    rider.call('GET /api/bookings/<id>/driver-location', 'GET',
+                               f'/api/bookings/{booking_id}/driver-location')
+
+            for status in ('On Route', 'Arrived'):
+                driver.call('POST /booking/status', 'POST', '/booking/status',
+                            {"booking_id": booking_id, "status": status})
+                rider.call('GET /api/bookings/<id>/status', 'GET', f'/api/bookings/{booking_id}/status')
+
+            driver.call('POST /booking/status', 'POST', '/booking/status',
+                        {"booking_id": booking_id, "status": "Completed"})
+        finally:
+            fleet_pool.put((hospital_id, lat, lng, login_id, password, driver))
+
+def login_fleet(app, recorder, fleet):
+    pool = queue.Queue()
+    for hospital_id, lat, lng, login_id, password in fleet:
+        driver = Session(app, recorder)
+        response = driver.client.post('/driver/login', json={"login_id": login_id, "password": password}).get_json()
+        driver.token = response['access_token']
+        driver.driver_pk = response['driver']['id']
+        pool.put((hospital_id, lat, lng, login_id, password, driver))
+    return pool
+
+def compare_to_baseline(summary, baseline, tolerance, max_error_rate):
+    failures = []
+    if summary["error_rate"] > max_error_rate:
+        failures.append(f"error rate {summary['error_rate']:.2%} exceeds {max_error_rate:.2%}")
+    if summary["throughput_rps"] < baseline["throughput_rps"] * (1 - tolerance):
+        failures.append(f"throughput {summary['throughput_rps']} rps < baseline {baseline['throughput_rps']} rps")
+    for label, stats in summary["endpoints"].items():
+        base = baseline["endpoints"].get(label)
+        if base and stats["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            failures.append(f"{label}: p95 {stats['p95_ms']} ms > baseline {base['p95_ms']} ms")
+    return failures
+
+def print_report(summary):
+    print(f"\n{'endpoint':<42}{'count':>7}{'err':>5}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'rps':>8}")
+    for label, stats in summary["endpoints"].items():
+        print(f"{label:<42}{stats['count']:>7}{stats['errors']:>5}{stats['p50_ms']:>9}"
+              f"{stats['p95_ms']:>9}{stats['p99_ms']:>9}{stats['throughput_rps']:>8}")
+    print(f"\n{summary['total_requests']} requests in {summary['wall_seconds']}s "
+          f"({summary['throughput_rps']} rps), error rate {summary['error_rate']:.2%}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4, help="Concurrent riders")
+    parser.add_argument('--iterations', type=int, default=10, help="Bookings per rider")
+    parser.add_argument('--pings', type=int, default=5, help="Driver location fixes per booking")
+    parser.add_argument('--drivers-per-hospital', type=int, default=2)
+    parser.add_argument('--database-uri', help="Defaults to a temporary SQLite file")
+    parser.add_argument('--name', default='load_test', help="Baseline name")
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed regression vs baseline")
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    os.environ['FLASK_ENV'] = 'testing'
+    os.environ['TEST_DATABASE_URI'] = args.database_uri or f"sqlite:///{os.path.join(tmpdir, 'loadtest.db')}"
+
+    from api.main import app
+
+    recorder = Recorder()
+    fleet_pool = login_fleet(app, recorder, setup_fleet(app, args.drivers_per_hospital))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(rider_lifecycle, app, recorder, worker_id, args.iterations, args.pings, fleet_pool)
+                   for worker_id in range(args.workers)]
+        for future in futures:
+            future.result()
+    summary = recorder.summary(time.perf_counter() - start)
+    summary["params"] = {k: getattr(args, k) for k in ('workers', 'iterations', 'pings', 'drivers_per_hospital')}
+
+    print_report(summary)
+
+    baseline_path = os.path.join(BASELINE_DIR, f"{args.name}.json")
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(baseline_path, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"Baseline saved to {baseline_path}")
+        return 0
+
+    if not os.path.exists(baseline_path):
+        print(f"No baseline at {baseline_path} - run with --save-baseline to create one")
+        return 0
+
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    if baseline.get("params") != summary["params"]:
+        print("Warning: baseline was recorded with different parameters", baseline.get("params"))
+
+    failures = compare_to_baseline(summary, baseline, args.tolerance, args.max_error_rate)
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+import os
+import tempfile
+from datetime import datetime
+
+import pytest
+
+# TestingConfig reads TEST_DATABASE_URI at import time; api.main builds its app from FLASK_ENV
+_tmpdir = tempfile.mkdtemp()
+os.environ['FLASK_ENV'] = 'testing'
+os.environ['TEST_DATABASE_URI'] = f"sqlite:///{os.path.join(_tmpdir, 'test.db')}"
+
+from api import seed_sample_hospitals  # noqa: E402
+from api.extensions import db as _db  # noqa: E402
+from api.models import Booking, Driver, User  # noqa: E402
+
+@pytest.fixture(scope='session')
+def app():
+    # The routes are registered on api.main's app, as in the load test
+    from api.main import app
+    return app
+
+@pytest.fixture
+def db(app, monkeypatch):
+    """A freshly seeded database, with the per-process liveness index reset"""
+    from api import liveness
+
+    monkeypatch.setattr(liveness, '_index', liveness.LivenessIndex())
+    monkeypatch.setattr(liveness, '_seeded', False)
+    with app.app_context():
+        _db.drop_all()
+        _db.create_all()
+        seed_sample_hospitals()
+        yield _db
+        _db.session.remove()
+
+@pytest.fixture
+def make_driver(db):
+    counter = iter(range(1, 10 ** 6))
+
+    def make(hospital_id=1, status='Available', latitude=22.545, longitude=88.343, **fields):
+        n = next(counter)
+        driver = Driver(name=f"Driver {n}", phone_number=f"+9170000{n:05d}", license_number=f"L{n:05d}",
+                        vehicle_number=f"V{n:05d}", driver_id=f"drv{n:05d}", hospital_id=hospital_id,
+                        status=status, current_latitude=latitude, current_longitude=longitude, **fields)
+        db.session.add(driver)
+        db.session.commit()
+        return driver
+    return make
+
+@pytest.fixture
+def make_booking(db):
+    counter = iter(range(1, 10 ** 6))
+    user = User(phone_number='+919999999999', name='Rider')
+    db.session.add(user)
+    db.session.commit()
+
+    def make(hospital_id=1, status='Pending', severity='Medium', latitude=22.55, longitude=88.35, **fields):
+        n = next(counter)
+        booking = Booking(booking_code=f"{n:08d}", user_id=user.id, hospital_id=hospital_id,
+                          pickup_location=f"Pickup {n}", pickup_latitude=latitude, pickup_longitude=longitude,
+                          booking_type='Emergency', severity=severity, status=status,
+                          requested_at=fields.pop('requested_at', datetime.utcnow()), **fields)
+        db.session.add(booking)
+        db.session.commit()
+        return booking
+    make.user = user
+    return make
+
+@pytest.fixture
+def client(app, db):
+    return app.test_client()
+
+@pytest.fixture
+def auth_headers(db):
+    """Bearer headers for a user or driver id, with the claims the login routes issue"""
+    from flask_jwt_extended import create_access_token
+
+    def headers(identity, user_type='user'):
+        token = create_access_token(identity=str(identity), additional_claims={"user_type": user_type})
+        return {"Authorization": f"Bearer {token}"}
+    return headers
@@ -0,0 +1,42 @@
+import pytest
+from sqlalchemy import event
+
+@pytest.fixture
+def statements(db):
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', record)
+    yield seen
+    event.remove(db.engine, 'before_cursor_execute', record)
+
+def test_status_screen_is_one_round_trip(client, db, auth_headers, make_driver, make_booking, statements):
+    driver = make_driver(status='Busy')
+    booking = make_booking(status='Assigned', ambulance_id=driver.id)
+    url, name = f'/api/bookings/{booking.id}/status', driver.name
+    headers = auth_headers(make_booking.user.id)
+    del statements[:]
+
+    response = client.get(url, headers=headers)
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["ambulance"]["driver_name"] == name
+    assert body["eta"] is not None
+    assert len(statements) == 1
+
+def test_status_change_is_seen_on_the_next_poll(client, db, auth_headers, make_booking):
+    booking = make_booking()
+    headers = auth_headers(make_booking.user.id)
+    assert client.get(f'/api/bookings/{booking.id}/status', headers=headers).get_json()["status"] == 'Pending'
+
+    booking.status = 'Cancelled'
+    db.session.commit()
+    body = client.get(f'/api/bookings/{booking.id}/status', headers=headers).get_json()
+    assert (body["status"], body["is_cancelled"]) == ('Cancelled', True)
+
+def test_other_riders_bookings_are_hidden(client, db, auth_headers, make_booking):
+    booking = make_booking()
+    response = client.get(f'/api/bookings/{booking.id}/status', headers=auth_headers(make_booking.user.id + 1))
+    assert response.status_code == 404
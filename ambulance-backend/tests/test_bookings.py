@@ -0,0 +1,71 @@
+import pytest
+from sqlalchemy import event, select
+
+from api import bookings
+from api.models import Booking, Driver
+
+@pytest.fixture
+def post(client, auth_headers, make_booking):
+    headers = auth_headers(make_booking.user.id)
+
+    def post(headers=headers, **fields):
+        body = {"pickup_location": "Gariahat", "booking_type": "Emergency", "hospital_id": 1, **fields}
+        return client.post('/api/bookings', headers=headers, json=body)
+    return post
+
+@pytest.fixture
+def statements(db):
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', record)
+    yield seen
+    event.remove(db.engine, 'before_cursor_execute', record)
+
+def test_booking_is_created_by_one_insert_with_user_defaults(db, post, make_booking, statements):
+    name = make_booking.user.name
+    response = post(pickup_latitude='22.52', pickup_longitude='88.36')
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["status"] == 'Pending' and len(body["booking_code"]) == 8
+    inserts = [s for s in statements if s.lstrip().upper().startswith('INSERT')]
+    assert len(inserts) == 1 and inserts[0].lstrip().startswith('INSERT INTO bookings')
+    booking = db.session.get(Booking, body["booking_id"])
+    assert (booking.patient_name, booking.pickup_latitude, booking.requested_at is not None) == (name, 22.52, True)
+
+@pytest.mark.parametrize('hospital_id', [999, 'abc'])
+def test_unknown_hospital_is_a_400(db, post, hospital_id):
+    response = post(hospital_id=hospital_id)
+    assert response.status_code == 400
+    assert response.get_json()["error"] == 'Hospital not found'
+    assert not db.session.execute(select(Booking.id)).first()
+
+def test_unknown_user_is_a_401(db, post, auth_headers):
+    response = post(headers=auth_headers(4242))
+    assert response.status_code == 401
+    assert response.get_json()["error"] == 'User not found'
+
+@pytest.mark.parametrize('coordinates', [
+    {"pickup_latitude": "north", "pickup_longitude": "88.3"},
+    {"pickup_latitude": 22.5},
+    {"pickup_latitude": 95, "pickup_longitude": 88.3}
+])
+def test_bad_pickup_coordinates_are_a_400(db, post, coordinates):
+    assert post(**coordinates).status_code == 400
+
+def test_code_collision_retries_without_a_second_claim(db, post, make_driver, make_booking, monkeypatch):
+    taken = make_booking().booking_code
+    first, second = make_driver(hospital_id=1), make_driver(hospital_id=1)
+    codes = iter([taken, '87654321'])
+    monkeypatch.setattr(bookings, 'generate_booking_code', lambda: next(codes))
+
+    response = post(severity='Critical', pickup_latitude=22.545, pickup_longitude=88.343)
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body["booking_code"], body["status"]) == ('87654321', 'Assigned')
+    busy = db.session.execute(select(Driver.id).where(Driver.status == 'Busy')).scalars().all()
+    assert len(busy) == 1 and busy[0] in (first.id, second.id)
+    assert db.session.get(Booking, body["booking_id"]).ambulance_id == busy[0]
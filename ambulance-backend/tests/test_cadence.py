@@ -0,0 +1,20 @@
+from api import cadence
+
+def test_parked_driver_reports_on_time_alone(app):
+    with app.test_request_context():
+        ping = cadence.next_ping('Available', speed_kmh=0.0)
+    # A displacement threshold would silence a parked ambulance until the liveness sweep offlines it
+    assert ping["min_displacement_m"] == 0
+    assert ping["interval_seconds"] <= app.config['DRIVER_STALE_AFTER_SECONDS'] / 2
+
+def test_idle_interval_stays_inside_the_liveness_window_under_load(app, monkeypatch):
+    monkeypatch.setattr(cadence._write_rate, 'hit', lambda: 10 ** 6)
+    with app.test_request_context():
+        ping = cadence.next_ping('Available', speed_kmh=40.0)
+    assert ping["min_displacement_m"] == 0
+    assert ping["interval_seconds"] <= app.config['DRIVER_STALE_AFTER_SECONDS'] / 2
+
+def test_en_route_critical_pings_often(app):
+    with app.test_request_context():
+        ping = cadence.next_ping('Busy', 'On Route', 'Critical', speed_kmh=0.0)
+    assert ping["interval_seconds"] == cadence.EN_ROUTE_BY_SEVERITY['Critical'][0]
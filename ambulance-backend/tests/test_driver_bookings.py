@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from api.models import Booking
+
+def backdate(db, booking, seconds):
+    db.session.execute(update(Booking).where(Booking.id == booking.id).values(
+        updated_at=datetime.utcnow() - timedelta(seconds=seconds)))
+    db.session.commit()
+
+def poll(client, headers, since=''):
+    response = client.get('/driver/bookings', query_string={"since": since}, headers=headers)
+    assert response.status_code == 200
+    return response.get_json()
+
+def test_unchanged_poll_returns_an_empty_delta(client, db, auth_headers, make_driver, make_booking):
+    driver = make_driver(status='Busy')
+    booking = make_booking(status='Assigned', ambulance_id=driver.id)
+    backdate(db, booking, 60)
+    headers = auth_headers(driver.id, 'driver')
+
+    first = poll(client, headers)
+    assert [b["id"] for b in first["bookings"]] == [booking.id]
+    for _ in range(2):
+        delta = poll(client, headers, first["cursor"])
+        assert delta["bookings"] == [] and delta["removed"] == []
+        assert delta["cursor"] == first["cursor"]
+
+def test_changes_are_delivered_and_the_cursor_moves_on(client, db, auth_headers, make_driver, make_booking):
+    driver = make_driver(status='Busy')
+    booking = make_booking(status='Assigned', ambulance_id=driver.id)
+    backdate(db, booking, 60)
+    headers = auth_headers(driver.id, 'driver')
+    cursor = poll(client, headers)["cursor"]
+
+    booking.status = 'On Route'
+    db.session.commit()
+    backdate(db, booking, 30)
+    delta = poll(client, headers, cursor)
+    assert [(b["id"], b["status"]) for b in delta["bookings"]] == [(booking.id, 'On Route')]
+    assert poll(client, headers, delta["cursor"])["bookings"] == []
+
+def test_late_commit_behind_a_served_change_is_not_lost(client, db, auth_headers, make_driver, make_booking):
+    driver = make_driver(status='Busy')
+    served = make_booking(status='Assigned', ambulance_id=driver.id)
+    headers = auth_headers(driver.id, 'driver')
+    cursor = poll(client, headers)["cursor"]
+
+    # Stamped before the booking already served, but committed after the poll
+    late = make_booking(status='Assigned', ambulance_id=driver.id)
+    db.session.execute(update(Booking).where(Booking.id == late.id).values(
+        updated_at=served.updated_at - timedelta(seconds=1)))
+    db.session.commit()
+
+    delta = poll(client, headers, cursor)
+    assert late.id in [b["id"] for b in delta["bookings"]]
+
+def test_reassigned_and_finished_bookings_are_removed(client, db, auth_headers, make_driver, make_booking):
+    driver, other = make_driver(status='Busy'), make_driver(status='Busy')
+    moved = make_booking(status='Assigned', ambulance_id=driver.id)
+    finished = make_booking(status='Arrived', ambulance_id=driver.id)
+    backdate(db, moved, 60)
+    backdate(db, finished, 60)
+    headers = auth_headers(driver.id, 'driver')
+    cursor = poll(client, headers)["cursor"]
+
+    moved.ambulance_id = other.id
+    finished.status = 'Completed'
+    db.session.commit()
+    delta = poll(client, headers, cursor)
+    assert delta["bookings"] == []
+    assert sorted(delta["removed"]) == sorted([moved.id, finished.id])
+
+def test_bad_cursor_is_rejected(client, auth_headers, make_driver):
+    headers = auth_headers(make_driver().id, 'driver')
+    assert client.get('/driver/bookings?since=not-a-cursor', headers=headers).status_code == 400
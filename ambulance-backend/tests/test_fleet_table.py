@@ -0,0 +1,80 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from api import fleet_table
+from api.models import Driver
+
+pytestmark = pytest.mark.skipif(fleet_table.fcntl is None, reason="fleet table needs fcntl")
+
+SLOTS = 64
+
+@pytest.fixture
+def table(tmp_path):
+    return fleet_table.FleetTable(str(tmp_path / 'fleet.table'), SLOTS)
+
+@pytest.fixture
+def use_table(app, table, monkeypatch):
+    """Route the module-level helpers to the test table without starting a flusher"""
+    import os
+    monkeypatch.setitem(fleet_table._table, 'pid', os.getpid())
+    monkeypatch.setitem(fleet_table._table, 'table', table)
+    return table
+
+def db_position(db, driver):
+    db.session.expire_all()
+    row = db.session.get(Driver, driver.id)
+    return row.current_latitude, row.current_longitude
+
+def test_workers_share_positions_through_the_file(table):
+    other_worker = fleet_table.FleetTable(table.path, SLOTS)
+    at = time.time()
+
+    assert table.write(7, 22.5, 88.3, at, 'Busy')
+    assert other_worker.read(7) == (22.5, 88.3, at, 'Busy')
+    # Same slot, a colliding id probes on
+    assert other_worker.write(7 + SLOTS, 1.0, 2.0, at, 'Available')
+    assert table.read(7 + SLOTS)[:2] == (1.0, 2.0)
+    assert table.read(8) is None
+
+def test_flush_persists_new_fixes_once(app, db, make_driver, table):
+    driver = make_driver(latitude=22.0, longitude=88.0)
+    set_old = update(Driver).where(Driver.id == driver.id).values(updated_at=datetime.utcnow() - timedelta(minutes=1))
+    db.session.execute(set_old)
+    db.session.commit()
+    flushed = {}
+
+    table.write(driver.id, 22.6, 88.4, time.time(), 'Available')
+    assert fleet_table.flush(app, table, flushed) == 1
+    assert db_position(db, driver) == (22.6, 88.4)
+    assert fleet_table.flush(app, table, flushed) == 0
+
+def test_flush_never_overwrites_a_newer_database_position(app, db, make_driver, table):
+    driver = make_driver()
+    fix_at = time.time()
+    db.session.execute(update(Driver).where(Driver.id == driver.id).values(
+        current_latitude=50.0, updated_at=datetime.utcnow() + timedelta(seconds=5)))
+    db.session.commit()
+
+    table.write(driver.id, 10.0, 10.0, fix_at, 'Available')
+    fleet_table.flush(app, table, {})
+    assert db_position(db, driver)[0] == 50.0
+
+def test_fixes_left_from_an_earlier_run_are_not_flushed_or_served(app, db, make_driver, tmp_path, use_table):
+    driver = make_driver(latitude=50.0, longitude=50.0)
+    db.session.execute(update(Driver).where(Driver.id == driver.id).values(
+        updated_at=datetime.utcnow() - timedelta(hours=4)))
+    db.session.commit()
+    previous_run = fleet_table.FleetTable(use_table.path, SLOTS)
+    previous_run.write(driver.id, 10.0, 10.0, time.time() - 3 * 3600, 'Available')
+
+    assert fleet_table.position(driver.id) is None
+    assert fleet_table.flush(app, use_table, {}) == 0
+    assert db_position(db, driver) == (50.0, 50.0)
+
+def test_record_position_round_trips_naive_utc(app, db, use_table):
+    at = datetime.utcnow()
+    assert fleet_table.record_position(3, 22.5, 88.3, at, 'Busy')
+    assert fleet_table.position(3) == (22.5, 88.3, at)
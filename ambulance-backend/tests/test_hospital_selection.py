@@ -0,0 +1,84 @@
+import pytest
+from sqlalchemy import event, update
+
+from api import hospital_selection
+from api.models import Booking, Driver
+from api.scheduler import fast_dispatch
+
+SSKM = (22.5448, 88.3426)
+
+@pytest.fixture(autouse=True)
+def fresh_counts(monkeypatch):
+    monkeypatch.setattr(hospital_selection, '_availability',
+                        {"version": 0, "loaded_version": -1, "loaded_at": 0.0, "counts": {}})
+
+@pytest.fixture
+def statements(db):
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', record)
+    yield seen
+    event.remove(db.engine, 'before_cursor_execute', record)
+
+def test_nearest_hospital_with_a_free_ambulance_wins(db, make_driver):
+    make_driver(hospital_id=3)
+    assert hospital_selection.select_hospital(*SSKM, 'Emergency')['id'] == 3
+
+    make_driver(hospital_id=1)
+    db.session.commit()
+    assert hospital_selection.select_hospital(str(SSKM[0]), str(SSKM[1]), 'Emergency')['id'] == 1
+
+def test_malformed_coordinates_raise(db):
+    with pytest.raises(ValueError):
+        hospital_selection.select_hospital('north', '88.3', 'Emergency')
+
+def test_committed_status_changes_update_the_counts_without_a_query(db, make_driver, make_booking, statements):
+    drivers = [make_driver(hospital_id=1) for _ in range(3)]
+    assert hospital_selection.free_ambulances()[1] == 3
+
+    driver = db.session.get(Driver, drivers[0].id)
+    assert driver.status == 'Available'  # loaded, as the routes that change it do
+    del statements[:]
+    driver.status = 'Busy'
+    db.session.commit()
+    booking = make_booking(severity='Critical')
+    assert fast_dispatch(db.session, booking)
+    db.session.commit()
+    make_driver(hospital_id=2)
+
+    counts = hospital_selection.free_ambulances()
+    assert (counts[1], counts[2]) == (1, 1)
+    assert not [s for s in statements if 'count(' in s.lower()]
+
+def test_rolled_back_changes_are_not_counted(db, make_driver):
+    driver = make_driver(hospital_id=1)
+    assert hospital_selection.free_ambulances()[1] == 1
+
+    driver.status = 'Busy'
+    db.session.flush()
+    db.session.rollback()
+    assert hospital_selection.free_ambulances()[1] == 1
+
+def test_unnoted_bulk_update_triggers_a_recount(app, db, make_driver, monkeypatch):
+    monkeypatch.setitem(app.config, 'HOSPITAL_AVAILABILITY_MIN_REFRESH_SECONDS', 0)
+    driver = make_driver(hospital_id=1)
+    assert hospital_selection.free_ambulances()[1] == 1
+
+    db.session.execute(update(Driver).where(Driver.id == driver.id).values(status='Offline'))
+    db.session.commit()
+    assert hospital_selection.free_ambulances().get(1, 0) == 0
+
+def test_booking_without_hospital_goes_to_the_nearest(client, db, auth_headers, make_booking, make_driver):
+    make_driver(hospital_id=1)
+    headers = auth_headers(make_booking.user.id)
+    response = client.post('/api/bookings', headers=headers, json={
+        "pickup_location": "SSKM gate", "booking_type": "Emergency", "severity": "Critical",
+        "pickup_latitude": str(SSKM[0]), "pickup_longitude": str(SSKM[1])
+    })
+    assert response.status_code == 200
+    assert "driver" in response.get_json()
+    assert db.session.get(Booking, response.get_json()["booking_id"]).hospital_id == 1
+    # The fast-dispatch claim was counted when the request committed, not at the savepoint
+    assert hospital_selection._availability["counts"].get(1) == 0
@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy import select
+
+from api import incidents
+from api.extensions import db as _db
+from api.models import Booking, Driver
+
+PICKUP = {"pickup_location": "Park Street crossing", "pickup_latitude": 22.5530, "pickup_longitude": 88.3520}
+
+@pytest.fixture
+def post(client, auth_headers, make_booking):
+    headers = auth_headers(make_booking.user.id)
+
+    def post(**fields):
+        return client.post('/api/incidents', headers=headers, json={**PICKUP, **fields})
+    return post
+
+def test_free_ambulances_go_to_the_most_severe_patients(db, post, make_driver):
+    make_driver(hospital_id=1)
+    response = post(patients=[{"severity": "Low"}, {"severity": "Critical"}])
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["dispatched"] == 1
+    by_severity = {b["severity"]: b for b in body["bookings"]}
+    assert by_severity["Critical"]["status"] == 'Assigned' and "driver" in by_severity["Critical"]
+    assert by_severity["Low"]["status"] == 'Pending'
+    codes = set(db.session.execute(select(Booking.incident_code)).scalars())
+    assert codes == {body["incident_code"]}
+
+@pytest.mark.parametrize('hospital_id', [999, 'abc'])
+def test_unknown_fallback_hospital_is_rejected(db, post, hospital_id):
+    response = post(patient_count=2, hospital_id=hospital_id)
+    assert response.status_code == 400
+    assert response.get_json()["error"] == 'Hospital not found'
+    assert not db.session.execute(select(Booking.id)).first()
+
+def test_waiting_patients_go_to_the_chosen_hospital(db, post):
+    response = post(patient_count=2, hospital_id='2')
+    assert response.status_code == 200
+    assert {b["hospital_id"] for b in response.get_json()["bookings"]} == {2}
+
+@pytest.mark.parametrize('fields', [
+    {"patient_count": True}, {"patient_count": 0}, {"patients": []},
+    {"patient_count": 1, "pickup_latitude": "north"}, {"patient_count": 1, "pickup_latitude": None}
+])
+def test_malformed_requests_are_rejected(db, post, fields):
+    assert post(**fields).status_code == 400
+
+@pytest.mark.parametrize('returning', [True, False])
+def test_driver_claimed_since_the_match_is_not_double_booked(db, post, make_driver, monkeypatch, returning):
+    taken = make_driver(hospital_id=1, status='Busy')
+    free = make_driver(hospital_id=1)
+    monkeypatch.setattr(_db.engine.dialect, 'update_returning', returning)
+    # The match saw both drivers Available; one was claimed before the UPDATE
+    ids = [taken.id, free.id]
+    monkeypatch.setattr(incidents, '_match', lambda session, patients, booking: [
+        session.get(Driver, driver_id) for driver_id in ids
+    ])
+
+    response = post(patients=[{"severity": "Critical"}, {"severity": "High"}])
+
+    assert response.status_code == 200
+    statuses = {b["severity"]: b["status"] for b in response.get_json()["bookings"]}
+    assert statuses == {"Critical": 'Pending', "High": 'Assigned'}
+    assert db.session.execute(select(Booking.ambulance_id).where(Booking.severity == 'High')).scalar() == free.id
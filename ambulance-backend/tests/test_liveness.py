@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from api import liveness
+from api.models import Driver
+
+def set_driver(db, driver, **values):
+    db.session.execute(update(Driver).where(Driver.id == driver.id).values(**values))
+    db.session.commit()
+
+def status_of(db, driver):
+    db.session.expire_all()
+    return db.session.get(Driver, driver.id).status
+
+def minutes_ago(minutes):
+    return datetime.utcnow() - timedelta(minutes=minutes)
+
+def test_stale_available_driver_leaves_the_pool(db, make_driver):
+    stale = make_driver()
+    fresh = make_driver()
+    set_driver(db, stale, updated_at=minutes_ago(10))
+
+    assert liveness.sweep(db.session) == [stale.id]
+    db.session.commit()
+    assert status_of(db, stale) == 'Offline'
+    assert status_of(db, fresh) == 'Available'
+
+def test_fix_seen_by_another_process_rearms_instead_of_offlining(db, make_driver):
+    driver = make_driver()
+    set_driver(db, driver, updated_at=minutes_ago(10))
+    liveness._ensure_seeded(db.session)
+    # Another worker handled a fix: only drivers.updated_at moved
+    set_driver(db, driver, updated_at=datetime.utcnow())
+
+    assert liveness.sweep(db.session) == []
+    assert status_of(db, driver) == 'Available'
+    assert driver.id in liveness._index.last_seen
+
+def test_stale_busy_driver_is_offlined_once_freed(db, make_driver, monkeypatch):
+    monkeypatch.setattr(liveness, 'RECHECK_SECONDS', 0)
+    driver = make_driver(status='Busy')
+    set_driver(db, driver, updated_at=minutes_ago(10))
+
+    assert liveness.sweep(db.session) == []
+    assert status_of(db, driver) == 'Busy'
+
+    # A cancel frees the driver, whose phone is still dead
+    set_driver(db, driver, status='Available', updated_at=minutes_ago(10))
+    assert liveness.sweep(db.session) == [driver.id]
+    db.session.commit()
+    assert status_of(db, driver) == 'Offline'
+
+def test_off_duty_driver_is_not_offlined(db, make_driver):
+    driver = make_driver(is_available=False)
+    set_driver(db, driver, updated_at=minutes_ago(10))
+
+    assert liveness.sweep(db.session) == []
+    assert status_of(db, driver) == 'Available'
+
+def test_next_fix_brings_an_offlined_driver_back(db, make_driver):
+    driver = make_driver()
+    set_driver(db, driver, updated_at=minutes_ago(10))
+    liveness.sweep(db.session)
+    db.session.commit()
+    db.session.expire_all()
+
+    driver = db.session.get(Driver, driver.id)
+    liveness.record_fix(driver, datetime.utcnow())
+    db.session.commit()
+    assert status_of(db, driver) == 'Available'
+    assert liveness.sweep(db.session) == []
@@ -0,0 +1,21 @@
+from collections import deque
+
+from api import profiler
+
+def test_finished_request_keeps_the_stacks_sampled_before_teardown(app, monkeypatch):
+    monkeypatch.setitem(profiler._settings, 'enabled', True)
+    monkeypatch.setitem(profiler._settings, 'threshold_ms', 0)
+    monkeypatch.setitem(profiler._settings, 'endpoint', None)
+    monkeypatch.setattr(profiler, '_slow', deque(maxlen=50))
+
+    with app.test_request_context('/api/health'):
+        profiler._start_request()
+        record = profiler._local.record
+        record.stacks['handler (main.py:1)'] += 1
+        profiler._finish_request(None)
+    # A sampler pass that snapshotted the record before teardown writes afterwards
+    record.stacks['late (main.py:2)'] += 1
+
+    entry = profiler._slow[-1]
+    assert entry["stacks"] == ['handler (main.py:1) 1']
+    assert not profiler._active
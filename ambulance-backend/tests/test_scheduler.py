@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from api import scheduler
+from api.models import Booking, Driver
+
+def status_of(db, model, id_):
+    db.session.expire_all()
+    return db.session.get(model, id_).status
+
+class TestRedispatchDriver:
+    def test_freed_driver_takes_the_most_urgent_pending_booking(self, db, make_driver, make_booking):
+        driver = make_driver()
+        # Waited 30s, less than Critical's 75s head start
+        low = make_booking(severity='Low', requested_at=datetime.utcnow() - timedelta(seconds=30))
+        critical = make_booking(severity='Critical')
+
+        claimed = scheduler.redispatch_driver(db.session, driver)
+        db.session.commit()
+
+        assert claimed.id == critical.id
+        assert status_of(db, Driver, driver.id) == 'Busy'
+        booking = db.session.get(Booking, critical.id)
+        assert (booking.status, booking.ambulance_id, booking.auto_assigned) == ('Assigned', driver.id, True)
+        assert status_of(db, Booking, low.id) == 'Pending'
+
+    def test_only_bookings_at_the_drivers_hospital(self, db, make_driver, make_booking):
+        driver = make_driver(hospital_id=1)
+        other = make_booking(hospital_id=2)
+
+        assert scheduler.redispatch_driver(db.session, driver) is None
+        db.session.commit()
+        assert status_of(db, Driver, driver.id) == 'Available'
+        assert status_of(db, Booking, other.id) == 'Pending'
+
+    def test_pickups_beyond_the_eta_limit_are_left_for_the_sweep(self, app, db, make_driver, make_booking):
+        driver = make_driver()
+        far = make_booking(latitude=23.5, longitude=88.35)
+        app.config['REDISPATCH_MAX_ETA_SECONDS'] = 600
+        try:
+            assert scheduler.redispatch_driver(db.session, driver) is None
+        finally:
+            app.config.pop('REDISPATCH_MAX_ETA_SECONDS')
+        assert status_of(db, Booking, far.id) == 'Pending'
+
+    def test_driver_claimed_elsewhere_is_not_dispatched_twice(self, db, make_driver, make_booking):
+        driver = make_driver(status='Busy')
+        booking = make_booking()
+
+        assert scheduler.redispatch_driver(db.session, driver) is None
+        db.session.commit()
+        assert status_of(db, Booking, booking.id) == 'Pending'
+
+    def test_lost_booking_claim_gives_the_driver_back_and_tries_the_next(self, db, make_driver, make_booking,
+                                                                        monkeypatch):
+        driver = make_driver()
+        taken = make_booking(severity='Critical')
+        fallback = make_booking(severity='Low')
+        prioritize = scheduler.prioritize
+
+        def prioritize_then_lose_the_first(candidates):
+            # An operator assigns the top booking between the scan and the claim
+            db.session.execute(update(Booking).where(Booking.id == taken.id).values(status='Assigned'))
+            return prioritize(candidates)
+        monkeypatch.setattr(scheduler, 'prioritize', prioritize_then_lose_the_first)
+
+        claimed = scheduler.redispatch_driver(db.session, driver)
+        db.session.commit()
+
+        assert claimed.id == fallback.id
+        assert status_of(db, Driver, driver.id) == 'Busy'
+        assert db.session.get(Booking, taken.id).ambulance_id is None
+
+class TestFastDispatch:
+    def new_booking(self, **fields):
+        return Booking(hospital_id=fields.pop('hospital_id', 1), pickup_location='Pickup',
+                       pickup_latitude=22.55, pickup_longitude=88.35, booking_type='Emergency',
+                       severity='Critical', status='Pending', auto_assigned=False, **fields)
+
+    def test_claims_the_nearest_available_driver(self, db, make_driver):
+        far = make_driver(latitude=22.60, longitude=88.40)
+        near = make_driver(latitude=22.551, longitude=88.351)
+        make_driver(status='Busy', latitude=22.55, longitude=88.35)
+        make_driver(hospital_id=2, latitude=22.55, longitude=88.35)
+        booking = self.new_booking()
+
+        driver = scheduler.fast_dispatch(db.session, booking)
+        db.session.commit()
+
+        assert driver.id == near.id
+        assert (booking.ambulance_id, booking.status, booking.auto_assigned) == (near.id, 'Assigned', True)
+        assert booking.assigned_at is not None
+        assert status_of(db, Driver, near.id) == 'Busy'
+        assert status_of(db, Driver, far.id) == 'Available'
+
+    def test_skips_a_driver_claimed_concurrently(self, db, make_driver, monkeypatch):
+        near = make_driver(latitude=22.551, longitude=88.351)
+        next_best = make_driver(latitude=22.56, longitude=88.36)
+        dispatch_cost = scheduler.dispatch_cost
+        raced = []
+
+        def cost_then_race(driver, booking):
+            if not raced:
+                # The sweep takes the nearest driver after the candidate query
+                db.session.execute(update(Driver).where(Driver.id == near.id).values(status='Busy'))
+                raced.append(True)
+            return dispatch_cost(driver, booking)
+        monkeypatch.setattr(scheduler, 'dispatch_cost', cost_then_race)
+
+        booking = self.new_booking()
+        assert scheduler.fast_dispatch(db.session, booking).id == next_best.id
+        assert booking.ambulance_id == next_best.id
+
+    def test_no_free_driver_leaves_the_booking_pending(self, db, make_driver):
+        make_driver(status='Busy')
+        booking = self.new_booking()
+
+        assert scheduler.fast_dispatch(db.session, booking) is None
+        assert (booking.status, booking.ambulance_id) == ('Pending', None)
+
+    def test_spent_budget_claims_nothing(self, db, make_driver):
+        driver = make_driver()
+        booking = self.new_booking()
+
+        assert scheduler.fast_dispatch(db.session, booking, budget_ms=0) is None
+        db.session.commit()
+        assert booking.status == 'Pending'
+        assert status_of(db, Driver, driver.id) == 'Available'
+
+class TestDispatchTick:
+    def test_each_stale_booking_is_scanned_once(self, db, make_driver, make_booking):
+        now = datetime.utcnow()
+        driver = make_driver()
+        assigned = make_booking(requested_at=now - timedelta(seconds=40))
+        expired = make_booking(hospital_id=2, requested_at=now - timedelta(minutes=3))
+        make_booking()  # too fresh for the sweep
+
+        stats = scheduler.dispatch_tick()
+
+        assert (stats["scanned"], stats["assigned"], stats["cancelled"], stats["errors"]) == (2, 1, 1, 0)
+        assert status_of(db, Booking, assigned.id) == 'Assigned'
+        assert status_of(db, Booking, expired.id) == 'Auto-Cancelled'
+        assert status_of(db, Driver, driver.id) == 'Busy'
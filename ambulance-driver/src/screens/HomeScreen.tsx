@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import {
   View,
   Text,
@@ -15,8 +15,9 @@ import { useFocusEffect, useNavigation } from '@react-navigation/native';
 import { useAuth } from '../context/AuthContext';
 import { useTheme } from '../context/ThemeContext';
 import { driverAPI } from '../services/api';
-import { locationService, LocationData } from '../services/location';
-import { Booking } from '../types';
+import * as Location from 'expo-location';
+import { locationService, LocationData, WatchOptions, DEFAULT_WATCH_OPTIONS } from '../services/location';
+import { Booking, NextPing } from '../types';
 import ProfileModal from '../components/ProfileModal';
 
 const HomeScreen: React.FC = () => {
@@ -28,11 +29,21 @@ const HomeScreen: React.FC = () => {
   const [isAvailable, setIsAvailable] = useState(driver?.is_available || false);
   const [currentLocation, setCurrentLocation] = useState<LocationData | null>(null);
   const [showProfile, setShowProfile] = useState(false);
+  const watchRef = useRef<Location.LocationSubscription | null>(null);
+  const watchOptionsRef = useRef<WatchOptions>(DEFAULT_WATCH_OPTIONS);
+  const heartbeatRef = useRef<ReturnType<typeof setInterval> | null>(null);
+  const lastSentRef = useRef(0);
 
   useEffect(() => {
     if (driver) {
       initializeLocation();
     }
+    return () => {
+      watchRef.current?.remove();
+      watchRef.current = null;
+      if (heartbeatRef.current) clearInterval(heartbeatRef.current);
+      heartbeatRef.current = null;
+    };
   }, [driver]);
 
   useFocusEffect(
@@ -60,27 +71,62 @@ const HomeScreen: React.FC = () => {
       setCurrentLocation(location);
 
       if (driver) {
-        await driverAPI.updateLocation(location.latitude, location.longitude);
+        const nextPing = await driverAPI.updateLocation(location.latitude, location.longitude);
+        lastSentRef.current = Date.now();
+        watchOptionsRef.current = toWatchOptions(nextPing) ?? DEFAULT_WATCH_OPTIONS;
       }
 
-      // Start watching location
-      locationService.watchLocation(async (newLocation) => {
-        setCurrentLocation(newLocation);
-        if (driver) {
-          try {
-            await driverAPI.updateLocation(newLocation.latitude, newLocation.longitude);
-          } catch (error: any) {
-            if (error.response?.status === 401) {
-              console.log('Authentication failed during location update');
-            }
-          }
-        }
-      });
+      await startWatching();
     } catch (error) {
       console.error('Location error:', error);
     }
   };
 
+  const toWatchOptions = (nextPing: NextPing | null): WatchOptions | null =>
+    nextPing
+      ? { timeInterval: nextPing.interval_seconds * 1000, distanceInterval: nextPing.min_displacement_m }
+      : null;
+
+  // (Re)start the location watch with the current cadence
+  const startWatching = async () => {
+    watchRef.current?.remove();
+    watchRef.current = await locationService.watchLocation(handleLocation, watchOptionsRef.current);
+
+    // The watch only fires after the device moves distanceInterval metres, so a
+    // parked ambulance would go quiet and be taken offline: send a fix at least
+    // every timeInterval regardless
+    if (heartbeatRef.current) clearInterval(heartbeatRef.current);
+    const interval = watchOptionsRef.current.timeInterval;
+    heartbeatRef.current = setInterval(async () => {
+      if (Date.now() - lastSentRef.current < interval) return;
+      try {
+        handleLocation(await locationService.getCurrentLocation());
+      } catch (error) {
+        console.error('Heartbeat location error:', error);
+      }
+    }, interval);
+  };
+
+  const handleLocation = async (newLocation: LocationData) => {
+    setCurrentLocation(newLocation);
+    if (!driver) return;
+    try {
+      const nextPing = await driverAPI.updateLocation(newLocation.latitude, newLocation.longitude, newLocation.speed);
+      lastSentRef.current = Date.now();
+      const options = toWatchOptions(nextPing);
+      const current = watchOptionsRef.current;
+      // Follow the server's cadence; the watch only takes new intervals when restarted
+      if (options && (options.timeInterval !== current.timeInterval || options.distanceInterval !== current.distanceInterval)) {
+        watchOptionsRef.current = options;
+        await startWatching();
+      }
+    } catch (error: any) {
+      if (error.response?.status === 401) {
+        console.log('Authentication failed during location update');
+      }
+    }
+  };
+
   const fetchBookings = async () => {
     if (!driver) return;
 
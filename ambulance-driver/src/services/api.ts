@@ -1,6 +1,6 @@
 import axios from 'axios';
 import AsyncStorage from '@react-native-async-storage/async-storage';
-import { Driver, Booking } from '../types';
+import { Driver, Booking, NextPing } from '../types';
 
 const API_BASE_URL = 'https://ambulance-booking-roan.vercel.app/';
 
@@ -35,11 +35,14 @@ export const driverAPI = {
     };
   },
 
-  updateLocation: async (latitude: number, longitude: number): Promise<void> => {
-    await api.post('/driver/location', {
+  // Returns the cadence the server wants for the next fix, if it sent one
+  updateLocation: async (latitude: number, longitude: number, speed?: number | null): Promise<NextPing | null> => {
+    const response = await api.post('/driver/location', {
       latitude,
       longitude,
+      ...(speed != null && speed >= 0 ? { speed } : {}),
     });
+    return response.data?.next_ping ?? null;
   },
 
   getAssignedBookings: async (): Promise<Booking[]> => {
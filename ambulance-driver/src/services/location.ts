@@ -3,8 +3,20 @@ import * as Location from 'expo-location';
 export interface LocationData {
   latitude: number;
   longitude: number;
+  speed?: number | null; // m/s, when the device reports it
 }
 
+export interface WatchOptions {
+  timeInterval: number; // ms
+  distanceInterval: number; // metres
+}
+
+// Used until the server negotiates a cadence via next_ping
+export const DEFAULT_WATCH_OPTIONS: WatchOptions = {
+  timeInterval: 10000, // Update every 10 seconds
+  distanceInterval: 10, // Update every 10 meters
+};
+
 export const locationService = {
   requestPermissions: async (): Promise<boolean> => {
     const { status } = await Location.requestForegroundPermissionsAsync();
@@ -22,17 +34,21 @@ export const locationService = {
     };
   },
 
-  watchLocation: (callback: (location: LocationData) => void): Location.LocationSubscription => {
+  watchLocation: (
+    callback: (location: LocationData) => void,
+    options: WatchOptions = DEFAULT_WATCH_OPTIONS
+  ): Promise<Location.LocationSubscription> => {
     return Location.watchPositionAsync(
       {
         accuracy: Location.Accuracy.High,
-        timeInterval: 10000, // Update every 10 seconds
-        distanceInterval: 10, // Update every 10 meters
+        timeInterval: options.timeInterval,
+        distanceInterval: options.distanceInterval,
       },
       (location) => {
         callback({
           latitude: location.coords.latitude,
           longitude: location.coords.longitude,
+          speed: location.coords.speed,
         });
       }
     );
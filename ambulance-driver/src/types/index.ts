@@ -38,6 +38,12 @@ export interface Booking {
   hospital_longitude?: number;
 }
 
+// Location cadence the server asks for in its /driver/location response
+export interface NextPing {
+  interval_seconds: number;
+  min_displacement_m: number;
+}
+
 export interface Hospital {
   id: number;
   name: string;